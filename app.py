@@ -1,30 +1,50 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from fpdf import FPDF
 from datetime import datetime
-import tempfile
-import os
-from decimal import Decimal, getcontext
-import math
+import time
 import pathlib
 import re
-import io
+import os
 import uuid
+from functools import partial
+
+from fueleu import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    FUEL_INDEX,
+    GWP_VALUES,
+    alternative_fuels,
+    category_names,
+    compute_blend,
+    custom_key,
+    default_phase_in_pct,
+    get_fuel,
+    initial_fuels,
+    mitigation_fuels,
+    project,
+    rank_substitutions,
+    solve_add_fuel,
+    solve_least_cost,
+    solve_pooling,
+    solve_substitution,
+    solve_substitution_all,
+    update_blend,
+)
+from fueleu.charts import render_chart
+from fueleu.instrument import PROFILE_LOG, finish_profile, mark, start_profile
+from fueleu.jobs import created_label, delete_job, ensure_worker, format_eta, list_jobs, submit_job
+from fueleu.pooling import pool_results
+from fueleu.risk import default_correlations, default_spec, risk_table, simulate, strategy_model
+from fueleu.scenarios import (HEADLINE_FIELDS, SCENARIO_STRATEGIES, compare_scenarios, delete_scenarios,
+                              load_scenario, query_scenarios, save_scenario, scenario_facets)
+from fueleu.sweep import sweep
 
 # === PAGE CONFIG ===
 st.set_page_config(page_title="Fuel EU GHG Calculator", layout="wide")
-
-# === CONSTANTS & CONFIGURATION ===
-BASE_TARGET = 91.16
-REDUCTIONS = {2025: 0.02, 2030: 0.06, 2035: 0.145, 2040: 0.31, 2045: 0.62, 2050: 0.80}
-PENALTY_RATE = 2400  # EUR per tonne of VLSFO-equivalent energy shortfall
-VLSFO_ENERGY_CONTENT = 41_000  # MJ/t
-REWARD_FACTOR_RFNBO_MULTIPLIER = 2
-GWP_VALUES = {
-    "AR4": {"CH4": 25, "N2O": 298},
-    "AR5": {"CH4": 29.8, "N2O": 273},}
+# Opt-in rerun profiling (sidebar "Debug" toggle): each mark() closes the previous stage
+profile = start_profile(st.session_state.get("debug_profile", False))
+mark(profile, "sidebar inputs")
 
 # --- CUSTOM FUELS SESSION SCAFFOLD ---
 DEFAULT_CF = {
@@ -44,110 +64,6 @@ DEFAULT_CF = {
 if "custom_fuels" not in st.session_state:
     st.session_state.custom_fuels = [] # list of dicts like DEFAULT_CF
 
-# === FUEL DATABASE ===
-FUELS = [
-    {"name": "Heavy Fuel Oil (HFO)",                                                                    "lcv": 0.0405,  "wtt": 13.5,  "ttw_co2": 3.114,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},
-    {"name": "Low Sulphur Fuel Oil (LSFO)",                                                             "lcv": 0.0405,  "wtt": 13.7,  "ttw_co2": 3.114,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},
-    {"name": "Very Low Sulphur Fuel Oil (VLSFO)",                                                       "lcv": 0.041,   "wtt": 13.2,  "ttw_co2": 3.206,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},
-    {"name": "Ultra Low Sulphur Fuel Oil (ULSFO)",                                                      "lcv": 0.0405,  "wtt": 13.2,  "ttw_co2": 3.114,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},
-    {"name": "Low Fuel Oil (LFO)",                                                                      "lcv": 0.041,   "wtt": 13.2,  "ttw_co2": 3.151,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},
-    {"name": "Marine Diesel/Gas Oil (MDO/MGO)",                                                         "lcv": 0.0427,  "wtt": 14.4,  "ttw_co2": 3.206,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},
-    {"name": "Liquefied Natural Gas (LNG Otto dual fuel medium speed)",                                 "lcv": 0.0491,  "wtt": 18.5,  "ttw_co2": 2.750,  "ttw_ch4": 0.0,      "ttw_n2O": 0.00011,  "rfnbo": False, "ch4_slip":3.1},
-    {"name": "Liquefied Natural Gas (LNG Otto dual fuel slow speed)",                                   "lcv": 0.0491,  "wtt": 18.5,  "ttw_co2": 2.750,  "ttw_ch4": 0.0,      "ttw_n2O": 0.00011,  "rfnbo": False, "ch4_slip":1.7},
-    {"name": "Liquefied Natural Gas (LNG Diesel dual fuel slow speed)",                                 "lcv": 0.0491,  "wtt": 18.5,  "ttw_co2": 2.750,  "ttw_ch4": 0.0,      "ttw_n2O": 0.00011,  "rfnbo": False, "ch4_slip":0.2},
-    {"name": "Liquefied Natural Gas (LNG LBSI)",                                                        "lcv": 0.0491,  "wtt": 18.5,  "ttw_co2": 2.750,  "ttw_ch4": 0.0,      "ttw_n2O": 0.00011,  "rfnbo": False, "ch4_slip":2.6},
-    {"name": "Liquefied Petroleum Gas (LPG propane)",                                                   "lcv": 0.0460,  "wtt": 7.8,   "ttw_co2": 3.000,  "ttw_ch4": 0.007,    "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Liquefied Petroleum Gas (LPG butane)",                                                    "lcv": 0.0460,  "wtt": 7.8,   "ttw_co2": 3.030,  "ttw_ch4": 0.007,    "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Fossil Hydrogen (H2)",                                                                    "lcv": 0.12,    "wtt": 132,   "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Fossil Ammonia (NH3)",                                                                    "lcv": 0.0186,  "wtt": 121,   "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Fossil Methanol",                                                                         "lcv": 0.0199,  "wtt": 31.3,  "ttw_co2": 1.375,  "ttw_ch4": 0.003,    "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (Rapeseed Oil,B100)",                                                           "lcv": 0.0372,  "wtt": 50.1,  "ttw_co2": 2.834,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (Wheat Straw,B100)",                                                            "lcv": 0.0372,  "wtt": 15.7,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (UCO,B20)",                                                                     "lcv": 0.03984, "wtt": 13.78, "ttw_co2": 2.4912, "ttw_ch4": 0.00004,  "ttw_n2O": 0.000144, "rfnbo": False},
-    {"name": "Biodiesel (UCO,B24)",                                                                     "lcv": 0.03971, "wtt": 13.836,"ttw_co2": 2.36664,"ttw_ch4": 0.000038, "ttw_n2O": 0.0001368,"rfnbo": False},
-    {"name": "Biodiesel (UCO,B30)",                                                                     "lcv": 0.03951, "wtt": 13.92, "ttw_co2": 2.1798, "ttw_ch4": 0.000035, "ttw_n2O": 0.000126, "rfnbo": False},
-    {"name": "Biodiesel (UCO,B65)",                                                                     "lcv": 0.03836, "wtt": 14.41, "ttw_co2": 1.0899, "ttw_ch4": 0.0000175,"ttw_n2O": 0.000063, "rfnbo": False},
-    {"name": "Biodiesel (UCO,B80)",                                                                     "lcv": 0.03786, "wtt": 14.62, "ttw_co2": 0.6228, "ttw_ch4": 0.00001,  "ttw_n2O": 0.000036, "rfnbo": False},
-    {"name": "Biodiesel (UCO,B100)",                                                                    "lcv": 0.0372,  "wtt": 14.9,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (FAME,B100)",                                                                   "lcv": 0.0372,  "wtt": 16.65869,"ttw_co2": 0.0,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (FAME,B24)",                                                                    "lcv": 0.03971, "wtt": 13.836,"ttw_co2": 2.3075, "ttw_ch4": 0.000038, "ttw_n2O": 0.0001368,"rfnbo": False},
-    {"name": "Biodiesel (waste wood Fischer-Tropsch diesel,B100)",                                      "lcv": 0.0372,  "wtt": 13.7,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (farmed wood Fischer-Tropsch diesel,B100)",                                     "lcv": 0.0372,  "wtt": 16.7,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (Fischer-Tropsch diesel from black liquor gasification,B100)",                  "lcv": 0.0372,  "wtt": 10.2,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (Animal Fats,B100)",                                                            "lcv": 0.0372,  "wtt": 20.8,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (Sunflower Oil,B100)",                                                          "lcv": 0.0372,  "wtt": 44.7,  "ttw_co2": 2.834,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (Soybean Oil,B100)",                                                            "lcv": 0.0372,  "wtt": 47.0,  "ttw_co2": 2.834,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (Palm Oil from open effluent pond,B100)",                                       "lcv": 0.0372,  "wtt": 75.7,  "ttw_co2": 2.834,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Biodiesel (Palm Oil, process with methane capture at oil mill,B100)",                     "lcv": 0.0372,  "wtt": 51.6,  "ttw_co2": 2.834,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bioethanol (Sugar Beet,E100)",                                                            "lcv": 0.0268,  "wtt": 38.2,  "ttw_co2": 1.913,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bioethanol (Maize,E100)",                                                                 "lcv": 0.0268,  "wtt": 56.8,  "ttw_co2": 1.913,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bioethanol (Other cereals excluding maize,E100)",                                         "lcv": 0.0268,  "wtt": 58.5,  "ttw_co2": 1.913,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bioethanol (Wheat,E100)",                                                                 "lcv": 0.0268,  "wtt": 15.7,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bioethanol (Sugar Cane,E100)",                                                            "lcv": 0.0268,  "wtt": 28.6,  "ttw_co2": 1.913,  "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Hydrotreated Vegetable Oil (Rape Seed,HVO100)",                                           "lcv": 0.0440,  "wtt": 50.1,  "ttw_co2": 3.115,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},
-    {"name": "Hydrotreated Vegetable Oil (Sunflower,HVO100)",                                           "lcv": 0.0440,  "wtt": 43.6,  "ttw_co2": 3.115,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},    
-    {"name": "Hydrotreated Vegetable Oil (Soybean,HVO100)",                                             "lcv": 0.0440,  "wtt": 46.5,  "ttw_co2": 3.115,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},  
-    {"name": "Hydrotreated Vegetable Oil (Palm Oil from open effluent pond,HVO100)",                    "lcv": 0.0440,  "wtt": 73.3,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Hydrotreated Vegetable Oil (Palm Oil, process with methane capture at oil mill,HVO100)",  "lcv": 0.0440,  "wtt": 48.0,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Hydrotreated Vegetable Oil (UCO,HVO100)",                                                 "lcv": 0.0440,  "wtt": 16.0,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Hydrotreated Vegetable Oil (Animal Fats,HVO100)",                                         "lcv": 0.0440,  "wtt": 21.8,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Straight Vegetable Oil (Rape Seed,SVO100)",                                               "lcv": 0.0440,  "wtt": 40.0,  "ttw_co2": 3.115,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},
-    {"name": "Straight Vegetable Oil (Sunflower,SVO100)",                                               "lcv": 0.0440,  "wtt": 34.3,  "ttw_co2": 3.115,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},    
-    {"name": "Straight Vegetable Oil (Soybean,SVO100)",                                                 "lcv": 0.0440,  "wtt": 36.9,  "ttw_co2": 3.115,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": False},  
-    {"name": "Straight Vegetable Oil (Palm Oil from open effluent pond,SVO100)",                        "lcv": 0.0440,  "wtt": 65.4,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Straight Vegetable Oil (Palm Oil, process with methane capture at oil mill,SVO100)",      "lcv": 0.0440,  "wtt": 57.2,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Straight Vegetable Oil (UCO ,SVO100)",                                                    "lcv": 0.0440,  "wtt": 2.2,   "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bio-LNG (Otto dual fuel medium speed)",                                                   "lcv": 0.0491,  "wtt": 14.1,  "ttw_co2": 2.75,   "ttw_ch4": 0.14,     "ttw_n2O": 0.00011,  "rfnbo": False, "ch4_slip":3.1},
-    {"name": "Bio-LNG (Otto dual fuel slow speed)",                                                     "lcv": 0.0491,  "wtt": 14.1,  "ttw_co2": 2.75,   "ttw_ch4": 0.14,     "ttw_n2O": 0.00011,  "rfnbo": False, "ch4_slip":1.7},
-    {"name": "Bio-LNG (Diesel dual fuel slow speed)",                                                   "lcv": 0.0491,  "wtt": 14.1,  "ttw_co2": 2.75,   "ttw_ch4": 0.14,     "ttw_n2O": 0.00011,  "rfnbo": False, "ch4_slip":0.2},
-    {"name": "Bio-LNG (LBSI)",                                                                          "lcv": 0.0491,  "wtt": 14.1,  "ttw_co2": 2.75,   "ttw_ch4": 0.14,     "ttw_n2O": 0.00011,  "rfnbo": False, "ch4_slip":2.6},
-    {"name": "Bio-Hydrogen",                                                                            "lcv": 0.12,    "wtt": 0.0,   "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bio-Methanol (waste wood methanol)",                                                      "lcv": 0.0199,  "wtt": 13.5,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bio-Methanol (farmed wood methanol)",                                                     "lcv": 0.0199,  "wtt": 16.2,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "Bio-Methanol (from black-liquor gasification)",                                           "lcv": 0.0199,  "wtt": 10.4,  "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": False},
-    {"name": "E-Methanol",                                                                              "lcv": 0.0199,  "wtt": 1.0,   "ttw_co2": 1.375,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": True},
-    {"name": "E-Diesel",                                                                                "lcv": 0.0427,  "wtt": 1.0,   "ttw_co2": 3.206,  "ttw_ch4": 0.00005,  "ttw_n2O": 0.00018,  "rfnbo": True},
-    {"name": "E-LNG (Otto dual fuel medium speed)",                                                     "lcv": 0.0491,  "wtt": 1.0,   "ttw_co2": 2.750,  "ttw_ch4": 0.0,      "ttw_n2O": 0.00011,  "rfnbo": True, "ch4_slip":3.1 },
-    {"name": "E-LNG (Otto dual fuel slow speed)",                                                       "lcv": 0.0491,  "wtt": 1.0,   "ttw_co2": 2.750,  "ttw_ch4": 0.0,      "ttw_n2O": 0.00011,  "rfnbo": True, "ch4_slip":1.7},
-    {"name": "E-LNG (Diesel dual fuel slow speed)",                                                     "lcv": 0.0491,  "wtt": 1.0,   "ttw_co2": 2.750,  "ttw_ch4": 0.0,      "ttw_n2O": 0.00011,  "rfnbo": True, "ch4_slip":0.2},
-    {"name": "E-LNG (LBSI)",                                                                            "lcv": 0.0491,  "wtt": 1.0,   "ttw_co2": 2.750,  "ttw_ch4": 0.0,      "ttw_n2O": 0.00011,  "rfnbo": True, "ch4_slip":2.6},
-    {"name": "E-Hydrogen",                                                                              "lcv": 0.1200,  "wtt": 3.6,   "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": True},
-    {"name": "E-Ammonia",                                                                               "lcv": 0.0186,  "wtt": 0.0,   "ttw_co2": 0.0,    "ttw_ch4": 0.0,      "ttw_n2O": 0.0,      "rfnbo": True},]
-
-# === HELPERS ===
-def target_intensity(year: int) -> float:
-    if year <= 2020:
-        return BASE_TARGET
-    if year <= 2029:
-        return BASE_TARGET * (1 - REDUCTIONS[2025])
-    if year <= 2034:
-        return BASE_TARGET * (1 - REDUCTIONS[2030])
-    if year <= 2039:
-        return BASE_TARGET * (1 - REDUCTIONS[2035])
-    if year <= 2044:
-        return BASE_TARGET * (1 - REDUCTIONS[2040])
-    if year <= 2049:
-        return BASE_TARGET * (1 - REDUCTIONS[2045])
-    return BASE_TARGET * (1 - REDUCTIONS[2050])
-
-
-def default_phase_in_pct(year: int) -> int:
-    # EU ETS maritime phase-in: 2024:40%, 2025:70%, 2026+:100%. Years before ETS -> 0 by default
-    if year <= 2024:
-        return 0
-    if year == 2025:
-        return 70
-    return 100
-
-
-def compute_ets_cost(ttw_co2_g: Decimal, ttw_nonco2_g: Decimal, price_eur_per_t: float,
-                      effective_coverage_pct: float, phase_in_pct: float, include_nonco2: bool):
-    """Return (cost_eur, covered_tonnes). ETS is TtW-only. CH4+N2O+slip included from 2026+ if include_nonco2 is True."""
-    ttw_for_ets = ttw_co2_g + (ttw_nonco2_g if include_nonco2 else Decimal("0"))
-    covered_g = ttw_for_ets * Decimal(str(effective_coverage_pct / 100.0)) * Decimal(str(phase_in_pct / 100.0))
-    covered_tonnes = float(covered_g / Decimal("1000000"))
-    return covered_tonnes * float(price_eur_per_t), covered_tonnes
-
 # === README FILE ===
 if "show_readme" not in st.session_state:
     st.session_state.show_readme = False
@@ -194,23 +110,9 @@ st.sidebar.info("Enter fuel prices in USD & provide exchange rate.")
 # Fuel pickers
 fuel_inputs = {}
 fuel_price_inputs = {}
-initial_fuels = [
-    f["name"]
-    for f in FUELS
-    if (not f["rfnbo"]) and ("Bio" not in f["name"]) and ("Biodiesel" not in f["name"]) and ("E-" not in f["name"]) and ("Vegetable" not in f["name"]) and ("SVO" not in f["name"]) and ("HVO" not in f["name"]) and ("Bio-" not in f["name"])  # keep purely fossil
-]
-mitigation_fuels = [f["name"] for f in FUELS if ("Bio" in f["name"]) or ("Biodiesel" in f["name"]) or ("Vegetable" in f["name"]) or f["rfnbo"] or ("E-" in f["name"]) or ("HVO" in f["name"]) or ("SVO" in f["name"]) ]
-alternative_fuels = mitigation_fuels  # alias used below
-
-categories = {
-    "Fossil": [f for f in FUELS if f in [x for x in FUELS if x["name"] in initial_fuels]],
-    "Bio": [f for f in FUELS if ("Bio" in f['name']) or ("Biodiesel" in f['name']) or ("Vegetable" in f['name']) or ("HVO" in f['name']) or ("SVO" in f['name'])],
-    "RFNBO": [f for f in FUELS if f['rfnbo'] or ("E-" in f['name'])],
-}
-
-for category, fuels_in_cat in categories.items():
+for category, names_in_cat in category_names.items():
     with st.sidebar.expander(f"{category} Fuels", expanded=False):
-        selected_fuels = st.multiselect(f"Select {category} Fuels", [f["name"] for f in fuels_in_cat], key=f"multiselect_{category}")
+        selected_fuels = st.multiselect(f"Select {category} Fuels", names_in_cat, key=f"multiselect_{category}")
         for selected_fuel in selected_fuels:
             qty = st.number_input(f"{selected_fuel} (t)", min_value=0.0, step=1.0, value=0.0, format="%0.0f", key=f"qty_{selected_fuel}")
             fuel_inputs[selected_fuel] = qty
@@ -424,162 +326,60 @@ phase_in_pct = st.sidebar.slider(
 help="Default follows EU ETS maritime: 2025→70%, 2026+→100%. Override as needed.",
 )
 st.info(f"Effective ETS coverage: **{effective_coverage_pct:.1f}%** | Phase-in: **{phase_in_pct}%**")
-include_nonco2_in_ets = (year >= 2026) # CH4 + N2O + slip from 2026 and after
-
 # === CALCULATIONS ===
-getcontext().prec = 28
-
-# Totals
-total_energy = Decimal("0")   # MJ
-wtt_sum = Decimal("0")        # gCO2eq (WtT)
-ttw_co2_sum = Decimal("0")    # gCO2eq (CO2 only)
-ttw_nonco2_sum = Decimal("0") # gCO2eq (CH4 + N2O + slip)
-emissions = Decimal("0")      # gCO2eq (WtW = WtT + TtW)
-rows = []
-
-for fuel in FUELS:
-    qty = Decimal(str(fuel_inputs.get(fuel["name"], 0.0)))  # tonnes
-    if qty > 0:
-        mass_g = qty * Decimal("1000000")  # g
-        lcv = Decimal(str(fuel["lcv"]))  # MJ/g
-        energy = mass_g * lcv  # MJ
-        if fuel["rfnbo"] and year <= 2033:
-            energy *= Decimal(str(REWARD_FACTOR_RFNBO_MULTIPLIER))
-
-        # Per-gram TTW factors
-        co2_per_g = Decimal(str(fuel["ttw_co2"])) * Decimal(str(1 - ops / 100)) * Decimal(str(wind))
-        ch4_per_g = Decimal(str(fuel["ttw_ch4"])) * Decimal(str(gwp["CH4"]))
-        n2o_per_g = Decimal(str(fuel["ttw_n2O"])) * Decimal(str(gwp["N2O"]))
-        # Slip (g CH4 / MJ) * GWP * energy (MJ)
-        slip_total = Decimal(str(fuel.get("ch4_slip", 0.0))) * Decimal(str(gwp["CH4"])) * energy
-
-        # Components
-        ttw_co2 = co2_per_g * mass_g
-        ttw_nonco2 = (ch4_per_g + n2o_per_g) * mass_g + slip_total
-        wtt_total = energy * Decimal(str(fuel["wtt"]))
-
-        ttw_total = ttw_co2 + ttw_nonco2
-        total_emissions = ttw_total + wtt_total
-
-        total_energy += energy
-        wtt_sum += wtt_total
-        ttw_co2_sum += ttw_co2
-        ttw_nonco2_sum += ttw_nonco2
-        emissions += total_emissions
-
-        ghg_intensity_mj = (total_emissions / energy) if energy > 0 else Decimal("0")
-
-        price_usd = Decimal(str(fuel_price_inputs.get(fuel["name"], 0.0)))
-        price_eur = price_usd * Decimal(str(exchange_rate))
-        cost = qty * price_eur
-
-        rows.append({
-            "Fuel": fuel["name"],
-            "Quantity (t)": float(qty),
-            "Price per Tonne (USD)": float(price_usd),
-            "Cost (Eur)": float(cost),
-            "TTW CO2 (g)": float(ttw_co2),
-            "TTW non-CO2 (g)": float(ttw_nonco2),
-            "WtT (g)": float(wtt_total),
-            "Emissions (gCO2eq)": float(total_emissions),  # WtW
-            "Energy (MJ)": float(energy),
-            "GHG Intensity (gCO2eq/MJ)": float(ghg_intensity_mj),})
-
-# === CUSTOM FUEL CALCULATIONS ===
-if st.session_state.get("use_custom_fuels"):
-    for cf in st.session_state.get("custom_fuels", []):
-        qty_t = Decimal(str(cf.get("qty_t", 0.0)))
-        if qty_t <= 0:
-            continue
-
-        mass_g = qty_t * Decimal("1000000")
-        lcv = Decimal(str(cf.get("lcv", 0.0)))
-        energy = mass_g * lcv
-
-        if cf.get("rfnbo") and year <= 2033:
-            energy *= Decimal(str(REWARD_FACTOR_RFNBO_MULTIPLIER))
-
-        price_eur = Decimal(str(cf.get("price_usd", 0.0))) * Decimal(str(exchange_rate))
-        cost_eur = qty_t * price_eur
-
-        if cf.get("mode") == "Basic":
-            # WtW-only; excluded from ETS splits
-            wtw = Decimal(str(cf.get("wtw", 0.0)))  # gCO2e/MJ
-            total_emissions_cf = energy * wtw
-
-            total_energy += energy
-            emissions += total_emissions_cf
-
-            ghg_intensity_mj_cf = (total_emissions_cf / energy) if energy > 0 else Decimal("0")
-
-            rows.append({
-                "Fuel": f"{cf.get('name','Custom fuel')} (custom, WtW-only)",
-                "Quantity (t)": float(qty_t),
-                "Price per Tonne (USD)": float(Decimal(str(cf.get("price_usd", 0.0)))),
-                "Cost (Eur)": float(cost_eur),
-                "TTW CO2 (g)": float("nan"),
-                "TTW non-CO2 (g)": float("nan"),
-                "WtT (g)": float("nan"),
-                "Emissions (gCO2eq)": float(total_emissions_cf),
-                "Energy (MJ)": float(energy),
-                "GHG Intensity (gCO2eq/MJ)": float(ghg_intensity_mj_cf),})
-
-        else:
-            # Advanced: contributes to ETS, WtT/TtW
-            co2_per_g = Decimal(str(cf.get("ttw_co2", 0.0))) * Decimal(str(1 - ops / 100)) * Decimal(str(wind))
-            ch4_per_g = Decimal(str(cf.get("ttw_ch4", 0.0))) * Decimal(str(gwp["CH4"]))
-            n2o_per_g = Decimal(str(cf.get("ttw_n2o", 0.0))) * Decimal(str(gwp["N2O"]))
-            slip_total = Decimal(str(cf.get("ch4_slip", 0.0))) * Decimal(str(gwp["CH4"])) * energy
-
-            ttw_co2_cf = co2_per_g * mass_g
-            ttw_nonco2_cf = (ch4_per_g + n2o_per_g) * mass_g + slip_total
-            wtt_total_cf = energy * Decimal(str(cf.get("wtt", 0.0)))
-
-            total_emissions_cf = ttw_co2_cf + ttw_nonco2_cf + wtt_total_cf
-
-            total_energy += energy
-            wtt_sum += wtt_total_cf
-            ttw_co2_sum += ttw_co2_cf
-            ttw_nonco2_sum += ttw_nonco2_cf
-            emissions += total_emissions_cf
-
-            ghg_intensity_mj_cf = (total_emissions_cf / energy) if energy > 0 else Decimal("0")
-
-            rows.append({
-                "Fuel": f"{cf.get('name','Custom fuel')} (custom)",
-                "Quantity (t)": float(qty_t),
-                "Price per Tonne (USD)": float(Decimal(str(cf.get("price_usd", 0.0)))),
-                "Cost (Eur)": float(cost_eur),
-                "TTW CO2 (g)": float(ttw_co2_cf),
-                "TTW non-CO2 (g)": float(ttw_nonco2_cf),
-                "WtT (g)": float(wtt_total_cf),
-                "Emissions (gCO2eq)": float(total_emissions_cf),
-                "Energy (MJ)": float(energy),
-                "GHG Intensity (gCO2eq/MJ)": float(ghg_intensity_mj_cf),})
-
-# Summary totals
-emissions_tonnes = float(emissions / Decimal("1000000"))  # WtW
-
-ghg_intensity = float(emissions / total_energy) if total_energy > 0 else 0.0
-st.session_state["computed_ghg"] = ghg_intensity
-
-# ETS cost (TtW-only with 2026+ non-CO2 and coverage & phase-in)
-ets_cost, ets_covered_tonnes = compute_ets_cost(
-    ttw_co2_sum, ttw_nonco2_sum, eua_price, effective_coverage_pct, phase_in_pct, include_nonco2_in_ets)
-
-# Positive = surplus (good), Negative = deficit (bad)
-compliance_balance = float(total_energy) * (target_intensity(year) - ghg_intensity) / 1_000_000.0  # tCO2eq
-
-# Penalty only if there is a negative compliance balance (deficit)
-if compliance_balance < 0:
-    penalty = (abs(compliance_balance) / (ghg_intensity * VLSFO_ENERGY_CONTENT)) * PENALTY_RATE * 1_000_000
+mark(profile, "calculations")
+
+
+def memoized(key: str, fn, *args, **kwargs):
+    """fn(*args, **kwargs), reused from session state for as long as its arguments are unchanged."""
+    fingerprint = repr((args, kwargs))
+    cached = st.session_state.get(f"memo_{key}")
+    if cached is None or cached[0] != fingerprint:
+        cached = (fingerprint, fn(*args, **kwargs))
+        st.session_state[f"memo_{key}"] = cached
+    return cached[1]
+
+
+blend_inputs = {
+    "fuel_inputs": fuel_inputs,
+    "fuel_price_inputs": fuel_price_inputs,
+    "custom_fuels": st.session_state.get("custom_fuels", []) if st.session_state.get("use_custom_fuels") else [],
+    "year": year,
+    "gwp_choice": gwp_choice,
+    "ops": ops,
+    "wind": wind,
+    "exchange_rate": exchange_rate,
+    "eua_price": eua_price,
+    "effective_coverage_pct": effective_coverage_pct,
+    "phase_in_pct": phase_in_pct,
+}
+numeric_backend = st.session_state.get("numeric_backend", DEFAULT_BACKEND)  # sidebar "Debug" selector
+if numeric_backend == "decimal":
+    # Only the fuel rows edited since the last rerun are recomputed (per-row contributions kept in session state)
+    blend, st.session_state["blend_state"] = update_blend(st.session_state.get("blend_state"), blend_inputs)
 else:
-    penalty = 0.0
+    blend = compute_blend(blend_inputs, backend=numeric_backend)
+
+rows = blend["rows"]
+total_energy = blend["total_energy"]
+wtt_sum = blend["wtt_sum"]
+ttw_co2_sum = blend["ttw_co2_sum"]
+ttw_nonco2_sum = blend["ttw_nonco2_sum"]
+emissions = blend["emissions"]
+emissions_tonnes = blend["emissions_tonnes"]
+ghg_intensity = blend["ghg_intensity"]
+include_nonco2_in_ets = blend["include_nonco2_in_ets"]
+ets_cost, ets_covered_tonnes = blend["ets_cost"], blend["ets_covered_tonnes"]
+compliance_balance = blend["compliance_balance"]
+penalty = blend["penalty"]
+st.session_state["computed_ghg"] = ghg_intensity
 
 # Mitigation scaffolding
 added_biofuel_cost = 0.0
 mitigation_rows = []
 new_blend_ets_cost = None
+mitigation_prices_usd = {}  # mitigation fuel -> price (USD/t) entered below, for the cost-risk simulation
+pooling_price_usd_per_tonne = 0.0
 
 # Substitution scaffolding
 substitution_price_usd = 0.0
@@ -600,7 +400,8 @@ if st.session_state.get("trigger_reset", False):
     st.experimental_rerun()
 
 # === OUTPUT TABLES & METRICS ===
-user_entered_prices = any(r.get("Price per Tonne (USD)", 0) > 0 for r in rows)
+mark(profile, "output tables")
+user_entered_prices = blend["user_entered_prices"]
 
 if rows:
     header_col, details_col = st.columns([7, 2])
@@ -632,20 +433,19 @@ if rows:
 
     if show_details:
         # Details of selected fuels
-        selected = [name for name, qty in fuel_inputs.items() if qty > 0]
+        selected = sorted((name for name, qty in fuel_inputs.items() if qty > 0), key=FUEL_INDEX.get)
         detail_rows = []
-        for fuel in FUELS:
-            if fuel["name"] in selected:
-                row = {
-                    "Fuel": fuel["name"],
-                    "LCV (MJ/g)": fuel["lcv"],
-                    "WtT Factor (gCO2eq/MJ)": fuel["wtt"],
-                    "TtW CO2 (g/g)": fuel["ttw_co2"],
-                    "TtW CH4 (g/g)": fuel["ttw_ch4"],
-                    "TtW N2O (g/g)": fuel["ttw_n2O"],}
-                if "ch4_slip" in fuel:
-                    row["CH4 Slip (g/MJ)"] = fuel["ch4_slip"]
-                detail_rows.append(row)
+        for fuel in map(get_fuel, selected):
+            row = {
+                "Fuel": fuel["name"],
+                "LCV (MJ/g)": fuel["lcv"],
+                "WtT Factor (gCO2eq/MJ)": fuel["wtt"],
+                "TtW CO2 (g/g)": fuel["ttw_co2"],
+                "TtW CH4 (g/g)": fuel["ttw_ch4"],
+                "TtW N2O (g/g)": fuel["ttw_n2O"],}
+            if "ch4_slip" in fuel:
+                row["CH4 Slip (g/MJ)"] = fuel["ch4_slip"]
+            detail_rows.append(row)
         if st.session_state.get("use_custom_fuels"):
             for cf in st.session_state.get("custom_fuels", []):
                 if cf.get("mode") == "Advanced" and float(cf.get("qty_t", 0)) > 0:
@@ -669,7 +469,7 @@ if rows:
                 "TtW N2O (g/g)": "{:.5f}",
                 "CH4 Slip (g/MJ)": "{:.1f}",}))
 
-    total_cost = sum(row["Cost (Eur)"] for row in rows)
+    total_cost = blend["total_cost"]
     if user_entered_prices:
         st.metric("Total Fuel Cost (Eur)", f"{total_cost:,.2f}")
 
@@ -697,6 +497,7 @@ if rows:
         st.metric(label, f"{conservative_total:,.2f}")
 
     # === MITIGATION STRATEGIES ===
+    mark(profile, "mitigation")
     if compliance_balance < 0:
         st.subheader("Mitigation Strategies")
 
@@ -707,7 +508,7 @@ if rows:
                 "Pooling Price (USD/tCO2eq)", min_value=0.0, value=100.0, step=10.0, format="%0.0f",
                 help="Cost per tCO2eq to buy compliance credits. If 0, pooling is ignored.",
             )
-            pooling_cost_eur = pooling_price_usd_per_tonne * exchange_rate * abs(compliance_balance) if pooling_price_usd_per_tonne > 0 else 0.0
+            pooling_cost_eur = solve_pooling(blend, pooling_price_usd_per_tonne, exchange_rate)
             total_with_pooling = (total_cost if user_entered_prices else 0.0) + pooling_cost_eur + (ets_cost if eua_price > 0 else 0.0)
             if pooling_price_usd_per_tonne > 0:
                 st.metric("Pooling Cost (Eur)", f"{pooling_cost_eur:,.2f}")
@@ -715,74 +516,10 @@ if rows:
         # --- ADD BIO FUEL (ADDITION) ---
         with st.expander("**Add Bio Fuel**", expanded=False):
             st.info("Adds mitigation fuel on top of current fuels (total energy increases).")
-            dec_ghg = Decimal(str(ghg_intensity))
-            dec_emissions = Decimal(str(emissions))
-            dec_energy = Decimal(str(total_energy))
-            dec_ttw_co2_sum = Decimal(str(ttw_co2_sum))
-            dec_ttw_nonco2_sum = Decimal(str(ttw_nonco2_sum))
-            target = Decimal(str(target_intensity(year)))
-
-            mitigation_rows = []
-            for fuel in FUELS:
-                # Compute per-unit intensities
-                co2_g = Decimal(str(fuel["ttw_co2"])) * Decimal(str(1 - ops / 100)) * Decimal(str(wind))
-                ch4_g = Decimal(str(fuel["ttw_ch4"])) * Decimal(str(gwp["CH4"]))
-                n2o_g = Decimal(str(fuel["ttw_n2O"])) * Decimal(str(gwp["N2O"]))
-                wtt_mj = Decimal(str(fuel["wtt"]))
-                slip_mj = Decimal(str(fuel.get("ch4_slip", 0.0))) * Decimal(str(gwp["CH4"]))
-                approx_intensity = wtt_mj + (co2_g + ch4_g + n2o_g) * Decimal(str(fuel["lcv"])) + slip_mj
-                if approx_intensity >= dec_ghg:
-                    continue
-
-                low = Decimal("0")
-                high = Decimal("100000.0")
-                best_qty = None
-                for _ in range(50):
-                    mid = (low + high) / 2
-                    mass_g = mid * Decimal("1000000")
-                    energy_mj = mass_g * Decimal(str(fuel["lcv"]))
-                    if fuel["rfnbo"] and year <= 2033:
-                        energy_mj *= Decimal(str(REWARD_FACTOR_RFNBO_MULTIPLIER))
-                    ttw_co2_add = co2_g * mass_g
-                    ttw_nonco2_add = (ch4_g + n2o_g) * mass_g + slip_mj * energy_mj
-                    ttw_add = ttw_co2_add + ttw_nonco2_add
-                    wtt_add = wtt_mj * energy_mj
-
-                    new_emissions = dec_emissions + ttw_add + wtt_add
-                    new_energy = dec_energy + energy_mj
-                    new_ghg = new_emissions / new_energy if new_energy > 0 else Decimal("1e9")
-                    if new_ghg <= target:
-                        best_qty = mid
-                        high = mid
-                    else:
-                        low = mid
-                    if high - low < Decimal("0.00001"):
-                        break
-
-                if best_qty is not None:
-                    mass_g = best_qty * Decimal("1000000")
-                    energy_mj = mass_g * Decimal(str(fuel["lcv"]))
-                    if fuel["rfnbo"] and year <= 2033:
-                        energy_mj *= Decimal(str(REWARD_FACTOR_RFNBO_MULTIPLIER))
-                    ttw_co2_add = co2_g * mass_g
-                    ttw_nonco2_add = (ch4_g + n2o_g) * mass_g + slip_mj * energy_mj
-                    wtt_add = wtt_mj * energy_mj
-                    new_emissions = dec_emissions + (ttw_co2_add + ttw_nonco2_add) + wtt_add
-
-                    # ETS for the new blend
-                    new_ttw_co2_total = dec_ttw_co2_sum + ttw_co2_add
-                    new_ttw_nonco2_total = dec_ttw_nonco2_sum + ttw_nonco2_add
-                    new_blend_ets_cost, _ = compute_ets_cost(
-                        new_ttw_co2_total, new_ttw_nonco2_total, eua_price, effective_coverage_pct, phase_in_pct, include_nonco2_in_ets)
-
-                    mitigation_rows.append({
-                        "Fuel": fuel["name"],
-                        "Required Amount (t)": float(math.ceil(float(best_qty))),
-                        "New Emissions (gCO2eq)": float(new_emissions),
-                        "ETS Cost (EUR)": float(new_blend_ets_cost),})
+            # copies: the pricing below adds columns to these rows
+            mitigation_rows = [dict(row) for row in memoized("add_fuel", solve_add_fuel, blend_inputs, blend)]
 
             if mitigation_rows:
-                mitigation_rows = sorted(mitigation_rows, key=lambda x: x["Required Amount (t)"])
                 df_mit = pd.DataFrame(mitigation_rows)
                 st.dataframe(df_mit.style.format({
                     "Required Amount (t)": "{:,.0f}",
@@ -802,6 +539,7 @@ if rows:
                 if selected_row is not None:
                     new_blend_ets_cost = selected_row.get("ETS Cost (EUR)")
                 if mitigation_price_usd > 0:
+                    mitigation_prices_usd[selected_fuel] = mitigation_price_usd
                     for row in mitigation_rows:
                         row["Price (USD/t)"] = mitigation_price_usd if row["Fuel"] == selected_fuel else 0.0
                         row["Estimated Cost (Eur)"] = row.get("Price (USD/t)", 0.0) * exchange_rate * row["Required Amount (t)"]
@@ -816,140 +554,86 @@ if rows:
             initial_fuel = st.selectbox("Fuel to replace", initial_fuels, key="sub_initial")
             substitute_fuel = st.selectbox("Mitigation fuel", alternative_fuels, index=(alternative_fuels.index("Biodiesel (UCO,B24)") if "Biodiesel (UCO,B24)" in alternative_fuels else 0), key="sub_mitigation")
             qty_initial = float(fuel_inputs.get(initial_fuel, 0.0))  # t
-            price_initial_eur_per_t = float(fuel_price_inputs.get(initial_fuel, 0.0)) * float(exchange_rate)
             substitution_price_usd = st.number_input(
                 f"{substitute_fuel} - Price (USD/t)", min_value=0.0, value=0.0, step=10.0, key="substitution_price_input"
             )
-            substitution_price_eur_per_t = substitution_price_usd * exchange_rate
+            if substitution_price_usd > 0:
+                mitigation_prices_usd[substitute_fuel] = substitution_price_usd
 
             if qty_initial > 0:
-                # Pull props
-                fi = next(f for f in FUELS if f["name"] == initial_fuel)
-                fm = next(f for f in FUELS if f["name"] == substitute_fuel)
-
-                # Precompute per-gram and per-MJ bits
-                co2_i = fi["ttw_co2"] * (1 - ops / 100) * wind
-                ch4_i = fi["ttw_ch4"] * gwp["CH4"]
-                n2o_i = fi["ttw_n2O"] * gwp["N2O"]
-                slip_i = fi.get("ch4_slip", 0.0) * gwp["CH4"]  # per MJ
-
-                co2_m = fm["ttw_co2"] * (1 - ops / 100) * wind
-                ch4_m = fm["ttw_ch4"] * gwp["CH4"]
-                n2o_m = fm["ttw_n2O"] * gwp["N2O"]
-                slip_m = fm.get("ch4_slip", 0.0) * gwp["CH4"]  # per MJ
-
-                lcv_i = fi["lcv"]; lcv_m = fm["lcv"]
-                wtt_i = fi["wtt"];  wtt_m = fm["wtt"]
-
-                target_val = target_intensity(year)
-                precision = 1e-6
-                low, high = 0.0, 1.0
-                best_x = None
-
-                total_energy_all = float(total_energy)
-                # Original initial stream components (for removal)
-                initial_mass_g = qty_initial * 1_000_000.0
-                initial_energy_stream = initial_mass_g * lcv_i
-                initial_ttw_co2_stream = initial_mass_g * co2_i
-                initial_ttw_nonco2_stream = initial_mass_g * (ch4_i + n2o_i) + initial_energy_stream * slip_i
-                initial_wtt_stream = initial_energy_stream * wtt_i
-                initial_total_stream = initial_ttw_co2_stream + initial_ttw_nonco2_stream + initial_wtt_stream
-
-                # Base totals in float for reuse
-                base_ttw_co2 = float(ttw_co2_sum)
-                base_ttw_nonco2 = float(ttw_nonco2_sum)
-                base_wtt = float(wtt_sum)
-                base_wtw = base_ttw_co2 + base_ttw_nonco2 + base_wtt
-
-                for _ in range(100):
-                    mid = (low + high) / 2
-                    sub_mass_g = initial_mass_g * mid
-                    remain_mass_g = initial_mass_g * (1 - mid)
-
-                    energy_initial_part = remain_mass_g * lcv_i
-                    energy_sub_part = sub_mass_g * lcv_m
-                    if fm["rfnbo"] and year <= 2033:
-                        energy_sub_part *= REWARD_FACTOR_RFNBO_MULTIPLIER
-
-                    # TTW components for parts
-                    ttw_i_co2_part = remain_mass_g * co2_i
-                    ttw_i_nonco2_part = remain_mass_g * (ch4_i + n2o_i) + energy_initial_part * slip_i
-                    ttw_m_co2_part = sub_mass_g * co2_m
-                    ttw_m_nonco2_part = sub_mass_g * (ch4_m + n2o_m) + energy_sub_part * slip_m
-
-                    wtt_i_part = energy_initial_part * wtt_i
-                    wtt_m_part = energy_sub_part * wtt_m
-
-                    # Replace initial stream with parts in totals
-                    total_energy_blend = total_energy_all - initial_energy_stream + (energy_initial_part + energy_sub_part)
-                    ttw_co2_blend = base_ttw_co2 - initial_ttw_co2_stream + (ttw_i_co2_part + ttw_m_co2_part)
-                    ttw_nonco2_blend = base_ttw_nonco2 - initial_ttw_nonco2_stream + (ttw_i_nonco2_part + ttw_m_nonco2_part)
-                    wtt_blend = base_wtt - initial_wtt_stream + (wtt_i_part + wtt_m_part)
-                    total_emissions_blend = ttw_co2_blend + ttw_nonco2_blend + wtt_blend
-
-                    blended_ghg = total_emissions_blend / total_energy_blend if total_energy_blend > 0 else 1e9
-                    if blended_ghg <= target_val + precision:
-                        best_x = mid
-                        high = mid
-                    else:
-                        low = mid
-                    if (high - low) < precision:
-                        break
-
-                if best_x is None or best_x > 1.0:
+                substitution = memoized("substitution", solve_substitution, blend_inputs, blend, initial_fuel, substitute_fuel,
+                                        substitution_price_usd)
+                if substitution is None:
                     st.warning("⚠️ No feasible replacement fraction found. Consider another mitigation fuel.")
                 else:
-                    replaced_mass = best_x * qty_initial  # tonnes
-                    # Recompute emissions for best_x for reporting
-                    sub_mass_g = initial_mass_g * best_x
-                    remain_mass_g = initial_mass_g * (1 - best_x)
-                    energy_initial_part = remain_mass_g * lcv_i
-                    energy_sub_part = sub_mass_g * lcv_m
-                    if fm["rfnbo"] and year <= 2033:
-                        energy_sub_part *= REWARD_FACTOR_RFNBO_MULTIPLIER
-
-                    ttw_i_co2_part = remain_mass_g * co2_i
-                    ttw_i_nonco2_part = remain_mass_g * (ch4_i + n2o_i) + energy_initial_part * slip_i
-                    ttw_m_co2_part = sub_mass_g * co2_m
-                    ttw_m_nonco2_part = sub_mass_g * (ch4_m + n2o_m) + energy_sub_part * slip_m
-
-                    wtt_i_part = energy_initial_part * wtt_i
-                    wtt_m_part = energy_sub_part * wtt_m
-
-                    total_energy_blend = total_energy_all - initial_energy_stream + (energy_initial_part + energy_sub_part)
-                    ttw_co2_blend = base_ttw_co2 - initial_ttw_co2_stream + (ttw_i_co2_part + ttw_m_co2_part)
-                    ttw_nonco2_blend = base_ttw_nonco2 - initial_ttw_nonco2_stream + (ttw_i_nonco2_part + ttw_m_nonco2_part)
-                    wtt_blend = base_wtt - initial_wtt_stream + (wtt_i_part + wtt_m_part)
-                    substitution_total_emissions = ttw_co2_blend + ttw_nonco2_blend + wtt_blend
-
-                    # ETS for substitution blend
-                    substitution_ets_cost, _ = compute_ets_cost(
-                        Decimal(str(ttw_co2_blend)), Decimal(str(ttw_nonco2_blend)), eua_price,
-                        effective_coverage_pct, phase_in_pct, include_nonco2_in_ets
-                    )
+                    best_x = substitution["best_x"]
+                    replaced_mass = substitution["replaced_mass"]
+                    substitution_total_emissions = substitution["substitution_total_emissions"]
+                    substitution_ets_cost = substitution["substitution_ets_cost"]
+                    additional_substitution_cost = substitution["additional_substitution_cost"]
+                    total_substitution_cost = substitution["total_substitution_cost"]
 
                     st.success(
-                        f"To reach {target_val:.2f} gCO2eq/MJ, replace **{best_x*100:.2f}%** of {initial_fuel} with {substitute_fuel}."
+                        f"To reach {substitution['target']:.2f} gCO2eq/MJ, replace **{best_x*100:.2f}%** of {initial_fuel} with {substitute_fuel}."
                     )
                     st.markdown(f"**Replaced {initial_fuel} mass**: {replaced_mass:,.2f} t")
                     st.markdown(f"**Added {substitute_fuel} mass**: {replaced_mass:,.2f} t")
 
-                    if user_entered_prices and substitution_price_usd > 0:
-                        mitigation_fuel_cost = replaced_mass * substitution_price_eur_per_t
-                        remaining_fuel_cost = (qty_initial - replaced_mass) * price_initial_eur_per_t
-                        additional_substitution_cost = replaced_mass * (substitution_price_eur_per_t - price_initial_eur_per_t)
-                        substitution_total_cost_stream = mitigation_fuel_cost + remaining_fuel_cost
-                        other_fuel_costs = sum(
-                            (fuel_inputs.get(f["name"], 0.0) * fuel_price_inputs.get(f["name"], 0.0) * exchange_rate)
-                            for f in FUELS if f["name"] != initial_fuel
-                        )
-                        total_substitution_cost = substitution_total_cost_stream + other_fuel_costs + (substitution_ets_cost or 0.0)
-
                     if additional_substitution_cost is not None:
                         st.markdown(f"**Additional fuel cost**: {additional_substitution_cost:,.2f} EUR")
                     if eua_price > 0:
                         st.markdown(f"**EU ETS Cost**: {substitution_ets_cost:,.2f} EUR")
 
+            # All fossil x mitigation swaps for the fuels in the blend, cheapest first
+            swap_prices = {substitute_fuel: substitution_price_usd} if substitution_price_usd > 0 else {}
+            swap_rows = rank_substitutions(memoized("substitution_all", solve_substitution_all, blend_inputs, blend,
+                                                    substitute_prices_usd=swap_prices))
+            if swap_rows:
+                show_all_swaps = st.checkbox("Show all feasible swaps (ranked)", value=False, key="show_all_swaps")
+                if show_all_swaps:
+                    st.dataframe(pd.DataFrame(swap_rows).style.format({
+                        "Replaced share (%)": "{:,.2f}",
+                        "Replaced mass (t)": "{:,.2f}",
+                        "Additional fuel cost (EUR)": "{:,.2f}",
+                        "ETS Cost (EUR)": "{:,.2f}",
+                        "Total (EUR)": "{:,.2f}",}, na_rep="-"))
+
+        # --- LEAST-COST MIX (all mitigation fuels + pooling) ---
+        least_cost = None
+        with st.expander("**Least-cost mix (optimizer)**", expanded=False):
+            st.info("Chooses added quantities across all priced mitigation fuels, pooling and the penalty to settle "
+                    "the deficit at the lowest fuel + ETS + pooling + penalty cost. Leave Cap empty for unlimited.")
+            optimizer_df = st.data_editor(
+                pd.DataFrame({
+                    "Fuel": mitigation_fuels,
+                    "Price (USD/t)": [float(mitigation_prices_usd.get(f, fuel_price_inputs.get(f, 0.0))) for f in mitigation_fuels],
+                    "Cap (t)": [None] * len(mitigation_fuels),}),
+                disabled=["Fuel"], hide_index=True, key="least_cost_inputs")
+            optimizer_allow_penalty = st.checkbox("Allow paying the penalty on part of the deficit", value=True,
+                                                  key="least_cost_allow_penalty")
+            optimizer_prices = dict(zip(optimizer_df["Fuel"], optimizer_df["Price (USD/t)"].fillna(0.0)))
+            optimizer_caps = {f: c for f, c in zip(optimizer_df["Fuel"], optimizer_df["Cap (t)"]) if pd.notna(c)}
+            if any(p > 0 for p in optimizer_prices.values()) or pooling_price_usd_per_tonne > 0:
+                least_cost = memoized("least_cost", solve_least_cost, blend_inputs, blend, optimizer_prices, optimizer_caps,
+                                      pooling_price_usd_per_tonne, allow_penalty=optimizer_allow_penalty)
+                if least_cost["rows"]:
+                    st.dataframe(pd.DataFrame(least_cost["rows"]).style.format({
+                        "Added (t)": "{:,.1f}",
+                        "Price (USD/t)": "{:,.2f}",
+                        "Cap (t)": "{:,.0f}",
+                        "Fuel Cost (Eur)": "{:,.2f}",
+                        "ETS Cost (Eur)": "{:,.2f}",
+                        "Cost per tCO2eq (Eur)": "{:,.2f}",}, na_rep="-"), hide_index=True)
+                if least_cost["pooling_t"] > 0:
+                    st.markdown(f"**Pooling**: {least_cost['pooling_t']:,.1f} tCO2eq ({least_cost['pooling_cost']:,.2f} EUR)")
+                if least_cost["penalty"] > 0:
+                    st.markdown(f"**Penalty** on {least_cost['penalised_deficit_t']:,.1f} tCO2eq: {least_cost['penalty']:,.2f} EUR")
+                if not least_cost["meets_target"] and not optimizer_allow_penalty:
+                    st.warning("⚠️ Caps and pooling cannot cover the whole deficit; the rest is penalised.")
+                st.metric("Least-cost total (Eur)", f"{least_cost['total_cost']:,.2f}")
+            else:
+                st.caption("Enter at least one mitigation fuel price (or a pooling price) to optimise.")
+
         # --- COST-BENEFIT ANALYSIS ---
         if user_entered_prices:
             st.subheader("Cost-Benefit Analysis")
@@ -972,88 +656,311 @@ if rows:
             if substitution_price_usd > 0 and total_substitution_cost is not None:
                 st.metric(
                     "Fuel Replacement" + (" + EU ETS" if eua_price > 0 else "") + " (No Penalty)",f"{total_substitution_cost:,.2f}")
+
+            # Least-cost mix
+            if least_cost is not None:
+                st.metric("Least-cost mix" + (" + EU ETS" if eua_price > 0 else "")
+                          + (" + Penalty" if least_cost["penalty"] > 0 else " (No Penalty)"), f"{least_cost['total_cost']:,.2f}")
+
+            # --- COST RISK (MONTE CARLO) ---
+            with st.expander("**Cost risk (Monte Carlo)**", expanded=False):
+                st.info("Samples EUA price, FX and fuel / pooling prices around the values entered above and "
+                        "costs every priced strategy per sample.")
+                risk_cols = st.columns(4)
+                with risk_cols[0]:
+                    risk_samples = st.selectbox("Samples", [100_000, 1_000_000], format_func=lambda n: f"{n:,}",
+                                                key="risk_samples")
+                    risk_dist = st.selectbox("Distribution", ["lognormal", "normal", "triangular"], key="risk_dist")
+                with risk_cols[1]:
+                    risk_eua_sd = st.number_input("EUA price sd (%)", min_value=0.0, value=25.0, step=5.0, key="risk_eua_sd")
+                    risk_fx_sd = st.number_input("FX sd (%)", min_value=0.0, value=5.0, step=1.0, key="risk_fx_sd")
+                with risk_cols[2]:
+                    risk_fuel_sd = st.number_input("Fuel / pooling price sd (%)", min_value=0.0, value=15.0, step=5.0,
+                                                   key="risk_fuel_sd")
+                    risk_fuel_fuel = st.slider("Fuel–fuel correlation", -0.9, 0.99, 0.6, 0.05, key="risk_fuel_fuel")
+                with risk_cols[3]:
+                    risk_eua_fuel = st.slider("EUA–fuel correlation", -0.9, 0.9, 0.3, 0.05, key="risk_eua_fuel")
+                    risk_fx_fuel = st.slider("FX–fuel correlation", -0.9, 0.9, 0.0, 0.05, key="risk_fx_fuel")
+
+                risk_buttons = st.columns(2)
+                if risk_buttons[1].button("Run in background", key="risk_queue",
+                                          help="Queue the simulation; follow it under 🗄 Background jobs"):
+                    submit_job("risk", {
+                        "inputs": blend_inputs, "mitigation_prices_usd": mitigation_prices_usd,
+                        "pooling_price_usd": pooling_price_usd_per_tonne, "samples": risk_samples, "dist": risk_dist,
+                        "eua_sd": risk_eua_sd, "fx_sd": risk_fx_sd, "fuel_sd": risk_fuel_sd,
+                        "eua_fuel": risk_eua_fuel, "fuel_fuel": risk_fuel_fuel, "fx_fuel": risk_fx_fuel,
+                    }, label=f"Cost risk ({risk_samples:,} samples)")
+                    st.session_state["show_jobs"] = True  # the checkbox is created further down
+                    st.success("Simulation queued — see 🗄 Background jobs below.")
+                if risk_buttons[0].button("Run simulation", key="risk_run"):
+                    risk_model = strategy_model(blend_inputs, blend, mitigation_prices_usd, pooling_price_usd_per_tonne)
+                    risk_spec = default_spec(risk_model, risk_eua_sd, risk_fx_sd, risk_fuel_sd, risk_dist)
+                    try:
+                        sim = simulate(risk_model, risk_spec, risk_samples,
+                                       default_correlations(risk_spec, risk_eua_fuel, risk_fuel_fuel, risk_fx_fuel))
+                    except ValueError as exc:
+                        st.error(f"❌ {exc}")
+                    else:
+                        st.dataframe(pd.DataFrame(risk_table(sim)).style.format({
+                            "Mean (EUR)": "{:,.2f}",
+                            "P5 (EUR)": "{:,.2f}",
+                            "P50 (EUR)": "{:,.2f}",
+                            "P95 (EUR)": "{:,.2f}",
+                            "Cheapest (%)": "{:,.1f}",}), hide_index=True)
+                        st.caption(f"{sim['n']:,} samples × {len(sim['strategies'])} strategies in "
+                                   f"{sim['seconds'] * 1000:,.0f} ms")
     else:
         st.info("✅ Compliance already achieved! No mitigation strategy required.")
 else:
     st.info("No fuel data provided yet.")
 
 # === COMPLIANCE CHART ===
-years = sorted(set([2025] + list(REDUCTIONS.keys())))
-def _sector_target_for_plot(y: int) -> float:
-# FuelEU applies from 2025; show baseline (no reduction) for 2024
-    return BASE_TARGET if y < 2025 else BASE_TARGET * (1 - REDUCTIONS[y])
-targets = [_sector_target_for_plot(y) for y in years]
-
+mark(profile, "charts")
 st.subheader("Sector-wide GHG Intensity Targets")
-fig, ax = plt.subplots(figsize=(10, 4))
-ax.plot(years, targets, linestyle='--', marker='o', label='EU Target')
-for x, yv in zip(years, targets):
-    ax.annotate(f"{yv:.2f}", (x, yv), textcoords="offset points", xytext=(0,5), ha='center', fontsize=8)
 computed_ghg = st.session_state.get("computed_ghg", ghg_intensity)
-line_color = 'red' if computed_ghg > target_intensity(year) else 'green'
-ax.axhline(computed_ghg, color=line_color, linestyle='-', label='Your GHG Intensity')
-ax.annotate(f"{computed_ghg:.2f}", xy=(max(years), computed_ghg), xytext=(0, -10), textcoords="offset points", ha="center", va="top", fontsize=10)
-ax.set_xlabel(None)
-ax.set_ylabel("gCO2eq/MJ")
-ax.set_title("Your Performance vs Sector Target")
-ax.legend()
-ax.grid(True)
-st.pyplot(fig)
+target_png, target_size = render_chart("target", computed_ghg, year)
+st.image(target_png, width="stretch")
 
 
 # === REGULATORY DYNAMICS (STACKED COLUMNS) ===
 st.subheader("Regulatory Dynamics: FuelEU vs EU ETS")
+dynamics_png, dynamics_size = render_chart("dynamics", effective_coverage_pct)
+st.image(dynamics_png, width="stretch")
+
+# === COMPLIANCE PROJECTION (EVERY YEAR) ===
+mark(profile, "projection")
+if rows and st.checkbox("📈 Compliance projection 2025–2050", value=False, key="show_projection"):
+    st.caption("Every year 2025–2050 with the ETS phase-in schedule. "
+               "Enter a 2050 mix to move linearly from the current mix.")
+    # Plan keys: stock fuels by name, custom fuels by position (their names need not be unique)
+    current_mix = {name: qty for name, qty in fuel_inputs.items() if qty > 0}
+    plan_labels = list(current_mix)
+    for i, cf in enumerate(blend_inputs["custom_fuels"]):
+        if cf.get("qty_t", 0.0) > 0:
+            current_mix[custom_key(i)] = cf["qty_t"]
+            plan_labels.append(f"{cf['name']} (custom {i + 1})")
+    plan_df = st.data_editor(
+        pd.DataFrame({"Fuel": plan_labels,
+                      "2025 (t)": list(current_mix.values()),
+                      "2050 (t)": list(current_mix.values())}),
+        disabled=["Fuel", "2025 (t)"], hide_index=True, key="projection_plan")
+    # Fuels can be added to the 2050 mix from the mitigation candidates
+    added = st.multiselect("Add fuels to the 2050 mix", [f for f in alternative_fuels if f not in current_mix],
+                           key="projection_added_fuels")
+    plan_2050 = dict(zip(current_mix, plan_df["2050 (t)"].fillna(0.0)))  # editor rows stay in current_mix order
+    for name in added:
+        plan_2050[name] = st.number_input(f"{name} in 2050 (t)", min_value=0.0, value=0.0, step=100.0,
+                                          key=f"projection_qty_{name}")
+
+    projection = memoized("projection", project, blend_inputs, plan={2025: current_mix, 2050: plan_2050})
+    projection_df = pd.DataFrame({
+        "Year": projection["years"],
+        "Target (gCO2eq/MJ)": projection["target"],
+        "GHG Intensity (gCO2eq/MJ)": projection["ghg_intensity"],
+        "Compliance Balance (tCO2eq)": projection["compliance_balance"],
+        "Penalty (Eur)": projection["penalty"],
+        "ETS Cost (Eur)": projection["ets_cost"],
+        "Fuel Cost (Eur)": projection["total_cost"],
+    })
+    st.line_chart(projection_df.set_index("Year")[["Target (gCO2eq/MJ)", "GHG Intensity (gCO2eq/MJ)"]])
+    st.dataframe(projection_df.style.format({
+        "Target (gCO2eq/MJ)": "{:,.2f}",
+        "GHG Intensity (gCO2eq/MJ)": "{:,.2f}",
+        "Compliance Balance (tCO2eq)": "{:,.0f}",
+        "Penalty (Eur)": "{:,.2f}",
+        "ETS Cost (Eur)": "{:,.2f}",
+        "Fuel Cost (Eur)": "{:,.2f}",}), hide_index=True)
+
+# === REWARD & GWP SWEEP (OPS × WIND × GWP × YEAR) ===
+mark(profile, "sweep")
+SWEEP_HEATMAPS = {  # field -> (tab label, colour scale)
+    "ghg_intensity": ("GHG Intensity (gCO2eq/MJ)", {"scheme": "viridis", "reverse": True}),
+    "compliance_balance": ("Compliance Balance (tCO2eq)", {"scheme": "redblue", "domainMid": 0}),
+    "penalty": ("Penalty (Eur)", {"scheme": "reds"}),
+}
 
-# Milestone years for display (include ETS start & FuelEU targets)
-years_dyn = sorted(set([2025, 2026] + list(REDUCTIONS.keys())))
-
-# FuelEU: reduction vs baseline as % and remaining intensity %
-fueleu_reduction_pct = [max(0.0, min(100.0, (BASE_TARGET - target_intensity(y)) / BASE_TARGET * 100.0)) for y in years_dyn]
-fueleu_remaining_pct = [100.0 - r for r in fueleu_reduction_pct]
-
-# ETS: effective coverage path = coverage * phase-in (policy schedule)
-def _ets_phase(y: int) -> int:
-    if y <= 2023:
-        return 0
-    if y == 2024:
-        return 40
-    if y == 2025:
-        return 70
-    return 100 # 2026+
-
-ets_effective_pct = [float(effective_coverage_pct) * _ets_phase(y) / 100.0 for y in years_dyn]
-ets_uncovered_pct = [max(0.0, 100.0 - c) for c in ets_effective_pct]
-
-x = np.arange(len(years_dyn))
-width = 0.38
-
-fig_dyn, ax_dyn = plt.subplots(figsize=(10, 4))
-
-# ETS stacked (covered vs uncovered)
-ax_dyn.bar(x - width/2, ets_effective_pct, width, label='ETS covered (%)')
-ax_dyn.bar(x - width/2, ets_uncovered_pct, width, bottom=ets_effective_pct, label='ETS not covered (%)')
-
-# FuelEU stacked (required reduction vs remaining intensity)
-ax_dyn.bar(x + width/2, fueleu_reduction_pct, width, label='FuelEU required reduction (%)')
-ax_dyn.bar(x + width/2, fueleu_remaining_pct, width, bottom=fueleu_reduction_pct, label='Remaining intensity (%)')
-
-ax_dyn.set_xticks(x)
-ax_dyn.set_xticklabels([str(y) for y in years_dyn])
-ax_dyn.set_ylabel('%')
-ax_dyn.set_title('EU ETS coverage vs FuelEU sector target path')
-ax_dyn.legend(ncol=2, loc='upper center')
-ax_dyn.grid(axis='y', linestyle='--', alpha=0.5)
+if rows and st.checkbox("🧮 Reward & GWP sweep", value=False, key="show_sweep"):
+    import altair as alt  # deferred like matplotlib: only loaded when the sweep is shown
+
+    st.caption("The current fuel mix under every OPS reward (0–20%), wind factor, GWP basis and year 2025–2050 "
+               "(ETS phase-in schedule), in one vectorized pass over the fuel factors.")
+    grid = sweep(blend_inputs)
+    o, w, g, y = np.meshgrid(grid["ops"], grid["winds"], grid["gwp_choices"], grid["years"], indexing="ij")
+    sweep_df = pd.DataFrame({"OPS (%)": o.ravel().astype(int), "Wind": w.ravel(), "GWP": g.ravel(), "Year": y.ravel(),
+                             **{label: grid[field].ravel() for field, (label, _) in SWEEP_HEATMAPS.items()}})
+    for tab, (field, (label, scale)) in zip(st.tabs([label for label, _ in SWEEP_HEATMAPS.values()]),
+                                            SWEEP_HEATMAPS.items()):
+        heatmap = alt.Chart(sweep_df).mark_rect().encode(
+            x=alt.X("Year:O", axis=alt.Axis(labelAngle=-90, values=[2025, 2030, 2035, 2040, 2045, 2050])),
+            y=alt.Y("OPS (%):O", sort="descending"),
+            color=alt.Color(f"{label}:Q", scale=alt.Scale(**scale), legend=alt.Legend(title=None)),
+            tooltip=["Year", "OPS (%)", "Wind", "GWP", alt.Tooltip(f"{label}:Q", format=",.2f")],
+        ).properties(width=170, height=150).facet(
+            column=alt.Column("Wind:O", sort="descending", title="Wind reward factor"),
+            row=alt.Row("GWP:N", title=None))
+        tab.altair_chart(heatmap, width="content")
+
+    st.markdown("**Lowest OPS reward (%) that reaches a surplus** (— = none within 0–20%)")
+    surplus_ops = grid["surplus_ops"]  # (winds, gwps, years)
+    st.dataframe(pd.DataFrame(
+        surplus_ops.transpose(1, 0, 2).reshape(-1, len(grid["years"])), columns=grid["years"],
+        index=pd.MultiIndex.from_product([grid["gwp_choices"], grid["winds"]], names=["GWP", "Wind"]),
+    ).style.format("{:.0f}", na_rep="—"))
+
+# === FLEET POOLING (BATCH RESULTS) ===
+mark(profile, "fleet pooling")
+if st.checkbox("🚢 Fleet pooling", value=False, key="show_fleet_pooling"):
+    st.caption("Upload per-vessel results from `python -m fueleu.batch`. An optional `pool` column splits the fleet "
+               "into pools (blank = not pooled); without it the whole fleet is one pool.")
+    pool_file = st.file_uploader("Fleet results (CSV)", type=["csv"], key="fleet_pool_file")
+    if pool_file is not None:
+        fleet_results = pd.read_csv(pool_file, dtype={"vessel": str, "pool": str})
+        pooled_results, pool_summaries = pool_results(
+            fleet_results.drop(columns=["pool"], errors="ignore"),
+            fleet_results["pool"] if "pool" in fleet_results else None)
+        st.dataframe(pd.DataFrame(pool_summaries).rename(columns={
+            "pool": "Pool", "vessels": "Vessels", "surplus_t": "Surplus (tCO2eq)", "deficit_t": "Deficit (tCO2eq)",
+            "covered_t": "Covered (tCO2eq)", "admitted": "Deficit vessels covered", "left_out": "Deficit vessels left out",
+            "partly_covered": "Of which partly covered", "avoided_penalty": "Avoided Penalty (Eur)",}).style.format({
+            "Surplus (tCO2eq)": "{:,.1f}",
+            "Deficit (tCO2eq)": "{:,.1f}",
+            "Covered (tCO2eq)": "{:,.1f}",
+            "Avoided Penalty (Eur)": "{:,.2f}",}), hide_index=True)
+        st.metric("Fleet penalty after pooling (Eur)", f"{pooled_results['penalty_after_eur'].sum():,.2f}",
+                  delta=f"{-sum(s['avoided_penalty'] for s in pool_summaries):,.2f}", delta_color="inverse")
+        st.download_button("⬇️ Download pooled results (CSV)", pooled_results.to_csv(index=False).encode("utf-8"),
+                           file_name="pooled_results.csv", mime="text/csv")
+
+# === BACKGROUND JOBS (FLEET EXPORTS, SIMULATIONS) ===
+mark(profile, "jobs")
+JOB_REFRESH_S = 2.0
+
+
+def _read_job_result(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+if st.checkbox("🗄 Background jobs", key="show_jobs"):
+    st.caption("Fleet-scale runs go to a local job queue and keep running if you refresh or leave the page. Upload a "
+               "consumption file in the `python -m fueleu.batch` format; the year, GWP, rewards, EUA price and FX "
+               "above apply.")
+    ensure_worker()  # also re-queues jobs interrupted by a restart
+    job_file = st.file_uploader("Consumption file (CSV or Parquet)", type=["csv", "parquet"], key="jobs_input")
+    job_scenario = {"year": year, "gwp_choice": gwp_choice, "ops": ops, "wind": wind, "eua_price": eua_price,
+                    "exchange_rate": exchange_rate, "phase_in_pct": phase_in_pct}
+    job_cols = st.columns(2)
+    for col, (kind, label) in zip(job_cols, [("fleet_results", "Fleet results (CSV)"),
+                                             ("fleet_reports", "Fleet PDF reports (ZIP)")]):
+        if col.button(f"Queue: {label}", key=f"queue_{kind}", disabled=job_file is None):
+            submit_job(kind, {**job_scenario, "pooling_price_usd": pooling_price_usd_per_tonne,
+                              "custom_fuels": blend_inputs["custom_fuels"]},
+                       label=f"{label}: {job_file.name}",
+                       files={"input" + os.path.splitext(job_file.name)[1].lower(): job_file.getvalue()})
+
+    @st.fragment(run_every=JOB_REFRESH_S)
+    def _job_panel():
+        for job in list_jobs(limit=10):
+            info_col, action_col = st.columns([4, 1])
+            with info_col:
+                if job["status"] == "failed":
+                    st.error(f"**{job['label']}** ({created_label(job)}): {job['error']}")
+                elif job["status"] == "done":
+                    text = f"**{job['label']}** ({created_label(job)}): done in {format_eta(job['finished'] - job['started'])}"
+                elif job["status"] == "running":
+                    done = f"{job['done']:,.0f} / {job['total']:,.0f} {job['unit'] or ''}" if job["total"] else (job["unit"] or "")
+                    text = f"**{job['label']}**: {done} — ETA {format_eta(job['eta_s'])}"
+                else:
+                    text = f"**{job['label']}**: queued"
+                if job["status"] != "failed":
+                    st.progress(job["fraction"], text=text)
+            with action_col:
+                if job["result_path"]:
+                    st.download_button("⬇️ Download", partial(_read_job_result, job["result_path"]),
+                                       file_name=job["result_name"], key=f"job_download_{job['id']}",
+                                       mime="application/zip" if job["result_name"].endswith(".zip") else "text/csv")
+                if job["status"] != "running":
+                    st.button("Remove", key=f"job_remove_{job['id']}", on_click=delete_job, args=(job["id"],))
+
+    _job_panel()
+
+# === SCENARIO STORE ===
+mark(profile, "scenarios")
+SCENARIO_LABELS = {
+    "ghg_intensity": "GHG Intensity (gCO2eq/MJ)", "target": "Target (gCO2eq/MJ)",
+    "compliance_balance": "Compliance Balance (tCO2eq)", "penalty": "Penalty (EUR)", "ets_cost": "EU ETS Cost (EUR)",
+    "total_cost": "Fuel Cost (EUR)", "emissions_tonnes": "Emissions (WtW, tCO2eq)", "total_energy": "Energy (MJ)",
+}
 
-# Marker: non-CO₂ enters ETS from 2026
-if 2026 in years_dyn:
-    idx_2026 = years_dyn.index(2026)
-    ax_dyn.axvline(idx_2026, linestyle=':', linewidth=1)
-    ylim = ax_dyn.get_ylim()
-    ax_dyn.text(idx_2026 + 0.03, ylim[1]*0.95, 'ETS adds CH₄+N₂O from 2026', rotation=90, va='top')
+if st.checkbox("💾 Scenario store", key="show_scenarios"):
+    st.caption("Saved scenarios keep their inputs and results on disk, so they outlast a reset or a browser refresh. "
+               "Listing, comparing and opening them reads the stored figures and does not recompute anything.")
+    save_cols = st.columns([3, 2, 2, 1])
+    scenario_name = save_cols[0].text_input("Scenario name", key="scenario_name",
+                                            placeholder=f"{year} {gwp_choice}, OPS {ops}%, wind {wind:.2f}")
+    scenario_vessel = save_cols[1].text_input("Vessel", key="scenario_vessel")
+    scenario_strategy = save_cols[2].selectbox("Strategy", SCENARIO_STRATEGIES, key="scenario_strategy")
+    save_cols[3].markdown("&nbsp;")
+    if save_cols[3].button("Save", key="scenario_save", disabled=not rows):
+        saved_id = save_scenario(blend_inputs, blend, scenario_name or None, scenario_vessel.strip(), scenario_strategy,
+                                 backend=numeric_backend)
+        st.success(f"Saved as scenario #{saved_id}.")
+
+    facets = scenario_facets()
+    filter_cols = st.columns(5)
+    scenario_filter = {
+        "vessel": filter_cols[0].multiselect("Vessel", facets["vessel"], key="scenario_f_vessel"),
+        "year": filter_cols[1].multiselect("Year", facets["year"], key="scenario_f_year"),
+        "gwp_choice": filter_cols[2].multiselect("GWP", facets["gwp_choice"], key="scenario_f_gwp"),
+        "strategy": filter_cols[3].multiselect("Strategy", facets["strategy"], key="scenario_f_strategy"),
+    }
+    scenario_balance = filter_cols[4].selectbox("Balance", ["any", "deficit", "surplus"], key="scenario_f_balance")
+    saved = query_scenarios(**scenario_filter, balance=None if scenario_balance == "any" else scenario_balance)
+    if saved:
+        df_saved = pd.DataFrame(saved).set_index("id")
+        df_saved["created"] = pd.to_datetime(df_saved["created"], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+        st.dataframe(df_saved[["name", "vessel", "year", "gwp_choice", "strategy", "ops", "wind", *HEADLINE_FIELDS[:6],
+                               "created"]].rename(columns=SCENARIO_LABELS).style.format(precision=2, thousands=","))
+        saved_names = {row["id"]: f"#{row['id']} {row['name']}" for row in saved}
+        compare_ids = st.multiselect("Compare side by side", list(saved_names), format_func=saved_names.get,
+                                     key="scenario_compare")
+        if compare_ids:
+            view = compare_scenarios(compare_ids)
+            columns = [saved_names[s["id"]] for s in view["scenarios"]]
+            df_compare = pd.DataFrame({c: [s[f] for f in HEADLINE_FIELDS] for c, s in zip(columns, view["scenarios"])},
+                                      index=[SCENARIO_LABELS[f] for f in HEADLINE_FIELDS])
+            if len(columns) > 1 and st.checkbox("Show differences to the first scenario", key="scenario_deltas"):
+                df_compare = pd.DataFrame({c: [d[f] for f in HEADLINE_FIELDS] for c, d in zip(columns, view["deltas"])},
+                                          index=df_compare.index)
+            st.dataframe(df_compare.style.format("{:,.2f}"))
+            st.dataframe(pd.DataFrame(view["fuel_tonnes"], index=columns).T.style.format("{:,.0f}"))
+            if st.button(f"Delete {len(compare_ids)} selected", key="scenario_delete"):
+                delete_scenarios(compare_ids)
+                st.session_state.pop("scenario_compare", None)
+                st.rerun()
 
-st.pyplot(fig_dyn)
+        open_id = st.selectbox("Open a saved scenario", [None, *saved_names], key="scenario_open",
+                               format_func=lambda i: "—" if i is None else saved_names[i])
+        opened = load_scenario(open_id) if open_id is not None else None
+        if opened is not None:
+            opened_result, opened_inputs = opened["result"], opened["inputs"]
+            st.markdown(f"**{opened['name']}** — {opened['vessel'] or 'no vessel'}, {opened_inputs['year']}, "
+                        f"{opened_inputs['gwp_choice']}, OPS {opened_inputs['ops']}%, wind {opened_inputs['wind']:.2f}, "
+                        f"EUA {opened_inputs['eua_price']:,.0f} EUR, {opened['strategy']} ({opened['backend']})")
+            metric_cols = st.columns(4)
+            metric_cols[0].metric("GHG Intensity (gCO2eq/MJ)", f"{opened_result['ghg_intensity']:.2f}")
+            metric_cols[1].metric("Compliance Balance (tCO2eq)", f"{opened_result['compliance_balance']:,.2f}")
+            metric_cols[2].metric("Estimated Penalty (EUR)", f"{opened_result['penalty']:,.2f}")
+            metric_cols[3].metric("EU ETS Cost (EUR)", f"{opened_result['ets_cost']:,.2f}")
+            if opened_result["rows"]:
+                st.dataframe(pd.DataFrame(opened_result["rows"]).style.format(precision=2, thousands=","))
+    else:
+        st.info("No saved scenarios match." if any(scenario_filter.values()) or scenario_balance != "any"
+                else "No saved scenarios yet.")
 
 # === PDF EXPORT ===
+mark(profile, "pdf")
 st.subheader("Export to PDF")
 
 with st.expander("PDF sections to include", expanded=False):
@@ -1067,263 +974,62 @@ with st.expander("PDF sections to include", expanded=False):
     opt_line_chart = st.checkbox("Add line chart: targets", False)
     opt_stack_chart = st.checkbox("Add stacked chart: FuelEU vs ETS", False)
 
+if numeric_backend != "decimal":
+    st.caption("Figures come from the fast float64 backend; select Decimal under 🛠 Debug for audit reports.")
 if st.button("Export to PDF (with selections)"):
     if not rows:
         st.warning("No data to export.")
     else:
-        pdf = FPDF()
-        pdf.add_page()
-
-        # --- Summary header ---
-        if opt_summary:
-            pdf.set_font("Arial", style="BU", size=12)
-            pdf.cell(200, 10, txt="Fuel EU Maritime GHG & Penalty Report", ln=True, align="C")
-            pdf.set_font("Arial", "B", size=11)
-            pdf.cell(200, 10, txt=f"Year: {year} | GWP: {gwp_choice}", ln=True)
-            pdf.cell(200, 10, txt=f"EU Target for {year}: {target_intensity(year):.2f} gCO2eq/MJ", ln=True)
-            pdf.cell(200, 10, txt=f"GHG Intensity: {ghg_intensity:.2f} gCO2eq/MJ", ln=True)
-            pdf.cell(200, 10, txt=f"Compliance Balance: {compliance_balance:,.0f} tCO2eq", ln=True)
-            pdf.cell(200, 10, txt=f"Penalty: {penalty:,.0f} Eur", ln=True)
-        
-        # --- ETS parameters & total ---
-        if opt_ets:
-            pdf.set_font("Arial", size=10)
-            pdf.cell(200, 10, txt=f"ETS Coverage (effective): {effective_coverage_pct:.1f}%", ln=True)
-            pdf.cell(200, 10, txt=f"ETS Phase-in: {phase_in_pct}%", ln=True)
-            pdf.cell(200, 10, txt=f"ETS includes CH4/N2O/slip: {'Yes' if include_nonco2_in_ets else 'No (CO2-only)'}", ln=True)
-            if eua_price > 0:
-                pdf.cell(200, 10, txt=f"ETS-eligible TtW (covered): {ets_covered_tonnes:,.0f} tCO2eq", ln=True)
-                pdf.cell(200, 10, txt=f"EU ETS Cost: {ets_cost:,.0f} Eur", ln=True)
-
-        
-        # --- Emissions totals (WtT vs TtW) ---
-        if opt_split_totals:
-            ttw_total_tonnes = float((ttw_co2_sum + ttw_nonco2_sum) / Decimal("1000000"))
-            wtt_total_tonnes = float(wtt_sum / Decimal("1000000"))
-            pdf.cell(200, 10, txt=f"TtW Total: {ttw_total_tonnes:,.0f} tCO2eq (CO2: {float(ttw_co2_sum/Decimal('1000000')):,.0f} | non-CO2: {float(ttw_nonco2_sum/Decimal('1000000')):,.0f})", ln=True)
-            pdf.cell(200, 10, txt=f"WtT Total: {wtt_total_tonnes:,.0f} tCO2eq", ln=True)
-            pdf.cell(200, 10, txt=f"Total Emissions (WtW): {emissions_tonnes:,.0f} tCO2eq", ln=True)
-            pdf.ln(5)
-        
-       # --- Fuel Breakdown ---
-        if opt_fuel_table:
-            pdf.set_font("Arial", "U", size=10)
-            pdf.cell(200, 8, txt="Fuel Breakdown:", ln=True)
-            pdf.set_font("Arial", size=10)
-        
-        if user_entered_prices:
-            for row in rows:
-                fuel_name = row["Fuel"]
-                qty = row["Quantity (t)"]
-                price_usd = (row.get("Price per Tonne (USD)") or 0.0)
-                cost_eur = (row.get("Cost (Eur)") or 0.0)
-                ghg_i = row["GHG Intensity (gCO2eq/MJ)"]
-                line = (f"{fuel_name}: {qty:,.0f} t @ {price_usd:,.2f} USD/t | "
-                        f"{cost_eur:,.2f} Eur | GHG Intensity: {ghg_i:.2f} gCO2eq/MJ")
-                pdf.multi_cell(200, 6, txt=line)
-            pdf.ln(2)
-            pdf.set_font("Arial", size=8)
-            pdf.cell(200, 6, txt=f"Conversion Rate Used: 1 USD = {exchange_rate:.6f} Eur", ln=True)
-            pdf.set_font("Arial", "B", size=11)
-            rollup = ((total_cost if user_entered_prices else 0.0)
-                      + (penalty or 0.0)
-                      + (ets_cost if eua_price > 0 else 0.0))
-            pdf.cell(200, 8, txt=f"Total Cost: {rollup:,.2f} Eur", ln=True)
-        else:
-            for row in rows:
-                fuel_name = row["Fuel"]
-                qty = row["Quantity (t)"]
-                ghg_i = row["GHG Intensity (gCO2eq/MJ)"]
-                pdf.cell(200, 6, txt=f"{fuel_name}: {qty:,.0f} t | GHG Intensity: {ghg_i:.2f} gCO2eq/MJ", ln=True)
-
-        # --- Fuel Details (LCV & emission factors) ---
-        if opt_fuel_details_pdf:
-            pdf.ln(3)
-            pdf.set_font("Arial", "U", 10)
-            pdf.cell(200, 8, "Fuel Details (LCV & Emission Factors):", ln=True)
-            pdf.set_font("Arial", size=9)
-        
-            # Selected stock fuels (qty > 0)
-            selected = [name for name, qty in fuel_inputs.items() if qty > 0]
-            for f in FUELS:
-                if f["name"] not in selected:
-                    continue
-                line = (f"{f['name']} | LCV {f['lcv']:.4f} MJ/g | WtT {f['wtt']:.2f} g/MJ | "
-                        f"TtW CO2 {f['ttw_co2']:.3f} g/g | CH4 {f['ttw_ch4']:.5f} g/g | "
-                        f"N2O {f['ttw_n2O']:.5f} g/g")
-                if f.get("ch4_slip"):
-                    line += f" | CH4 slip {float(f['ch4_slip']):.1f} g/MJ"
-                pdf.multi_cell(200, 5, line)
-        
-            # Custom fuels (qty > 0)
-            for cf in st.session_state.get("custom_fuels", []):
-                if float(cf.get("qty_t", 0)) <= 0:
-                    continue
-                is_basic = str(cf.get("mode", "Basic")).startswith("Basic")
-                if is_basic:
-                    line = (f"{cf.get('name','Custom fuel')} (custom; WtW-only) | "
-                            f"LCV {float(cf.get('lcv',0.0)):.4f} MJ/g | "
-                            f"WtW {float(cf.get('wtw',0.0)):.2f} g/MJ")
-                else:
-                    line = (f"{cf.get('name','Custom fuel')} (custom) | "
-                            f"LCV {float(cf.get('lcv',0.0)):.4f} MJ/g | "
-                            f"WtT {float(cf.get('wtt',0.0)):.2f} g/MJ | "
-                            f"TtW CO2 {float(cf.get('ttw_co2',0.0)):.3f} g/g | "
-                            f"CH4 {float(cf.get('ttw_ch4',0.0)):.5f} g/g | "
-                            f"N2O {float(cf.get('ttw_n2o',0.0)):.5f} g/g")
-                    slip = float(cf.get("ch4_slip", 0.0))
-                    if slip:
-                        line += f" | CH4 slip {slip:.1f} g/MJ"
-                pdf.multi_cell(200, 5, line)
-        
-            pdf.set_font("Arial", size=8)
-            pdf.multi_cell(200, 5,
-                "Note: Custom fuels entered in Basic mode are excluded from ETS and the split totals (TtW/WtT).")
-        
-        # --- Mitigation overview (only if deficit) ---
-        if opt_mitigation and (compliance_balance < 0):
-            pdf.ln(5)
-            pdf.set_font("Arial", style="BU", size=10)
-            pdf.cell(200, 10, txt="Mitigation Overview", ln=True)
-            pdf.set_font("Arial", size=10)
-            pdf.cell(200, 10, txt=f"CO2 Deficit to Offset: {abs(compliance_balance):,.0f} tCO2eq", ln=True)
-        
-        # --- Cost-Benefit Analysis (optional) ---
-        if opt_cost_benefit and user_entered_prices:
-            # small helper to print a bullet with a breakdown line
-            def _pdf_bullet(p, title, total_value, parts):
-                """
-                parts: list of (label, value) pairs. Zero/None values are skipped.
-                """
-                p.set_font("Arial", "B", 11)
-                p.cell(200, 8, txt=f"- {title}: {total_value:,.2f} Eur", ln=True)
-                shown = [(k, v) for (k, v) in parts if (v is not None and float(v) != 0.0)]
-                if shown:
-                    p.set_font("Arial", "", 10)
-                    pieces = " + ".join([f"{k}: {float(v):,.2f}" for k, v in shown])
-                    p.multi_cell(200, 6, txt=f"    = {pieces}", align="L")
-
-            pdf.ln(5)
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(200, 10, txt="--- Cost-Benefit Analysis ---", ln=True)
-        
-            # Base scenario
-            base_parts = [("Initial fuels", total_cost)]
-            label_bits = ["Initial fuels"]
-            base_total = total_cost
-            if penalty and penalty > 0:
-                base_parts.append(("Penalty", penalty))
-                label_bits.append("Penalty")
-                base_total += penalty
-            if eua_price > 0:
-                base_parts.append(("EU ETS", ets_cost))
-                label_bits.append("EU ETS")
-                base_total += ets_cost
-            _pdf_bullet(pdf, " + ".join(label_bits), base_total, base_parts)
-            
-            
-            # Pooling (only if a price was entered during the session)
-            try:
-                _pool_price = float(pooling_price_usd_per_tonne)
-            except Exception:
-                _pool_price = 0.0
-            if _pool_price > 0:
-                _pool_cost_eur = _pool_price * float(exchange_rate) * abs(float(compliance_balance))
-                pool_parts = [("Initial fuels", total_cost), ("Pooling", _pool_cost_eur)]
-                pool_label = "Initial fuels + Pooling"
-                pool_total = total_cost + _pool_cost_eur
-                if eua_price > 0:
-                    pool_parts.append(("EU ETS", ets_cost))
-                    pool_label += " + EU ETS"
-                    pool_total += ets_cost
-                _pdf_bullet(pdf, pool_label + " (no Penalty)", pool_total, pool_parts)
-            
-            # Bio fuel addition (if priced)
-            if added_biofuel_cost > 0:
-                ets_component = (
-                new_blend_ets_cost if (eua_price > 0 and new_blend_ets_cost is not None)
-                else (ets_cost if eua_price > 0 else 0.0))
-                bio_parts = [("Initial fuels", total_cost), ("Bio fuels", added_biofuel_cost)]
-                bio_label = "Initial fuels + Bio fuels"
-                bio_total = total_cost + added_biofuel_cost
-                if eua_price > 0:
-                    bio_parts.append(("EU ETS", ets_component))
-                    bio_label += " + EU ETS"
-                    bio_total += ets_component
-                _pdf_bullet(pdf, bio_label + " (no Penalty)", bio_total, bio_parts)
-            
-            # Replacement (if priced)
-            try:
-                _sub_price = float(substitution_price_usd)
-            except Exception:
-                _sub_price = 0.0
-        
-            if _sub_price > 0 and (additional_substitution_cost is not None):
-                repl_total_direct = (
-                    float(total_cost)
-                    + float(additional_substitution_cost)
-                    + (float(substitution_ets_cost) if (eua_price > 0 and substitution_ets_cost is not None) else 0.0))
-        
-                _pdf_bullet(
-                    pdf,
-                    "Fuel Replacement" + (" + EU ETS, no Penalty" if eua_price > 0 else ", no Penalty"),
-                    repl_total_direct,
-                    [
-                        ("Initial fuels", total_cost),
-                        ("Additional fuel cost", additional_substitution_cost),
-                        ("EU ETS", substitution_ets_cost if eua_price > 0 else 0.0),],)
-            
-        
-        # --- Optional charts (saved as images and embedded) ---
-        chart_tmp_files = []
-        try:
-            CHART_GAP_MM = 30
-            chart_blocks = []
-            
-            if opt_line_chart and 'fig' in globals():
-                tmp_png1 = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-                fig.savefig(tmp_png1.name, dpi=200, bbox_inches="tight")
-                chart_tmp_files.append(tmp_png1.name)
-                w_in, h_in = fig.get_size_inches()
-                chart_blocks.append(("Sector-wide GHG Intensity Targets", tmp_png1.name, (w_in, h_in)))
-        
-            if opt_stack_chart and 'fig_dyn' in globals():
-                tmp_png2 = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-                fig_dyn.savefig(tmp_png2.name, dpi=200, bbox_inches="tight")
-                chart_tmp_files.append(tmp_png2.name)
-                w_in2, h_in2 = fig_dyn.get_size_inches()
-                chart_blocks.append(("Regulatory Dynamics: FuelEU vs EU ETS", tmp_png2.name, (w_in2, h_in2)))
-
-            if chart_blocks:
-                # Start a single page for charts
-                pdf.add_page()
-                content_w = pdf.w - pdf.l_margin - pdf.r_margin  # printable width
-        
-                for title, path, (w_in, h_in) in chart_blocks:
-                    # Estimate needed height: title + image + small gap
-                    title_h = 6
-                    img_h_mm = content_w * (h_in / w_in)  # preserve aspect ratio
-                    needed_h = title_h + img_h_mm + 5
-                    remaining_h = pdf.h - pdf.b_margin - pdf.get_y()
-        
-                    if needed_h > remaining_h:
-                        pdf.add_page()
-        
-                    pdf.set_font("Arial", "B", 11)
-                    pdf.cell(0, title_h, txt=title, ln=True)
-        
-                    y_img = pdf.get_y()
-                    pdf.image(path, x=pdf.l_margin, y=y_img, w=content_w)
-                    pdf.set_y(y_img + img_h_mm + CHART_GAP_MM)  # spacing below image
-        except Exception:
-            # If chart export fails for any reason, keep going with text-only PDF
-            pass
-        
-        # --- Export file ---
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_pdf:
-            pdf.output(tmp_pdf.name)
-            tmp_pdf_path = tmp_pdf.name
-        
-        st.success(f"PDF exported: {os.path.basename(tmp_pdf_path)}")
-        with open(tmp_pdf_path, "rb") as f:
-            st.download_button("Download PDF", data=f.read(), file_name="ghg_report.pdf", mime="application/pdf")
+        export_started = time.perf_counter()
+        from fueleu.report import layout_report  # fpdf deferred to the first export: ~0.4 s of cold start
+
+        pdf_sections = {
+            "summary": opt_summary,
+            "ets": opt_ets,
+            "fuel_table": opt_fuel_table,
+            "fuel_details": opt_fuel_details_pdf,
+            "split_totals": opt_split_totals,
+            "mitigation": opt_mitigation,
+            "cost_benefit": opt_cost_benefit,
+            "line_chart": opt_line_chart,
+            "stack_chart": opt_stack_chart,
+        }
+        # Reuse the PNG bytes already rendered for the page (no re-render)
+        chart_assets = {"line_chart": (target_png, target_size), "stack_chart": (dynamics_png, dynamics_size)}
+        added_fuels = (added_biofuel_cost, new_blend_ets_cost if new_blend_ets_cost is not None else ets_cost)
+        replacement = ((additional_substitution_cost, substitution_ets_cost)
+                       if substitution_price_usd > 0 and additional_substitution_cost is not None else None)
+        pdf = layout_report({**blend_inputs, "pooling_price_usd": pooling_price_usd_per_tonne}, blend, pdf_sections,
+                            chart_assets, added_fuels=added_fuels, replacement=replacement)
+
+        # --- Export file (in memory) ---
+        layout_done = time.perf_counter()
+        pdf_bytes = bytes(pdf.output())
+        export_done = time.perf_counter()
+
+        charts = [key for key in ("line_chart", "stack_chart") if pdf_sections[key]]
+        chart_bytes = sum(len(chart_assets[key][0]) for key in charts)
+        st.success(f"PDF exported: ghg_report.pdf ({len(pdf_bytes) / 1024:,.1f} KB in "
+                   f"{(export_done - export_started) * 1000:,.0f} ms)")
+        st.caption(
+            f"Export timing: layout {(layout_done - export_started) * 1000:,.1f} ms ({len(charts)} images, "
+            f"{chart_bytes / 1024:,.1f} KB PNG) | output {(export_done - layout_done) * 1000:,.1f} ms | "
+            f"{pdf.pages_count} pages")
+        st.download_button("Download PDF", data=pdf_bytes, file_name="ghg_report.pdf", mime="application/pdf")
+
+# === DEBUG: BACKEND & RERUN TIMINGS ===
+with st.sidebar.expander("🛠 Debug", expanded=False):
+    st.radio("Numeric backend", BACKENDS, index=BACKENDS.index(DEFAULT_BACKEND), key="numeric_backend",
+             format_func={"decimal": "Decimal (exact reference)", "float": "float64 (fast)"}.get,
+             help="Decimal is the audit reference; `python -m fueleu.diffcheck` reports the float64 deviation.")
+    st.checkbox("Time reruns (per stage + tracemalloc peak)", key="debug_profile",
+                help=f"Each profiled rerun is also appended to {PROFILE_LOG}")
+    rerun_profile = finish_profile(profile, {
+        "year": year,
+        "fuels": len(fuel_inputs),
+        "custom_fuels": len(blend_inputs["custom_fuels"]),
+        "deficit": compliance_balance < 0,})
+    if rerun_profile:
+        st.dataframe(pd.DataFrame(rerun_profile["stages"]).rename(columns={
+            "stage": "Stage", "ms": "ms", "peak_kib": "Peak (KiB)", "net_kib": "Net (KiB)"}).round(1), hide_index=True)
+        st.caption(f"Rerun {rerun_profile['total_ms']:,.0f} ms (tracemalloc adds overhead)")
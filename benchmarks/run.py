@@ -0,0 +1,341 @@
+"""Benchmarks for the calculation core, solvers, charts, PDF export and app cold start.
+
+Every case runs on fixed synthetic inputs at 1, 10, 100 and 10,000 fuel rows
+(blend, solvers, OPS x wind x GWP x year sweep) or vessels (fleet engine, PDF
+reports). Each case also returns a few result figures that are compared with
+benchmarks/golden.json, so a speed-up that changes results fails the run
+(exit code 1). fleet_parallel shards the fleet over PARALLEL_WORKERS processes
+and also reports vessels/s per worker (timings, not golden values). cold_start times a fresh interpreter running app.py's
+module-level imports and checks that the deferred heavy modules
+(DEFERRED_MODULES) are still not loaded there.
+
+    python -m benchmarks.run                       # all cases, table on stderr
+    python -m benchmarks.run --json bench.json     # + machine-readable results
+    python -m benchmarks.run --only blend,fleet --scales 1,100
+    python -m benchmarks.run --update-golden       # after an intended result change
+"""
+import argparse
+import ast
+from datetime import datetime, timezone
+from decimal import Decimal
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from fueleu import (
+    FUELS,
+    FUELS_VERSION,
+    alternative_fuels,
+    compute_blend,
+    compute_ets_cost,
+    initial_fuels,
+    rank_substitutions,
+    solve_add_fuel,
+    solve_least_cost,
+    solve_substitution,
+    solve_substitution_all,
+)
+from fueleu.charts import clear_chart_cache, render_chart
+from fueleu.fleet import compute_fleet
+from fueleu.parallel import run_fleet
+from fueleu.report import write_reports
+from fueleu.sweep import sweep
+
+SCALES = (1, 10, 100, 10_000)
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden.json")
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+DEFERRED_MODULES = ("matplotlib.pyplot", "fpdf")  # imported on first chart render / PDF export, not at start-up
+GOLDEN_RTOL = 1e-9
+REPEAT = 5            # timed runs per case (after one warm-up run) ...
+TIME_BUDGET_S = 3.0   # ... unless the case has already used this much time (or the warm-up alone did)
+PARALLEL_WORKERS = min(os.cpu_count() or 1, 4)
+PARALLEL_SHARD = 1_000  # vessels per task: 10,000 vessels make 10 tasks
+
+SCENARIO = {"year": 2030, "gwp_choice": "AR5", "ops": 0, "wind": 1.00, "exchange_rate": 0.92,
+            "eua_price": 80.0, "effective_coverage_pct": 75.0, "phase_in_pct": 100}
+
+
+# === SYNTHETIC INPUTS ===
+def blend_inputs(rows: int) -> dict:
+    """A blend with `rows` fuel rows: stock fuels first (fossil-heavy), then Advanced custom fuels."""
+    stock = [f["name"] for f in FUELS][:rows]
+    fuel_inputs = {name: (1000.0 if name in initial_fuels else 20.0) + (i * 37) % 400 for i, name in enumerate(stock)}
+    fuel_price_inputs = {name: 400.0 + (i * 53) % 900 for i, name in enumerate(stock)}
+    custom_fuels = [{
+        "name": f"Custom {i}", "mode": "Advanced", "qty_t": 50.0 + (i * 29) % 500, "price_usd": 500.0 + (i * 17) % 700,
+        "lcv": 0.040 + (i % 7) * 0.0005, "wtt": 12.0 + (i % 11), "ttw_co2": 3.1 + (i % 5) * 0.01,
+        "ttw_ch4": 0.00005 * (i % 3), "ttw_n2o": 0.00018, "ch4_slip": 0.0, "rfnbo": i % 13 == 0,
+    } for i in range(max(rows - len(stock), 0))]
+    return {**SCENARIO, "fuel_inputs": fuel_inputs, "fuel_price_inputs": fuel_price_inputs, "custom_fuels": custom_fuels}
+
+
+def fleet_quantities(vessels: int) -> np.ndarray:
+    """vessels x FUELS tonnage matrix: every vessel burns two fossil fuels and, every third one, a bio fuel."""
+    quantities = np.zeros((vessels, len(FUELS)))
+    fossil = np.array([i for i, f in enumerate(FUELS) if f["name"] in initial_fuels])
+    bio = np.array([i for i, f in enumerate(FUELS) if f["name"] in alternative_fuels])
+    v = np.arange(vessels)
+    quantities[v, fossil[v % len(fossil)]] += 2000.0 + (v * 37) % 3000
+    quantities[v, fossil[(v + 1) % len(fossil)]] += 300.0 + (v * 11) % 500
+    quantities[v[::3], bio[v[::3] % len(bio)]] += 100.0 + (v[::3] * 7) % 900
+    return quantities
+
+
+def report_vessels(vessels: int) -> list:
+    q = fleet_quantities(vessels)
+    names = [f["name"] for f in FUELS]
+    return [{
+        "vessel": f"V{i:05d}",
+        "fuel_inputs": {names[j]: float(q[i, j]) for j in np.flatnonzero(q[i])},
+        "fuel_price_inputs": {names[j]: 500.0 + (j * 53) % 900 for j in np.flatnonzero(q[i])},
+        "effective_coverage_pct": 50.0 + (i % 3) * 25.0,
+    } for i in range(vessels)]
+
+
+# === CASES ===
+# Each case: setup(scale) -> state, run(state) -> {golden key: float}. Setup is not timed.
+def _blend(state, backend="decimal"):
+    blend = compute_blend(state, backend=backend)
+    return {k: float(blend[k]) for k in ("ghg_intensity", "compliance_balance", "penalty", "ets_cost", "total_cost")}
+
+
+def _blend_float(state):
+    return _blend(state, backend="float")
+
+
+def _add_fuel(state):
+    inputs, blend = state
+    rows = solve_add_fuel(inputs, blend)
+    return {"feasible": float(len(rows)), "min_required_t": rows[0]["Required Amount (t)"] if rows else 0.0,
+            "sum_ets_cost": float(sum(r["ETS Cost (EUR)"] for r in rows))}
+
+
+def _substitution(state):
+    inputs, blend = state
+    swaps = rank_substitutions(solve_substitution_all(inputs, blend))
+    best = solve_substitution(inputs, blend, swaps[0]["Fuel to replace"], swaps[0]["Mitigation fuel"], 1500.0) if swaps else None
+    return {"feasible": float(len(swaps)), "best_share_pct": swaps[0]["Replaced share (%)"] if swaps else 0.0,
+            "best_total_cost": float(best["total_substitution_cost"] or 0.0) if best else 0.0}
+
+
+def _least_cost(state):
+    inputs, blend = state
+    prices = {name: 900.0 + (i * 131) % 1500 for i, name in enumerate(alternative_fuels)}
+    caps = {name: 50.0 + (i * 7) % 200 for i, name in enumerate(alternative_fuels)}
+    result = solve_least_cost(inputs, blend, prices, caps, pooling_price_usd=250.0)
+    return {"total_cost": result["total_cost"], "pooling_t": result["pooling_t"], "fuels": float(len(result["quantities"]))}
+
+
+def _ets_cost(state):
+    total_cost = total_t = 0.0
+    for co2, nonco2, coverage, include in state:
+        cost, covered = compute_ets_cost(co2, nonco2, 80.0, coverage, 100, include)
+        total_cost += cost
+        total_t += covered
+    return {"cost": total_cost, "covered_t": total_t}
+
+
+def _fleet(state):
+    result = compute_fleet(state, 2030, "AR5", eua_price=80.0, effective_coverage_pct=75.0)
+    return {"energy": float(result["energy"].sum()), "balance": float(result["compliance_balance"].sum()),
+            "penalty": float(result["penalty"].sum()), "ets_cost": float(result["ets_cost"].sum())}
+
+
+def _fleet_parallel(state):
+    result = run_fleet(state, 2030, "AR5", eua_price=80.0, fx=0.92, effective_coverage_pct=75.0,
+                       prices_usd=np.full(len(FUELS), 600.0), workers=PARALLEL_WORKERS, shard_size=PARALLEL_SHARD)
+    return {"balance": float(result["compliance_balance"].sum()), "penalty": float(result["penalty"].sum()),
+            "ets_cost": float(result["ets_cost"].sum()), "fuel_cost": float(result["fuel_cost"].sum()),
+            "mitigation_t": float(np.nansum(result["best_mitigation_t"])), "workers": result["workers"]}
+
+
+def _sweep(state):
+    grid = sweep(state)
+    return {"mean_ghg": float(grid["ghg_intensity"].mean()), "balance": float(grid["compliance_balance"].sum()),
+            "penalty": float(grid["penalty"].sum()), "surplus_cells": float((grid["compliance_balance"] >= 0).sum())}
+
+
+def _chart(kind, args):
+    def run(state):
+        clear_chart_cache()  # cold: figure build + rasterisation
+        data, (width, height) = render_chart(kind, *args)
+        return {"width_in": width, "height_in": height}
+    return run
+
+
+def _pdf(state):
+    out = io.BytesIO()
+    stats = write_reports(state, out, scenario=SCENARIO, sections={"line_chart": True, "stack_chart": True}, workers=1)
+    return {"reports": float(stats["reports"]), "pdf_bytes": float(stats["pdf_bytes"])}
+
+
+def _app_imports(scale) -> str:
+    """app.py's top-level import statements as source (what every cold start executes before the first widget)."""
+    with open(APP_FILE, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _cold_start(source):
+    probe = f"{source}\nimport sys\nprint(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(APP_FILE)).stdout.strip().split(",")
+    return {f"{module}_loaded": float(module in loaded) for module in DEFERRED_MODULES}
+
+
+def _solver_state(rows):
+    inputs = blend_inputs(rows)
+    return inputs, compute_blend(inputs, backend="decimal")
+
+
+def _ets_state(calls):
+    return [(Decimal(3_114_000_000 + i * 1_000_003), Decimal(40_000_000 + i * 997), 50.0 + (i % 3) * 25.0, i % 2 == 0)
+            for i in range(calls)]
+
+
+CASES = {
+    "blend": (blend_inputs, _blend),
+    "blend_float": (blend_inputs, _blend_float),
+    "add_fuel": (_solver_state, _add_fuel),
+    "substitution": (_solver_state, _substitution),
+    "least_cost": (_solver_state, _least_cost),
+    "ets_cost": (_ets_state, _ets_cost),
+    "fleet": (fleet_quantities, _fleet),
+    "fleet_parallel": (fleet_quantities, _fleet_parallel),
+    "sweep": (blend_inputs, _sweep),
+    "pdf": (report_vessels, _pdf),
+}
+UNSCALED_CASES = {  # rendered once per run, independent of blend size
+    "chart_target": (lambda scale: None, _chart("target", (88.0, 2030))),
+    "chart_dynamics": (lambda scale: None, _chart("dynamics", (75.0,))),
+    "cold_start": (_app_imports, _cold_start),
+}
+
+
+# === RUNNER ===
+def _timed(run, state, repeat: int, budget_s: float) -> tuple:
+    started = time.perf_counter()
+    result = run(state)  # warm-up; also the golden values
+    warmup_s = time.perf_counter() - started
+    if warmup_s >= budget_s:
+        return result, [warmup_s]  # too slow to repeat (e.g. 10k PDFs): the warm-up is the measurement
+    times = []
+    while len(times) < repeat and sum(times) < budget_s:
+        started = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - started)
+    return result, times
+
+
+def _check(golden: dict, values: dict) -> list:
+    mismatches = []
+    for key, value in values.items():
+        expected = golden.get(key)
+        if expected is None or abs(value - expected) > GOLDEN_RTOL * max(abs(expected), 1.0):
+            mismatches.append(f"{key}: got {value!r}, golden {expected!r}")
+    return mismatches
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(only=None, scales=SCALES, repeat: int = REPEAT, budget_s: float = TIME_BUDGET_S,
+                   golden=None) -> dict:
+    """Run the selected cases and return the machine-readable report (golden checks included)."""
+    golden = golden or {}
+    cases = [(name, scale, *CASES[name]) for name in CASES for scale in scales]
+    cases += [(name, 1, *case) for name, case in UNSCALED_CASES.items()]
+    results = []
+    for name, scale, setup, run in cases:
+        if only and name not in only:
+            continue
+        case_id = f"{name}/{scale}"
+        result, times = _timed(run, setup(scale), repeat, budget_s)
+        workers = result.pop("workers", None)  # per-worker throughput of the warm-up run, not compared
+        mismatches = _check(golden[case_id], result) if case_id in golden else None
+        results.append({
+            "case": name,
+            "scale": scale,
+            "runs": len(times),
+            "best_s": min(times),
+            "median_s": statistics.median(times),
+            "values": result,
+            "golden": "missing" if mismatches is None else ("ok" if not mismatches else "mismatch"),
+            "mismatches": mismatches or [],
+        })
+        if workers is not None:
+            results[-1]["workers"] = workers
+        print(f"{case_id:<22}{min(times) * 1000:>12.3f} ms  (median {statistics.median(times) * 1000:.3f} ms, "
+              f"{len(times)} runs)  {results[-1]['golden']}", file=sys.stderr)
+        for stats in workers or []:
+            print(f"{'':<22}worker {stats['pid']}: {stats['vessels']} vessels, {stats['vessels_per_s']:,.0f} vessels/s",
+                  file=sys.stderr)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "fuels_version": FUELS_VERSION,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the FuelEU calculation core and check results against golden values.")
+    parser.add_argument("--json", help="write the results as JSON to this path ('-' for stdout)")
+    parser.add_argument("--only", help="comma-separated case names: " + ", ".join([*CASES, *UNSCALED_CASES]))
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)), help="comma-separated row / vessel counts")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per case")
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET_S, help="stop repeating a case after this many seconds")
+    parser.add_argument("--update-golden", action="store_true", help="store this run's values as the golden values")
+    args = parser.parse_args(argv)
+
+    only = set(args.only.split(",")) if args.only else None
+    unknown = (only or set()) - set(CASES) - set(UNSCALED_CASES)
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+    golden = {}
+    if os.path.exists(GOLDEN_FILE):
+        with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+            golden = json.load(f)
+
+    report = run_benchmarks(only, [int(s) for s in args.scales.split(",")], args.repeat, args.budget,
+                            None if args.update_golden else golden)
+
+    if args.update_golden:
+        golden.update({f"{r['case']}/{r['scale']}": r["values"] for r in report["results"]})
+        with open(GOLDEN_FILE, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(golden.items())), f, indent=2)
+            f.write("\n")
+        print(f"golden values updated in {GOLDEN_FILE}", file=sys.stderr)
+    if args.json:
+        text = json.dumps(report, indent=2)
+        if args.json == "-":
+            print(text)
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+    failed = [f"{r['case']}/{r['scale']}" for r in report["results"] if r["golden"] == "mismatch"]
+    for case_id in failed:
+        print(f"GOLDEN MISMATCH {case_id}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""FuelEU Maritime GHG intensity, penalty and EU ETS calculation core."""
+from .engine import (
+    BACKENDS,
+    BASE_TARGET,
+    DEFAULT_BACKEND,
+    DEFAULT_BLEND_INPUTS,
+    ETS_NONCO2_FROM,
+    GWP_VALUES,
+    PENALTY_RATE,
+    REDUCTIONS,
+    REWARD_FACTOR_RFNBO_MULTIPLIER,
+    RFNBO_REWARD_UNTIL,
+    VLSFO_ENERGY_CONTENT,
+    compute_blend,
+    compute_ets_cost,
+    default_phase_in_pct,
+    target_intensity,
+    update_blend,
+)
+from .fuels import (
+    FUEL_INDEX,
+    FUELS,
+    FUELS_VERSION,
+    alternative_fuels,
+    categories,
+    category_names,
+    get_fuel,
+    initial_fuels,
+    load_registry,
+    mitigation_fuels,
+    rfnbo_fuels,
+)
+from .mitigation import (
+    rank_substitutions,
+    solve_add_fuel,
+    solve_add_fuel_all,
+    solve_least_cost,
+    solve_pooling,
+    solve_substitution,
+    solve_substitution_all,
+)
+from .projection import PROJECTION_YEARS, custom_key, project
+
+__all__ = [
+    "BACKENDS",
+    "BASE_TARGET",
+    "DEFAULT_BACKEND",
+    "DEFAULT_BLEND_INPUTS",
+    "ETS_NONCO2_FROM",
+    "GWP_VALUES",
+    "PENALTY_RATE",
+    "REDUCTIONS",
+    "REWARD_FACTOR_RFNBO_MULTIPLIER",
+    "RFNBO_REWARD_UNTIL",
+    "VLSFO_ENERGY_CONTENT",
+    "compute_blend",
+    "compute_ets_cost",
+    "default_phase_in_pct",
+    "target_intensity",
+    "update_blend",
+    "FUEL_INDEX",
+    "FUELS",
+    "FUELS_VERSION",
+    "alternative_fuels",
+    "categories",
+    "category_names",
+    "get_fuel",
+    "initial_fuels",
+    "load_registry",
+    "mitigation_fuels",
+    "rfnbo_fuels",
+    "rank_substitutions",
+    "solve_add_fuel",
+    "solve_add_fuel_all",
+    "solve_least_cost",
+    "solve_pooling",
+    "solve_substitution",
+    "solve_substitution_all",
+    "PROJECTION_YEARS",
+    "custom_key",
+    "project",
+]
@@ -0,0 +1,342 @@
+"""Streaming batch calculator for bunker / consumption exports.
+
+Reads CSV or Parquet in chunks, maps fuel names onto FUELS (plus optional custom
+fuel definitions), aggregates per vessel and writes one result row per vessel.
+Memory grows with the number of vessels, never with the number of input rows;
+with --sorted (input grouped by vessel) only the vessel being read is held.
+
+    python -m fueleu.batch consumption.csv -o results.csv --year 2026 --eua-price 75 --fx 0.92
+    python -m fueleu.batch consumption.csv --xlsx results.xlsx --year 2026
+    python -m fueleu.batch consumption.csv -o results.csv --workers 8   # large fleets: fueleu.parallel
+"""
+import argparse
+from contextlib import ExitStack
+import csv
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .constants import ETS_NONCO2_FROM
+from .engine import GWP_VALUES, PENALTY_RATE, VLSFO_ENERGY_CONTENT, default_phase_in_pct, target_intensity
+from .fleet import compile_factors, per_tonne_factors
+from .fuels import FUELS
+from .parallel import fleet_pool, fleet_tables, run_fleet
+
+DEFAULT_COLUMNS = {
+    "vessel": "vessel",
+    "fuel": "fuel",
+    "tonnes": "tonnes",
+    "price": "price_usd",
+    "voyage": "voyage_type",
+}
+
+# ETS coverage (%) by voyage type; same regulatory defaults as the app's Simple mode
+VOYAGE_COVERAGE = {
+    "intra": 100.0,
+    "intra-eu": 100.0,
+    "berth": 100.0,
+    "at berth": 100.0,
+    "inbound": 50.0,
+    "outbound": 100.0,
+    "outside": 0.0,
+    "extra-eu": 0.0,
+}
+
+RESULT_FIELDS = [
+    "vessel", "fuel_t", "energy_mj", "ghg_intensity", "compliance_balance_t", "penalty_eur",
+    "ets_covered_t", "ets_cost_eur", "fuel_cost_eur",
+]
+
+
+# === INPUT ===
+def iter_chunks(path: str, columns: list, chunksize: int):
+    """Yield DataFrame chunks of `columns` from a CSV or Parquet file."""
+    if path.lower().endswith((".parquet", ".pq")):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet input requires pyarrow (pip install pyarrow).")
+        parquet = pq.ParquetFile(path)
+        present = [c for c in columns if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=present):
+            yield batch.to_pandas()
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        present = [c for c in columns if c in header]
+        yield from pd.read_csv(path, usecols=present, chunksize=chunksize)
+
+
+def count_rows(path: str) -> int:
+    """Data rows in a CSV (newline count, header excluded) or Parquet file (metadata), for progress reporting."""
+    if path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return max(lines + (last != b"\n") - 1, 0)
+
+
+def load_custom_fuels(path: str) -> list:
+    """Read a JSON list of custom fuel dicts (same keys as the app's custom fuel editor)."""
+    with open(path, "r", encoding="utf-8") as f:
+        custom = json.load(f)
+    for cf in custom:
+        cf.setdefault("mode", "Advanced" if "wtt" in cf else "Basic")
+    return custom
+
+
+# === AGGREGATION ===
+def new_totals(n_fuels: int, capacity: int = 1024) -> dict:
+    """Empty per-vessel accumulator for accumulate(): name index plus tonnes, covered tonnes and cost per fuel."""
+    return {
+        "index": {},
+        "names": [],
+        "qty": np.zeros((capacity, n_fuels)),
+        "qty_covered": np.zeros((capacity, n_fuels)),  # tonnes x ETS coverage share
+        "cost_usd": np.zeros((capacity, n_fuels)),
+    }
+
+
+def _vessel_rows(totals: dict, vessels) -> np.ndarray:
+    index = totals["index"]
+    for v in pd.unique(vessels):
+        if v not in index:
+            index[v] = len(totals["names"])
+            totals["names"].append(v)
+    needed = len(totals["names"])
+    capacity = len(totals["qty"])
+    if needed > capacity:
+        # Grow geometrically so appending vessels stays amortised O(1)
+        extra = max(needed, 2 * capacity) - capacity
+        for key in ("qty", "qty_covered", "cost_usd"):
+            totals[key] = np.vstack([totals[key], np.zeros((extra, totals[key].shape[1]))])
+    return np.fromiter((index[v] for v in vessels), dtype=np.int64, count=len(vessels))
+
+
+def accumulate(totals: dict, chunk: pd.DataFrame, fuel_index: dict, columns: dict, unknown: dict):
+    """Add one chunk of consumption rows to the per-vessel totals.
+
+    Fuel names match FUELS / custom names exactly or case-insensitively; rows with
+    unknown fuels are skipped and counted in `unknown`. Voyage types map onto
+    VOYAGE_COVERAGE (unlisted types count as fully covered).
+    """
+    fuel_col = chunk[columns["fuel"]].astype(str).str.strip()
+    fidx = fuel_col.map(fuel_index).fillna(fuel_col.str.casefold().map(fuel_index))
+    if fidx.isna().any():
+        for name, count in fuel_col[fidx.isna()].value_counts().items():
+            unknown[name] = unknown.get(name, 0) + int(count)
+    known = fidx.notna().to_numpy()
+    chunk = chunk[known]
+    fidx = fidx[known].to_numpy(dtype=np.int64)
+
+    tonnes = pd.to_numeric(chunk[columns["tonnes"]], errors="coerce").fillna(0.0).to_numpy()
+    if columns["price"] in chunk:
+        price = pd.to_numeric(chunk[columns["price"]], errors="coerce").fillna(0.0).to_numpy()
+    else:
+        price = np.zeros(len(chunk))
+    if columns["voyage"] in chunk:
+        voyage = chunk[columns["voyage"]].astype(str).str.strip().str.lower()
+        coverage = voyage.map(VOYAGE_COVERAGE).fillna(100.0).to_numpy() / 100.0
+    else:
+        coverage = np.ones(len(chunk))
+
+    vidx = _vessel_rows(totals, chunk[columns["vessel"]].astype(str).to_numpy())
+    np.add.at(totals["qty"], (vidx, fidx), tonnes)
+    np.add.at(totals["qty_covered"], (vidx, fidx), tonnes * coverage)
+    np.add.at(totals["cost_usd"], (vidx, fidx), tonnes * price)
+
+
+def evaluate(totals: dict, per_tonne: np.ndarray, year: int, eua_price: float, phase_in_pct: float, fx: float):
+    """Yield one result dict per vessel held in `totals`."""
+    n = len(totals["names"])
+    if not n:
+        return
+    energy, wtt, ttw_co2, ttw_nonco2, wtw_only = (totals["qty"][:n] @ per_tonne).T
+    _, _, cov_co2, cov_nonco2, _ = (totals["qty_covered"][:n] @ per_tonne).T
+    wtw = wtt + ttw_co2 + ttw_nonco2 + wtw_only
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ghg = np.where(energy > 0, wtw / np.where(energy > 0, energy, 1.0), 0.0)
+        balance = energy * (target_intensity(year) - ghg) / 1_000_000.0
+        penalty = np.where(balance < 0, -balance / np.where(ghg > 0, ghg, 1.0) / VLSFO_ENERGY_CONTENT * PENALTY_RATE * 1_000_000, 0.0)
+    covered_t = (cov_co2 + (cov_nonco2 if year >= ETS_NONCO2_FROM else 0.0)) * (phase_in_pct / 100.0) / 1_000_000.0
+    yield from _rows(totals, energy, ghg, balance, penalty, covered_t, eua_price, fx)
+
+
+def evaluate_parallel(totals: dict, fuels: list, year: int, gwp_choice: str, ops: float, wind: float, eua_price: float,
+                      phase_in_pct: float, fx: float, workers: int, mp_context=None, pool=None):
+    """evaluate() with the vessels sharded across `workers` processes by fueleu.parallel.run_fleet().
+
+    `pool` (fueleu.parallel.fleet_pool() for the same scenario) is reused instead of a pool per call.
+    """
+    n = len(totals["names"])
+    if not n:
+        return
+    result = run_fleet(totals["qty"][:n], year, gwp_choice, ops, wind, eua_price, fx, phase_in_pct=phase_in_pct,
+                       mitigation=[], fuels=fuels, workers=workers, covered_quantities=totals["qty_covered"][:n],
+                       mp_context=mp_context, pool=pool)
+    yield from _rows(totals, result["energy"], result["ghg_intensity"], result["compliance_balance"],
+                     result["penalty"], result["ets_covered_tonnes"], eua_price, fx)
+
+
+def _rows(totals: dict, energy, ghg, balance, penalty, covered_t, eua_price: float, fx: float):
+    n = len(totals["names"])
+    fuel_t = totals["qty"][:n].sum(axis=1)
+    fuel_cost_usd = totals["cost_usd"][:n].sum(axis=1)
+    for i, vessel in enumerate(totals["names"]):
+        yield {
+            "vessel": vessel,
+            "fuel_t": fuel_t[i],
+            "energy_mj": energy[i],
+            "ghg_intensity": ghg[i],
+            "compliance_balance_t": balance[i],
+            "penalty_eur": penalty[i],
+            "ets_covered_t": covered_t[i],
+            "ets_cost_eur": covered_t[i] * eua_price,
+            "fuel_cost_eur": fuel_cost_usd[i] * fx,
+        }
+
+
+def _carry_last(totals: dict, vessel) -> tuple:
+    """Split `totals` into (complete vessels, totals holding only `vessel`) for grouped input."""
+    n = len(totals["names"])
+    i = totals["index"][vessel]
+    keep = np.arange(n) != i
+    done = {"names": [name for j, name in enumerate(totals["names"]) if j != i]}
+    carried = new_totals(totals["qty"].shape[1])
+    carried["index"][vessel] = 0
+    carried["names"].append(vessel)
+    for key in ("qty", "qty_covered", "cost_usd"):
+        done[key] = totals[key][:n][keep]
+        carried[key][0] = totals[key][i]
+    return done, carried
+
+
+# === DRIVER ===
+def run(path: str, out_path=None, year: int = 2025, gwp_choice: str = "AR4", ops: float = 0, wind: float = 1.00,
+        eua_price: float = 0.0, fx: float = 1.0, phase_in_pct=None, custom_fuels=None, columns=None,
+        chunksize: int = 200_000, grouped: bool = False, xlsx_path=None, progress=None, workers: int = 1,
+        mp_context=None) -> dict:
+    """Stream `path` into per-vessel results at `out_path` (CSV) and/or `xlsx_path` (workbook); returns run statistics.
+
+    `progress(rows_read)` is called after every chunk. With `workers` > 1 the
+    CSV results are evaluated by evaluate_parallel() on one process pool for
+    the whole run (`mp_context` as for fueleu.parallel.run_fleet()).
+    """
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    phase_in_pct = default_phase_in_pct(year) if phase_in_pct is None else phase_in_pct
+    fuels = FUELS + list(custom_fuels or [])
+    factors = compile_factors(fuels)
+    per_tonne = per_tonne_factors(factors, year, gwp_choice, ops, wind)
+    fuel_index = {name.casefold(): j for j, name in enumerate(factors["names"])}
+    fuel_index.update({name: j for j, name in enumerate(factors["names"])})
+
+    stats = {"rows": 0, "vessels": 0, "unknown_fuels": {}}
+    started = time.perf_counter()
+    totals = new_totals(len(fuels))
+    with ExitStack() as stack:
+        writer = None
+        if out_path:
+            out = stack.enter_context(open(out_path, "w", newline="", encoding="utf-8"))
+            writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+        workbook = None
+        if xlsx_path:
+            from .excel import close_workbook, open_workbook, write_vessels
+
+            workbook = open_workbook(xlsx_path)
+            split_mask = np.array([f.get("mode") != "Basic" for f in fuels], dtype=bool)
+        pool = None
+        if writer is not None and workers > 1:  # started once: with --sorted every chunk is a flush
+            pool = stack.enter_context(fleet_pool(
+                fleet_tables(year, gwp_choice, ops, wind, eua_price, fx, phase_in_pct, mitigation=[], fuels=fuels),
+                workers, mp_context))
+
+        def _write(done):
+            if writer is not None:
+                if workers > 1:
+                    rows = evaluate_parallel(done, fuels, year, gwp_choice, ops, wind, eua_price, phase_in_pct, fx,
+                                             workers, mp_context, pool)
+                else:
+                    rows = evaluate(done, per_tonne, year, eua_price, phase_in_pct, fx)
+                for row in rows:
+                    writer.writerow(row)
+                out.flush()
+            if workbook is not None:
+                write_vessels(workbook, done, per_tonne, factors["names"], split_mask, year, eua_price, phase_in_pct, fx)
+            stats["vessels"] += len(done["names"])
+
+        for chunk in iter_chunks(path, list(columns.values()), chunksize):
+            stats["rows"] += len(chunk)
+            accumulate(totals, chunk, fuel_index, columns, stats["unknown_fuels"])
+            if progress is not None:
+                progress(stats["rows"])
+            if grouped and totals["names"]:
+                last = str(chunk[columns["vessel"]].iloc[-1])
+                if last in totals["index"]:
+                    done, totals = _carry_last(totals, last)
+                    _write(done)
+        _write(totals)
+        if workbook is not None:
+            stats["totals"] = close_workbook(workbook)
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def parse_columns(pairs) -> dict:
+    """DEFAULT_COLUMNS overrides from --col KEY=NAME arguments."""
+    columns = {}
+    for pair in pairs or []:
+        key, _, name = pair.partition("=")
+        if key not in DEFAULT_COLUMNS or not name:
+            raise SystemExit(f"--col expects one of {', '.join(DEFAULT_COLUMNS)}=<column name>, got {pair!r}")
+        columns[key] = name
+    return columns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FuelEU / EU ETS per-vessel results from a consumption file.")
+    parser.add_argument("input", help="CSV or Parquet file, one row per (vessel, fuel, voyage) consumption")
+    parser.add_argument("-o", "--output", help="per-vessel results CSV")
+    parser.add_argument("--xlsx", help="Excel workbook with Totals, Vessels and Fuel Breakdown sheets")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--gwp", choices=sorted(GWP_VALUES), default="AR4")
+    parser.add_argument("--ops", type=float, default=0, help="OPS reward factor (%%)")
+    parser.add_argument("--wind", type=float, default=1.00, help="wind reward factor")
+    parser.add_argument("--eua-price", type=float, default=0.0, help="EUR/tCO2eq")
+    parser.add_argument("--fx", type=float, default=1.0, help="EUR per USD for fuel prices")
+    parser.add_argument("--phase-in", type=float, default=None, help="ETS phase-in (%%), default by year")
+    parser.add_argument("--custom-fuels", help="JSON list of custom fuel definitions")
+    parser.add_argument("--col", action="append", metavar="KEY=NAME",
+                        help="input column names, keys: " + ", ".join(DEFAULT_COLUMNS))
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--sorted", action="store_true",
+                        help="input is grouped by vessel: write each vessel as soon as it is complete")
+    parser.add_argument("--workers", type=int, default=1, help="processes for the per-vessel results (large fleets)")
+    args = parser.parse_args(argv)
+    if not (args.output or args.xlsx):
+        parser.error("give -o/--output and/or --xlsx")
+
+    stats = run(
+        args.input, args.output, xlsx_path=args.xlsx, year=args.year, gwp_choice=args.gwp, ops=args.ops, wind=args.wind,
+        eua_price=args.eua_price, fx=args.fx, phase_in_pct=args.phase_in,
+        custom_fuels=load_custom_fuels(args.custom_fuels) if args.custom_fuels else None,
+        columns=parse_columns(args.col), chunksize=args.chunksize, grouped=args.sorted,
+        workers=args.workers)
+
+    print(f"{stats['rows']:,} rows -> {stats['vessels']:,} vessels in {stats['seconds']:.2f}s", file=sys.stderr)
+    for name, count in sorted(stats["unknown_fuels"].items()):
+        print(f"skipped {count:,} rows with unknown fuel {name!r}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
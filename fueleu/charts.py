@@ -0,0 +1,160 @@
+"""Matplotlib figures shown in the app and embedded in the PDF report.
+
+matplotlib.pyplot is imported on the first cache miss, not at module import, so
+the app (and batch runs without charts) start without loading it.
+"""
+from collections import OrderedDict
+import io
+import threading
+
+import numpy as np
+
+from .engine import BASE_TARGET, REDUCTIONS, target_intensity
+
+
+def _sector_target_for_plot(y: int) -> float:
+    # FuelEU applies from 2025; show baseline (no reduction) for 2024
+    return BASE_TARGET if y < 2025 else BASE_TARGET * (1 - REDUCTIONS[y])
+
+
+def _ets_phase(y: int) -> int:
+    if y <= 2023:
+        return 0
+    if y == 2024:
+        return 40
+    if y == 2025:
+        return 70
+    return 100 # 2026+
+
+
+# === COMPLIANCE CHART ===
+def build_target_figure(computed_ghg: float, year: int):
+    """Line chart of the sector target path with the blend's GHG intensity overlaid.
+
+    Pass ``computed_ghg=None`` for the bare target path (shared across bulk reports).
+    """
+    years = sorted(set([2025] + list(REDUCTIONS.keys())))
+    targets = [_sector_target_for_plot(y) for y in years]
+
+    import matplotlib.pyplot as plt  # deferred: ~0.7 s on a cold start
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(years, targets, linestyle='--', marker='o', label='EU Target')
+    for x, yv in zip(years, targets):
+        ax.annotate(f"{yv:.2f}", (x, yv), textcoords="offset points", xytext=(0,5), ha='center', fontsize=8)
+    if computed_ghg is not None:
+        line_color = 'red' if computed_ghg > target_intensity(year) else 'green'
+        ax.axhline(computed_ghg, color=line_color, linestyle='-', label='Your GHG Intensity')
+        ax.annotate(f"{computed_ghg:.2f}", xy=(max(years), computed_ghg), xytext=(0, -10), textcoords="offset points", ha="center", va="top", fontsize=10)
+    ax.set_xlabel(None)
+    ax.set_ylabel("gCO2eq/MJ")
+    ax.set_title("Your Performance vs Sector Target")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+# === REGULATORY DYNAMICS (STACKED COLUMNS) ===
+def build_dynamics_figure(effective_coverage_pct: float):
+    """Stacked columns of ETS coverage vs FuelEU required reduction across milestone years."""
+    # Milestone years for display (include ETS start & FuelEU targets)
+    years_dyn = sorted(set([2025, 2026] + list(REDUCTIONS.keys())))
+
+    # FuelEU: reduction vs baseline as % and remaining intensity %
+    fueleu_reduction_pct = [max(0.0, min(100.0, (BASE_TARGET - target_intensity(y)) / BASE_TARGET * 100.0)) for y in years_dyn]
+    fueleu_remaining_pct = [100.0 - r for r in fueleu_reduction_pct]
+
+    # ETS: effective coverage path = coverage * phase-in (policy schedule)
+    ets_effective_pct = [float(effective_coverage_pct) * _ets_phase(y) / 100.0 for y in years_dyn]
+    ets_uncovered_pct = [max(0.0, 100.0 - c) for c in ets_effective_pct]
+
+    x = np.arange(len(years_dyn))
+    width = 0.38
+
+    import matplotlib.pyplot as plt
+    fig_dyn, ax_dyn = plt.subplots(figsize=(10, 4))
+
+    # ETS stacked (covered vs uncovered)
+    ax_dyn.bar(x - width/2, ets_effective_pct, width, label='ETS covered (%)')
+    ax_dyn.bar(x - width/2, ets_uncovered_pct, width, bottom=ets_effective_pct, label='ETS not covered (%)')
+
+    # FuelEU stacked (required reduction vs remaining intensity)
+    ax_dyn.bar(x + width/2, fueleu_reduction_pct, width, label='FuelEU required reduction (%)')
+    ax_dyn.bar(x + width/2, fueleu_remaining_pct, width, bottom=fueleu_reduction_pct, label='Remaining intensity (%)')
+
+    ax_dyn.set_xticks(x)
+    ax_dyn.set_xticklabels([str(y) for y in years_dyn])
+    ax_dyn.set_ylabel('%')
+    ax_dyn.set_title('EU ETS coverage vs FuelEU sector target path')
+    ax_dyn.legend(ncol=2, loc='upper center')
+    ax_dyn.grid(axis='y', linestyle='--', alpha=0.5)
+
+    # Marker: non-CO₂ enters ETS from 2026
+    if 2026 in years_dyn:
+        idx_2026 = years_dyn.index(2026)
+        ax_dyn.axvline(idx_2026, linestyle=':', linewidth=1)
+        ylim = ax_dyn.get_ylim()
+        ax_dyn.text(idx_2026 + 0.03, ylim[1]*0.95, 'ETS adds CH₄+N₂O from 2026', rotation=90, va='top')
+
+    return fig_dyn
+
+
+# === RENDER CACHE ===
+CHART_DPI = 200  # matches st.pyplot's own savefig and the PDF export
+CHART_CACHE_MAX_BYTES = 32 * 1024 * 1024  # rendered bytes kept across reruns
+
+CHART_BUILDERS = {
+    "target": build_target_figure,
+    "dynamics": build_dynamics_figure,
+}
+
+_CHART_CACHE = OrderedDict()  # (kind, args, fmt, dpi) -> (bytes, (w_in, h_in))
+_CHART_CACHE_LOCK = threading.Lock()
+_CHART_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def render_chart(kind: str, *args, fmt: str = "png", dpi: int = CHART_DPI):
+    """Return (image_bytes, (width_in, height_in)) for a chart, rendering it only on a cache miss.
+
+    `kind` is a CHART_BUILDERS key and `args` the builder's inputs (computed GHG
+    intensity and year for "target", effective ETS coverage for "dynamics"),
+    which together with format and dpi form the cache key. Least-recently-used
+    entries are evicted once the cached bytes exceed CHART_CACHE_MAX_BYTES.
+    """
+    key = (kind, args, fmt, dpi)
+    with _CHART_CACHE_LOCK:
+        if key in _CHART_CACHE:
+            _CHART_CACHE.move_to_end(key)
+            _CHART_STATS["hits"] += 1
+            return _CHART_CACHE[key]
+
+    fig = CHART_BUILDERS[kind](*args)
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches="tight")
+        entry = (buf.getvalue(), tuple(float(v) for v in fig.get_size_inches()))
+    finally:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+
+    with _CHART_CACHE_LOCK:
+        _CHART_STATS["misses"] += 1
+        if key not in _CHART_CACHE:
+            _CHART_CACHE[key] = entry
+            _CHART_STATS["bytes"] += len(entry[0])
+        while _CHART_STATS["bytes"] > CHART_CACHE_MAX_BYTES and len(_CHART_CACHE) > 1:
+            _, (data, _size) = _CHART_CACHE.popitem(last=False)
+            _CHART_STATS["bytes"] -= len(data)
+            _CHART_STATS["evictions"] += 1
+    return entry
+
+
+def chart_cache_info() -> dict:
+    """Hit/miss/eviction counters plus current entry count and cached bytes."""
+    with _CHART_CACHE_LOCK:
+        return dict(_CHART_STATS, entries=len(_CHART_CACHE), max_bytes=CHART_CACHE_MAX_BYTES)
+
+
+def clear_chart_cache():
+    with _CHART_CACHE_LOCK:
+        _CHART_CACHE.clear()
+        _CHART_STATS.update(hits=0, misses=0, evictions=0, bytes=0)
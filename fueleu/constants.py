@@ -0,0 +1,13 @@
+"""Regulatory constants shared by the calculation modules."""
+
+# === CONSTANTS & CONFIGURATION ===
+BASE_TARGET = 91.16
+REDUCTIONS = {2025: 0.02, 2030: 0.06, 2035: 0.145, 2040: 0.31, 2045: 0.62, 2050: 0.80}
+PENALTY_RATE = 2400  # EUR per tonne of VLSFO-equivalent energy shortfall
+VLSFO_ENERGY_CONTENT = 41_000  # MJ/t
+REWARD_FACTOR_RFNBO_MULTIPLIER = 2
+RFNBO_REWARD_UNTIL = 2033  # RFNBO energy counts x2 up to and including this year
+ETS_NONCO2_FROM = 2026  # ETS covers CH4 + N2O + slip from this year on
+GWP_VALUES = {
+    "AR4": {"CH4": 25, "N2O": 298},
+    "AR5": {"CH4": 29.8, "N2O": 273},}
@@ -0,0 +1,141 @@
+"""Differential check: the float64 backend of compute_blend() against the Decimal reference.
+
+Both backends run on the same randomized blends (stock fuels, Basic and
+Advanced custom fuels, RFNBOs, every year, GWP, OPS / wind reward and ETS
+setting). The maximum deviation is reported per headline figure, against the
+bounds stated in fueleu.fleet: FLEET_RTOL relative for intensity and ETS cost;
+for the compliance balance, a difference of nearly equal terms,
+FLEET_RTOL * energy * target / 1e6 tCO2eq absolute; the penalty inherits that
+bound through its rate. Exit code 1 when any bound is exceeded.
+
+    python -m fueleu.diffcheck --samples 5000 --seed 0 [--json diffcheck.json]
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from .constants import GWP_VALUES, PENALTY_RATE, VLSFO_ENERGY_CONTENT
+from .engine import compute_blend
+from .fleet import FLEET_RTOL
+from .fuels import FUELS
+
+DIFF_FIELDS = ("ghg_intensity", "compliance_balance", "penalty", "ets_cost", "total_cost")
+DIFF_YEARS = (2025, 2026, 2029, 2030, 2033, 2034, 2035, 2040, 2045, 2050)
+
+
+# === RANDOM BLENDS ===
+def random_inputs(rng, max_fuels: int = 12, max_custom: int = 3) -> dict:
+    """A random compute_blend() input: 1..max_fuels stock fuels (log-uniform tonnage) plus custom fuels."""
+    picked = rng.choice(len(FUELS), size=int(rng.integers(1, max_fuels + 1)), replace=False)
+    tonnes = np.where(rng.random(len(picked)) < 0.1, 0.0, 10 ** rng.uniform(-1, 5, len(picked)))
+    custom_fuels = []
+    for k in range(int(rng.integers(0, max_custom + 1))):
+        custom_fuels.append({
+            "name": f"Custom {k}",
+            "mode": "Basic" if rng.random() < 0.5 else "Advanced",
+            "qty_t": float(round(10 ** rng.uniform(-1, 4), 3)),
+            "price_usd": float(round(rng.uniform(0, 2500), 2)),
+            "lcv": float(round(rng.uniform(0.018, 0.12), 4)),
+            "rfnbo": bool(rng.random() < 0.3),
+            "wtw": float(round(rng.uniform(0, 120), 2)),
+            "wtt": float(round(rng.uniform(-80, 40), 2)),
+            "ttw_co2": float(round(rng.uniform(0, 3.3), 3)),
+            "ttw_ch4": float(round(rng.uniform(0, 0.01), 5)),
+            "ttw_n2o": float(round(rng.uniform(0, 0.001), 6)),
+            "ch4_slip": float(round(rng.uniform(0, 6), 2)),
+        })
+    return {
+        "fuel_inputs": {FUELS[i]["name"]: float(t) for i, t in zip(picked, tonnes)},
+        "fuel_price_inputs": {FUELS[i]["name"]: float(round(rng.uniform(0, 2000), 2)) for i in picked},
+        "custom_fuels": custom_fuels,
+        "year": int(rng.choice(DIFF_YEARS)),
+        "gwp_choice": str(rng.choice(list(GWP_VALUES))),
+        "ops": int(rng.integers(0, 4)),
+        "wind": float(rng.choice([1.00, 0.99, 0.97, 0.95])),
+        "exchange_rate": float(round(rng.uniform(0.8, 1.2), 4)),
+        "eua_price": float(round(rng.uniform(0, 150), 2)),
+        "effective_coverage_pct": float(rng.choice([50.0, 75.0, 100.0])),
+        "phase_in_pct": int(rng.choice([40, 70, 100])),
+    }
+
+
+# === COMPARISON ===
+def _bound(field: str, reference: dict) -> float:
+    """Allowed |float - Decimal| for `field` of one blend."""
+    balance_bound = FLEET_RTOL * float(reference["total_energy"]) * reference["target"] / 1_000_000.0
+    if field == "compliance_balance":
+        return balance_bound
+    if field == "penalty":
+        ghg = reference["ghg_intensity"]
+        rate = PENALTY_RATE * 1_000_000 / (ghg * VLSFO_ENERGY_CONTENT) if ghg > 0 else 0.0
+        return FLEET_RTOL * abs(reference["penalty"]) + 2 * balance_bound * rate
+    return FLEET_RTOL * max(abs(reference[field]), 1.0)
+
+
+def run_diffcheck(samples: int = 2000, seed: int = 0) -> dict:
+    """Run both backends on `samples` random blends; returns per-field maximum deviations and timings."""
+    rng = np.random.default_rng(seed)
+    worst = {field: {"max_abs": 0.0, "max_rel": 0.0, "max_bound_ratio": 0.0, "violations": 0} for field in DIFF_FIELDS}
+    rows_mismatched = 0
+    elapsed = {"decimal": 0.0, "float": 0.0}
+    for _ in range(samples):
+        inputs = random_inputs(rng)
+        started = time.perf_counter()
+        reference = compute_blend(inputs, backend="decimal")
+        elapsed["decimal"] += time.perf_counter() - started
+        started = time.perf_counter()
+        fast = compute_blend(inputs, backend="float")
+        elapsed["float"] += time.perf_counter() - started
+
+        if [r["Fuel"] for r in fast["rows"]] != [r["Fuel"] for r in reference["rows"]]:
+            rows_mismatched += 1
+        for field in DIFF_FIELDS:
+            deviation = abs(fast[field] - reference[field])
+            bound = _bound(field, reference)
+            stats = worst[field]
+            stats["max_abs"] = max(stats["max_abs"], deviation)
+            stats["max_rel"] = max(stats["max_rel"], deviation / abs(reference[field]) if reference[field] else 0.0)
+            stats["max_bound_ratio"] = max(stats["max_bound_ratio"], deviation / bound if bound > 0 else float(deviation > 0))
+            stats["violations"] += int(deviation > bound)
+    return {
+        "samples": samples,
+        "seed": seed,
+        "rtol": FLEET_RTOL,
+        "fields": worst,
+        "rows_mismatched": rows_mismatched,
+        "decimal_ms_per_blend": elapsed["decimal"] * 1000 / max(samples, 1),
+        "float_ms_per_blend": elapsed["float"] * 1000 / max(samples, 1),
+        "ok": rows_mismatched == 0 and not any(stats["violations"] for stats in worst.values()),
+    }
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the float64 and Decimal compute_blend() backends on random blends.")
+    parser.add_argument("--samples", type=int, default=2000, help="random blends to evaluate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report as JSON to this path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    report = run_diffcheck(args.samples, args.seed)
+    print(f"{'field':<20}{'max abs dev':>14}{'max rel dev':>14}{'dev / bound':>14}{'violations':>12}", file=sys.stderr)
+    for field, stats in report["fields"].items():
+        print(f"{field:<20}{stats['max_abs']:>14.3e}{stats['max_rel']:>14.3e}{stats['max_bound_ratio']:>14.3e}"
+              f"{stats['violations']:>12,}", file=sys.stderr)
+    print(f"{report['samples']:,} blends: Decimal {report['decimal_ms_per_blend']:.3f} ms, float64 "
+          f"{report['float_ms_per_blend']:.3f} ms per blend; {'OK' if report['ok'] else 'BOUND EXCEEDED'}", file=sys.stderr)
+    if args.json:
+        text = json.dumps(report, indent=2)
+        if args.json == "-":
+            print(text)
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""Headless FuelEU Maritime / EU ETS calculation core.
+
+Everything here is plain Python (Decimal arithmetic, no Streamlit) so the same
+numbers the app shows can be produced from batch jobs and scripts. The float64
+backend of compute_blend() (backend="float") lives in fleet.py.
+"""
+from decimal import Decimal, getcontext
+import os
+
+from .constants import (
+    BASE_TARGET,
+    ETS_NONCO2_FROM,
+    GWP_VALUES,
+    PENALTY_RATE,
+    REDUCTIONS,
+    REWARD_FACTOR_RFNBO_MULTIPLIER,
+    RFNBO_REWARD_UNTIL,
+    VLSFO_ENERGY_CONTENT,
+)
+from .factors import decimal_factors, derived_factors
+
+# compute_blend() backends: exact 28-digit Decimal (reference, audit reports) or
+# float64 over the per-tonne factor matrix (fast; interactive and fleet use)
+BACKENDS = ("decimal", "float")
+DEFAULT_BACKEND = os.environ.get("FUELEU_BACKEND") or "decimal"
+
+# Inputs accepted by compute_blend(); missing keys fall back to these.
+DEFAULT_BLEND_INPUTS = {
+    "fuel_inputs": {},              # fuel name -> quantity (t)
+    "fuel_price_inputs": {},        # fuel name -> price (USD/t)
+    "custom_fuels": [],             # list of custom fuel dicts (see app.DEFAULT_CF)
+    "year": 2025,
+    "gwp_choice": "AR4",
+    "ops": 0,                       # OPS reward factor (%)
+    "wind": 1.00,                   # wind reward factor
+    "exchange_rate": 1.0,           # EUR per USD
+    "eua_price": 0.0,               # EUR/tCO2eq
+    "effective_coverage_pct": 100.0,
+    "phase_in_pct": 70,
+}
+
+
+# === HELPERS ===
+def target_intensity(year: int) -> float:
+    if year <= 2020:
+        return BASE_TARGET
+    if year <= 2029:
+        return BASE_TARGET * (1 - REDUCTIONS[2025])
+    if year <= 2034:
+        return BASE_TARGET * (1 - REDUCTIONS[2030])
+    if year <= 2039:
+        return BASE_TARGET * (1 - REDUCTIONS[2035])
+    if year <= 2044:
+        return BASE_TARGET * (1 - REDUCTIONS[2040])
+    if year <= 2049:
+        return BASE_TARGET * (1 - REDUCTIONS[2045])
+    return BASE_TARGET * (1 - REDUCTIONS[2050])
+
+
+def default_phase_in_pct(year: int) -> int:
+    # EU ETS maritime phase-in: 2024:40%, 2025:70%, 2026+:100%. Years before ETS -> 0 by default
+    if year <= 2024:
+        return 0
+    if year == 2025:
+        return 70
+    return 100
+
+
+def compute_ets_cost(ttw_co2_g: Decimal, ttw_nonco2_g: Decimal, price_eur_per_t: float,
+                      effective_coverage_pct: float, phase_in_pct: float, include_nonco2: bool):
+    """Return (cost_eur, covered_tonnes). ETS is TtW-only. CH4+N2O+slip included from 2026+ if include_nonco2 is True."""
+    ttw_for_ets = ttw_co2_g + (ttw_nonco2_g if include_nonco2 else Decimal("0"))
+    covered_g = ttw_for_ets * Decimal(str(effective_coverage_pct / 100.0)) * Decimal(str(phase_in_pct / 100.0))
+    covered_tonnes = float(covered_g / Decimal("1000000"))
+    return covered_tonnes * float(price_eur_per_t), covered_tonnes
+
+
+def _with_defaults(inputs: dict) -> dict:
+    merged = dict(DEFAULT_BLEND_INPUTS)
+    merged.update(inputs or {})
+    return merged
+
+
+# === BLEND CALCULATION ===
+_SUM_KEYS = ("total_energy", "wtt_sum", "ttw_co2_sum", "ttw_nonco2_sum", "emissions")
+INCREMENTAL_RESYNC_EDITS = 1000  # update_blend() re-sums its totals after this many edits (bounds rounding drift)
+
+
+def _fuel_contribution(table: dict, name: str, quantity, price, exchange_rate):
+    """One stock fuel row: its additions to the blend sums and its "Fuel Breakdown" row (None when qty <= 0)."""
+    qty = Decimal(str(quantity))  # tonnes
+    if qty <= 0:
+        return None
+    factors = decimal_factors(table, name)
+    mass_g = qty * Decimal("1000000")  # g
+    energy = mass_g * factors["lcv"]  # MJ
+    if factors["energy_multiplier"] is not None:
+        energy *= factors["energy_multiplier"]
+
+    # Per-gram TTW factors
+    co2_per_g = factors["co2_per_g"]
+    ch4_per_g = factors["ch4_per_g"]
+    n2o_per_g = factors["n2o_per_g"]
+    # Slip (g CH4 / MJ) * GWP * energy (MJ)
+    slip_total = factors["slip_per_mj"] * energy
+
+    # Components
+    ttw_co2 = co2_per_g * mass_g
+    ttw_nonco2 = (ch4_per_g + n2o_per_g) * mass_g + slip_total
+    wtt_total = energy * factors["wtt"]
+
+    ttw_total = ttw_co2 + ttw_nonco2
+    total_emissions = ttw_total + wtt_total
+
+    ghg_intensity_mj = (total_emissions / energy) if energy > 0 else Decimal("0")
+
+    price_usd = Decimal(str(price))
+    price_eur = price_usd * Decimal(str(exchange_rate))
+    cost = qty * price_eur
+
+    return {
+        "total_energy": energy,
+        "wtt_sum": wtt_total,
+        "ttw_co2_sum": ttw_co2,
+        "ttw_nonco2_sum": ttw_nonco2,
+        "emissions": total_emissions,
+        "row": {
+            "Fuel": name,
+            "Quantity (t)": float(qty),
+            "Price per Tonne (USD)": float(price_usd),
+            "Cost (Eur)": float(cost),
+            "TTW CO2 (g)": float(ttw_co2),
+            "TTW non-CO2 (g)": float(ttw_nonco2),
+            "WtT (g)": float(wtt_total),
+            "Emissions (gCO2eq)": float(total_emissions),  # WtW
+            "Energy (MJ)": float(energy),
+            "GHG Intensity (gCO2eq/MJ)": float(ghg_intensity_mj),},
+    }
+
+
+def _custom_contribution(cf: dict, year: int, ops, wind, gwp: dict, exchange_rate):
+    """One custom fuel (Basic: WtW-only, Advanced: full split); None when qty <= 0."""
+    qty_t = Decimal(str(cf.get("qty_t", 0.0)))
+    if qty_t <= 0:
+        return None
+
+    mass_g = qty_t * Decimal("1000000")
+    lcv = Decimal(str(cf.get("lcv", 0.0)))
+    energy = mass_g * lcv
+
+    if cf.get("rfnbo") and year <= RFNBO_REWARD_UNTIL:
+        energy *= Decimal(str(REWARD_FACTOR_RFNBO_MULTIPLIER))
+
+    price_eur = Decimal(str(cf.get("price_usd", 0.0))) * Decimal(str(exchange_rate))
+    cost_eur = qty_t * price_eur
+
+    if cf.get("mode") == "Basic":
+        # WtW-only; excluded from ETS splits
+        wtw = Decimal(str(cf.get("wtw", 0.0)))  # gCO2e/MJ
+        total_emissions_cf = energy * wtw
+
+        ghg_intensity_mj_cf = (total_emissions_cf / energy) if energy > 0 else Decimal("0")
+
+        return {
+            "total_energy": energy,
+            "wtt_sum": Decimal("0"),
+            "ttw_co2_sum": Decimal("0"),
+            "ttw_nonco2_sum": Decimal("0"),
+            "emissions": total_emissions_cf,
+            "row": {
+                "Fuel": f"{cf.get('name','Custom fuel')} (custom, WtW-only)",
+                "Quantity (t)": float(qty_t),
+                "Price per Tonne (USD)": float(Decimal(str(cf.get("price_usd", 0.0)))),
+                "Cost (Eur)": float(cost_eur),
+                "TTW CO2 (g)": float("nan"),
+                "TTW non-CO2 (g)": float("nan"),
+                "WtT (g)": float("nan"),
+                "Emissions (gCO2eq)": float(total_emissions_cf),
+                "Energy (MJ)": float(energy),
+                "GHG Intensity (gCO2eq/MJ)": float(ghg_intensity_mj_cf),},
+        }
+
+    # Advanced: contributes to ETS, WtT/TtW
+    co2_per_g = Decimal(str(cf.get("ttw_co2", 0.0))) * Decimal(str(1 - ops / 100)) * Decimal(str(wind))
+    ch4_per_g = Decimal(str(cf.get("ttw_ch4", 0.0))) * Decimal(str(gwp["CH4"]))
+    n2o_per_g = Decimal(str(cf.get("ttw_n2o", 0.0))) * Decimal(str(gwp["N2O"]))
+    slip_total = Decimal(str(cf.get("ch4_slip", 0.0))) * Decimal(str(gwp["CH4"])) * energy
+
+    ttw_co2_cf = co2_per_g * mass_g
+    ttw_nonco2_cf = (ch4_per_g + n2o_per_g) * mass_g + slip_total
+    wtt_total_cf = energy * Decimal(str(cf.get("wtt", 0.0)))
+
+    total_emissions_cf = ttw_co2_cf + ttw_nonco2_cf + wtt_total_cf
+
+    ghg_intensity_mj_cf = (total_emissions_cf / energy) if energy > 0 else Decimal("0")
+
+    return {
+        "total_energy": energy,
+        "wtt_sum": wtt_total_cf,
+        "ttw_co2_sum": ttw_co2_cf,
+        "ttw_nonco2_sum": ttw_nonco2_cf,
+        "emissions": total_emissions_cf,
+        "row": {
+            "Fuel": f"{cf.get('name','Custom fuel')} (custom)",
+            "Quantity (t)": float(qty_t),
+            "Price per Tonne (USD)": float(Decimal(str(cf.get("price_usd", 0.0)))),
+            "Cost (Eur)": float(cost_eur),
+            "TTW CO2 (g)": float(ttw_co2_cf),
+            "TTW non-CO2 (g)": float(ttw_nonco2_cf),
+            "WtT (g)": float(wtt_total_cf),
+            "Emissions (gCO2eq)": float(total_emissions_cf),
+            "Energy (MJ)": float(energy),
+            "GHG Intensity (gCO2eq/MJ)": float(ghg_intensity_mj_cf),},
+    }
+
+
+def _blend_entries(inputs: dict, index: dict) -> dict:
+    """Entry key -> the inputs its contribution depends on, in row order (stock fuels in FUELS order, then custom)."""
+    fuel_inputs = inputs["fuel_inputs"]
+    fuel_price_inputs = inputs["fuel_price_inputs"]
+    entries = {}
+    for name in sorted((n for n in fuel_inputs if n in index), key=index.get):
+        entries[("fuel", name)] = (fuel_inputs[name], fuel_price_inputs.get(name, 0.0))
+    for i, cf in enumerate(inputs["custom_fuels"]):
+        entries[("custom", i)] = dict(cf)  # copy: the app edits custom fuel dicts in place
+    return entries
+
+
+def _entry_contribution(key: tuple, spec, inputs: dict, table: dict):
+    if key[0] == "fuel":
+        return _fuel_contribution(table, key[1], spec[0], spec[1], inputs["exchange_rate"])
+    return _custom_contribution(spec, inputs["year"], inputs["ops"], inputs["wind"], GWP_VALUES[inputs["gwp_choice"]],
+                                inputs["exchange_rate"])
+
+
+def _summarize_blend(inputs: dict, sums: dict, rows: list) -> dict:
+    year = inputs["year"]
+    total_energy = sums["total_energy"]
+    emissions = sums["emissions"]
+    include_nonco2_in_ets = (year >= ETS_NONCO2_FROM)  # CH4 + N2O + slip from 2026 and after
+
+    # Summary totals
+    emissions_tonnes = float(emissions / Decimal("1000000"))  # WtW
+    ghg_intensity = float(emissions / total_energy) if total_energy > 0 else 0.0
+
+    # ETS cost (TtW-only with 2026+ non-CO2 and coverage & phase-in)
+    ets_cost, ets_covered_tonnes = compute_ets_cost(
+        sums["ttw_co2_sum"], sums["ttw_nonco2_sum"], inputs["eua_price"], inputs["effective_coverage_pct"],
+        inputs["phase_in_pct"], include_nonco2_in_ets)
+
+    # Positive = surplus (good), Negative = deficit (bad)
+    compliance_balance = float(total_energy) * (target_intensity(year) - ghg_intensity) / 1_000_000.0  # tCO2eq
+
+    # Penalty only if there is a negative compliance balance (deficit)
+    if compliance_balance < 0:
+        penalty = (abs(compliance_balance) / (ghg_intensity * VLSFO_ENERGY_CONTENT)) * PENALTY_RATE * 1_000_000
+    else:
+        penalty = 0.0
+
+    return {
+        "rows": rows,
+        "total_energy": total_energy,
+        "wtt_sum": sums["wtt_sum"],
+        "ttw_co2_sum": sums["ttw_co2_sum"],
+        "ttw_nonco2_sum": sums["ttw_nonco2_sum"],
+        "emissions": emissions,
+        "emissions_tonnes": emissions_tonnes,
+        "ghg_intensity": ghg_intensity,
+        "target": target_intensity(year),
+        "include_nonco2_in_ets": include_nonco2_in_ets,
+        "ets_cost": ets_cost,
+        "ets_covered_tonnes": ets_covered_tonnes,
+        "compliance_balance": compliance_balance,
+        "penalty": penalty,
+        "total_cost": sum(row["Cost (Eur)"] for row in rows),
+        "user_entered_prices": any(r.get("Price per Tonne (USD)", 0) > 0 for r in rows),
+    }
+
+
+def compute_blend(inputs: dict, backend: str = None) -> dict:
+    """Compute energy, WtT/TtW splits, GHG intensity, ETS cost, balance and penalty for a fuel blend.
+
+    `inputs` follows DEFAULT_BLEND_INPUTS. Sums are returned as Decimal (grams / MJ),
+    headline figures as float, and `rows` holds the per-fuel "Fuel Breakdown" table.
+    `backend` (default DEFAULT_BACKEND, env FUELEU_BACKEND) selects "decimal" or
+    "float"; the float backend returns the sums as float as well.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "float":
+        from .fleet import compute_blend_float  # fleet imports this module
+        return compute_blend_float(inputs)
+    if backend != "decimal":
+        raise ValueError(f"unknown backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+    inputs = _with_defaults(inputs)
+    getcontext().prec = 28
+
+    table = derived_factors(inputs["gwp_choice"], inputs["ops"], inputs["wind"], inputs["year"])
+    sums = dict.fromkeys(_SUM_KEYS, Decimal("0"))
+    rows = []
+    for key, spec in _blend_entries(inputs, table["index"]).items():
+        contribution = _entry_contribution(key, spec, inputs, table)
+        if contribution is not None:
+            for k in _SUM_KEYS:
+                sums[k] += contribution[k]
+            rows.append(contribution["row"])
+    return _summarize_blend(inputs, sums, rows)
+
+
+# === INCREMENTAL BLEND ===
+def update_blend(state, inputs: dict) -> tuple:
+    """Decimal compute_blend() for interactive reruns: recompute only the fuel rows whose inputs changed.
+
+    `state` is what the previous call returned (None the first time). It keeps
+    each row's contribution; a changed, added or removed row is subtracted from
+    and/or added to the running sums, so a single edit costs one row however
+    large the blend. A different year, GWP, OPS, wind or exchange rate changes
+    every row and rebuilds the state. Returns (result, state); the sums can
+    differ from compute_blend() in the last of 28 significant digits.
+    """
+    inputs = _with_defaults(inputs)
+    getcontext().prec = 28
+
+    context = tuple(inputs[k] for k in ("year", "gwp_choice", "ops", "wind", "exchange_rate"))
+    table = derived_factors(inputs["gwp_choice"], inputs["ops"], inputs["wind"], inputs["year"])
+    entries = _blend_entries(inputs, table["index"])
+    if state is None or state["context"] != context:
+        state = {"context": context, "entries": {}, "contributions": {},
+                 "sums": dict.fromkeys(_SUM_KEYS, Decimal("0")), "edits": 0}
+
+    previous = state["entries"]
+    contributions = dict(state["contributions"])
+    sums = dict(state["sums"])
+    edits = state["edits"]
+    for key in previous.keys() - entries.keys():
+        old = contributions.pop(key)
+        if old is not None:
+            for k in _SUM_KEYS:
+                sums[k] -= old[k]
+        edits += 1
+    for key, spec in entries.items():
+        if key in previous and previous[key] == spec:
+            continue
+        old = contributions.get(key)
+        new = _entry_contribution(key, spec, inputs, table)
+        for k in _SUM_KEYS:
+            if old is not None:
+                sums[k] -= old[k]
+            if new is not None:
+                sums[k] += new[k]
+        contributions[key] = new
+        edits += 1
+
+    live = [contributions[key] for key in entries if contributions[key] is not None]
+    if edits >= INCREMENTAL_RESYNC_EDITS:
+        sums = dict.fromkeys(_SUM_KEYS, Decimal("0"))
+        for contribution in live:
+            for k in _SUM_KEYS:
+                sums[k] += contribution[k]
+        edits = 0
+    state = {"context": context, "entries": entries, "contributions": contributions, "sums": sums, "edits": edits}
+    return _summarize_blend(inputs, sums, [c["row"] for c in live]), state
@@ -0,0 +1,154 @@
+"""Streaming Excel workbook for fleet results (xlsxwriter constant-memory mode).
+
+Three sheets: "Totals" (fleet ETS and penalty totals), "Vessels" (one row per
+vessel, the fueleu.batch result fields) and "Fuel Breakdown" (one row per
+vessel and fuel, the app's Fuel Breakdown columns). Rows are flushed to disk
+as they are written, so memory does not grow with the breakdown size; number
+formats are declared once per column.
+"""
+import numpy as np
+import xlsxwriter
+
+from .batch import RESULT_FIELDS, evaluate
+
+VESSEL_HEADERS = {
+    "vessel": "Vessel",
+    "fuel_t": "Fuel (t)",
+    "energy_mj": "Energy (MJ)",
+    "ghg_intensity": "GHG Intensity (gCO2eq/MJ)",
+    "compliance_balance_t": "Compliance Balance (tCO2eq)",
+    "penalty_eur": "Penalty (Eur)",
+    "ets_covered_t": "ETS covered (tCO2eq)",
+    "ets_cost_eur": "ETS Cost (Eur)",
+    "fuel_cost_eur": "Fuel Cost (Eur)",
+}
+
+# Same columns as the app's "Fuel Breakdown" table, keyed by vessel
+BREAKDOWN_COLUMNS = [
+    "Vessel", "Fuel", "Quantity (t)", "Price per Tonne (USD)", "Cost (Eur)", "TTW CO2 (g)", "TTW non-CO2 (g)",
+    "WtT (g)", "Emissions (gCO2eq)", "Energy (MJ)", "GHG Intensity (gCO2eq/MJ)",
+]
+
+TOTAL_FIELDS = [
+    ("vessels", "Vessels", "int"),
+    ("fuel_t", "Fuel (t)", "int"),
+    ("energy_mj", "Energy (MJ)", "int"),
+    ("emissions_t", "WtW emissions (tCO2eq)", "int"),
+    ("ghg_intensity", "Fleet GHG Intensity (gCO2eq/MJ)", "intensity"),
+    ("compliance_balance_t", "Net compliance balance (tCO2eq)", "int"),
+    ("deficit_t", "Sum of vessel deficits (tCO2eq)", "int"),
+    ("vessels_in_deficit", "Vessels in deficit", "int"),
+    ("penalty_eur", "Penalty (Eur)", "money"),
+    ("ets_covered_t", "ETS covered (tCO2eq)", "int"),
+    ("ets_cost_eur", "ETS Cost (Eur)", "money"),
+    ("fuel_cost_eur", "Fuel Cost (Eur)", "money"),
+]
+
+NUMBER_FORMATS = {
+    "text": None,
+    "int": "#,##0",
+    "money": "#,##0.00",
+    "intensity": "0.00",
+    "qty": "#,##0.000",
+}
+VESSEL_KINDS = ["text", "qty", "int", "intensity", "int", "money", "int", "money", "money"]
+BREAKDOWN_KINDS = ["text", "text", "qty", "money", "money", "int", "int", "int", "int", "int", "intensity"]
+
+BREAKDOWN_BLOCK = 10_000  # vessels expanded to per-fuel rows at a time
+
+
+# === WORKBOOK ===
+def open_workbook(path: str) -> dict:
+    """Create the constant-memory workbook, its formats and headers; returns the writer state."""
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    formats = {kind: workbook.add_format({"num_format": fmt}) if fmt else None for kind, fmt in NUMBER_FORMATS.items()}
+    header = workbook.add_format({"bold": True, "bottom": 1, "text_wrap": True, "valign": "top"})
+
+    def _sheet(name, headers, kinds, widths):
+        sheet = workbook.add_worksheet(name)
+        for col, (kind, width) in enumerate(zip(kinds, widths)):
+            sheet.set_column(col, col, width, formats[kind])
+        sheet.write_row(0, 0, headers, header)
+        sheet.freeze_panes(1, 0)
+        return sheet
+
+    totals = workbook.add_worksheet("Totals")
+    totals.set_column(0, 0, 34)
+    totals.set_column(1, 1, 22)
+    vessels = _sheet("Vessels", [VESSEL_HEADERS[f] for f in RESULT_FIELDS], VESSEL_KINDS, [18] + [16] * 8)
+    breakdown = _sheet("Fuel Breakdown", BREAKDOWN_COLUMNS, BREAKDOWN_KINDS, [18, 40] + [16] * 9)
+    return {
+        "workbook": workbook,
+        "formats": formats,
+        "header": header,
+        "sheets": {"totals": totals, "vessels": vessels, "breakdown": breakdown},
+        "rows": {"vessels": 1, "breakdown": 1},
+        "totals": {key: 0.0 for key, _, _ in TOTAL_FIELDS},
+    }
+
+
+def write_vessels(state: dict, totals: dict, per_tonne: np.ndarray, fuel_names: list, split_mask: np.ndarray,
+                  year: int, eua_price: float, phase_in_pct: float, fx: float):
+    """Append the vessels held in fueleu.batch `totals` to the Vessels and Fuel Breakdown sheets.
+
+    `split_mask` is False for WtW-only (Basic custom) fuels, whose TtW/WtT cells are left blank.
+    """
+    n = len(totals["names"])
+    if not n:
+        return
+    sheets, rows, acc = state["sheets"], state["rows"], state["totals"]
+
+    vessel_sheet = sheets["vessels"]
+    for result in evaluate(totals, per_tonne, year, eua_price, phase_in_pct, fx):
+        vessel_sheet.write_row(rows["vessels"], 0, [result[f] for f in RESULT_FIELDS])
+        rows["vessels"] += 1
+        acc["vessels"] += 1
+        for key in ("fuel_t", "energy_mj", "compliance_balance_t", "penalty_eur", "ets_covered_t",
+                    "ets_cost_eur", "fuel_cost_eur"):
+            acc[key] += result[key]
+        acc["emissions_t"] += result["ghg_intensity"] * result["energy_mj"] / 1_000_000.0
+        if result["compliance_balance_t"] < 0:
+            acc["deficit_t"] += -result["compliance_balance_t"]
+            acc["vessels_in_deficit"] += 1
+
+    breakdown_sheet = sheets["breakdown"]
+    for start in range(0, n, BREAKDOWN_BLOCK):
+        stop = min(start + BREAKDOWN_BLOCK, n)
+        vi, fj = np.nonzero(totals["qty"][start:stop])  # row-major: grouped by vessel, fuels in registry order
+        qty = totals["qty"][start:stop][vi, fj]
+        cost_usd = totals["cost_usd"][start:stop][vi, fj]
+        energy, wtt, co2, nonco2, wtw_only = (qty[:, None] * per_tonne[fj]).T
+        emissions = wtt + co2 + nonco2 + wtw_only
+        split = split_mask[fj]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price_usd = np.where(qty > 0, cost_usd / qty, 0.0)
+            ghg = np.where(energy > 0, emissions / energy, 0.0)
+        co2, nonco2, wtt = (np.where(split, v, np.nan) for v in (co2, nonco2, wtt))
+
+        # Typed writes on plain Python values: write_row() re-inspects every cell
+        write_string, write_number = breakdown_sheet.write_string, breakdown_sheet.write_number
+        names = totals["names"]
+        row = rows["breakdown"]
+        numbers = zip(qty.tolist(), price_usd.tolist(), (cost_usd * fx).tolist(), co2.tolist(), nonco2.tolist(),
+                      wtt.tolist(), emissions.tolist(), energy.tolist(), ghg.tolist())
+        for v, f, values in zip((vi + start).tolist(), fj.tolist(), numbers):
+            write_string(row, 0, str(names[v]))
+            write_string(row, 1, fuel_names[f])
+            for col, value in enumerate(values, start=2):
+                if value == value:  # NaN (no TtW/WtT split) stays blank
+                    write_number(row, col, value)
+            row += 1
+        rows["breakdown"] = row
+
+
+def close_workbook(state: dict) -> dict:
+    """Write the fleet totals sheet, close the workbook and return the totals."""
+    acc = state["totals"]
+    acc["ghg_intensity"] = acc["emissions_t"] * 1_000_000.0 / acc["energy_mj"] if acc["energy_mj"] else 0.0
+    sheet = state["sheets"]["totals"]
+    sheet.write_row(0, 0, ["Total", "Value"], state["header"])
+    for row, (key, label, kind) in enumerate(TOTAL_FIELDS, start=1):
+        sheet.write_string(row, 0, label)
+        sheet.write_number(row, 1, acc[key], state["formats"][kind])
+    state["workbook"].close()
+    return acc
@@ -0,0 +1,106 @@
+"""Fuel factor tables: dense arrays compiled from fuel dicts, and the memoized
+per-scenario derived factors shared by the blend calculation and the solvers."""
+from decimal import Decimal
+from functools import lru_cache
+
+import numpy as np
+
+from .constants import GWP_VALUES, REWARD_FACTOR_RFNBO_MULTIPLIER, RFNBO_REWARD_UNTIL
+from .fuels import FUEL_INDEX, FUELS, get_fuel
+
+FACTOR_CACHE_SIZE = 128  # (gwp_choice, ops, wind, year) combinations kept
+
+
+# === FACTOR COMPILATION ===
+def compile_factors(fuels=None) -> dict:
+    """Compile fuel dicts into dense per-fuel factor arrays (one entry per fuel, in order).
+
+    Accepts FUELS entries and custom fuel dicts (``ttw_n2o`` spelling, ``mode``).
+    Basic-mode custom fuels only carry a WtW intensity (``wtw_only``).
+    """
+    fuels = FUELS if fuels is None else fuels
+    basic = np.array([f.get("mode") == "Basic" for f in fuels], dtype=bool)
+
+    def _col(key, alt=None):
+        return np.array([float(f.get(key, f.get(alt, 0.0) if alt else 0.0) or 0.0) for f in fuels], dtype=np.float64)
+
+    def _split(values):
+        return np.where(basic, 0.0, values)
+
+    return {
+        "names": [f.get("name", "Custom fuel") for f in fuels],  # custom fuels may omit it, as in compute_blend()
+        "lcv": _col("lcv"),
+        "wtt": _split(_col("wtt")),
+        "ttw_co2": _split(_col("ttw_co2")),
+        "ttw_ch4": _split(_col("ttw_ch4")),
+        "ttw_n2o": _split(_col("ttw_n2O", "ttw_n2o")),
+        "ch4_slip": _split(_col("ch4_slip")),
+        "wtw_only": np.where(basic, _col("wtw"), 0.0),
+        "rfnbo": np.array([bool(f.get("rfnbo", False)) for f in fuels], dtype=bool),
+    }
+
+
+def per_tonne_factors(factors: dict, year: int, gwp_choice: str = "AR4", ops: float = 0, wind: float = 1.00) -> np.ndarray:
+    """Return a (n_fuels, 5) matrix of per-tonne energy (MJ), WtT, TtW CO2, TtW non-CO2 and WtW-only (g)."""
+    gwp = GWP_VALUES[gwp_choice]
+    mass_g = 1_000_000.0
+    multiplier = np.where(factors["rfnbo"] & (year <= RFNBO_REWARD_UNTIL), float(REWARD_FACTOR_RFNBO_MULTIPLIER), 1.0)
+    energy = mass_g * factors["lcv"] * multiplier
+    co2 = mass_g * factors["ttw_co2"] * (1 - ops / 100) * wind
+    nonco2 = (mass_g * (factors["ttw_ch4"] * gwp["CH4"] + factors["ttw_n2o"] * gwp["N2O"])
+              + factors["ch4_slip"] * gwp["CH4"] * energy)
+    wtt = energy * factors["wtt"]
+    wtw_only = energy * factors["wtw_only"]
+    return np.column_stack([energy, wtt, co2, nonco2, wtw_only])
+
+
+# === DERIVED FACTOR CACHE ===
+@lru_cache(maxsize=1)
+def _stock_factors() -> dict:
+    # FUELS is fixed for the process; compile it once for every scenario key
+    return compile_factors(FUELS)
+
+
+@lru_cache(maxsize=FACTOR_CACHE_SIZE)
+def derived_factors(gwp_choice: str, ops: float, wind: float, year: int) -> dict:
+    """Per-fuel factors for FUELS after applying GWP, OPS/wind rewards and the RFNBO multiplier.
+
+    Built once per (gwp_choice, ops, wind, year) and evicted least-recently-used.
+    "per_tonne" is the read-only float64 per_tonne_factors() matrix (rows in
+    FUELS order) for the vectorized solvers; the Decimal factors used by
+    compute_blend() are filled into "decimal" per fuel by decimal_factors().
+    """
+    per_tonne = per_tonne_factors(_stock_factors(), year, gwp_choice, ops, wind)
+    per_tonne.setflags(write=False)
+    return {
+        "key": (gwp_choice, ops, wind, year),
+        "decimal": {},
+        "names": _stock_factors()["names"],
+        "index": FUEL_INDEX,
+        "per_tonne": per_tonne,
+    }
+
+
+def decimal_factors(table: dict, name: str) -> dict:
+    """Decimal factors for FUELS entry `name` under `table`'s scenario, memoized in ``table["decimal"]``.
+
+    Only fuels that are actually used get converted, so registry size does not
+    affect the cost of a blend.
+    """
+    factors = table["decimal"].get(name)
+    if factors is None:
+        gwp_choice, ops, wind, year = table["key"]
+        gwp = GWP_VALUES[gwp_choice]
+        fuel = get_fuel(name)
+        dec_ch4 = Decimal(str(gwp["CH4"]))
+        factors = table["decimal"][name] = {
+            "lcv": Decimal(str(fuel["lcv"])),  # MJ/g
+            "energy_multiplier": (Decimal(str(REWARD_FACTOR_RFNBO_MULTIPLIER))
+                                  if (fuel["rfnbo"] and year <= RFNBO_REWARD_UNTIL) else None),
+            "co2_per_g": Decimal(str(fuel["ttw_co2"])) * Decimal(str(1 - ops / 100)) * Decimal(str(wind)),
+            "ch4_per_g": Decimal(str(fuel["ttw_ch4"])) * dec_ch4,
+            "n2o_per_g": Decimal(str(fuel["ttw_n2O"])) * Decimal(str(gwp["N2O"])),
+            "slip_per_mj": Decimal(str(fuel.get("ch4_slip", 0.0))) * dec_ch4,  # gCO2eq/MJ
+            "wtt": Decimal(str(fuel["wtt"])),  # gCO2eq/MJ
+        }
+    return factors
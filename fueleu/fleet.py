@@ -0,0 +1,216 @@
+"""Vectorized fleet engine: evaluates many vessels at once over a compiled fuel-factor matrix.
+
+Energy, emission totals, intensity, ETS and penalty match compute_blend() to
+within FLEET_RTOL (relative); the compliance balance is a difference of nearly
+equal terms, so its bound is absolute: FLEET_RTOL * energy * target / 1e6 tCO2eq.
+The deviation comes only from float64 vs 28-digit Decimal rounding.
+compute_blend_float() is the same engine for one blend (compute_blend's
+backend="float").
+"""
+import numpy as np
+
+from .constants import ETS_NONCO2_FROM, PENALTY_RATE, VLSFO_ENERGY_CONTENT
+from .engine import _with_defaults, default_phase_in_pct, target_intensity
+from .factors import compile_factors, derived_factors, per_tonne_factors  # noqa: F401 (re-exported)
+
+FLEET_RTOL = 1e-9  # max relative deviation from the Decimal reference path
+
+
+# === FLEET INPUT ===
+def quantity_matrix(vessel_fuel_inputs, factors: dict) -> np.ndarray:
+    """Build a vessels x fuels tonnage matrix from a list of {fuel name: tonnes} dicts."""
+    index = {name: j for j, name in enumerate(factors["names"])}
+    quantities = np.zeros((len(vessel_fuel_inputs), len(index)), dtype=np.float64)
+    for i, fuel_inputs in enumerate(vessel_fuel_inputs):
+        for name, qty in fuel_inputs.items():
+            quantities[i, index[name]] += float(qty)
+    return quantities
+
+
+# === FLEET CALCULATION ===
+def compute_fleet(quantities, year: int, gwp_choice: str = "AR4", ops: float = 0, wind: float = 1.00,
+                  eua_price=0.0, effective_coverage_pct=100.0, phase_in_pct=None, factors=None) -> dict:
+    """Evaluate a vessels x fuels tonnage matrix in a handful of array operations.
+
+    ETS parameters may be scalars or per-vessel arrays. Returns per-vessel arrays:
+    energy (MJ), wtt / ttw_co2 / ttw_nonco2 / wtw (g), ghg_intensity (gCO2eq/MJ),
+    compliance_balance (tCO2eq), penalty (EUR), ets_covered_tonnes and ets_cost (EUR).
+    """
+    factors = compile_factors() if factors is None else factors
+    per_tonne = per_tonne_factors(factors, year, gwp_choice, ops, wind)
+    return fleet_totals(quantities, per_tonne, year, eua_price, effective_coverage_pct, phase_in_pct)
+
+
+def fleet_totals(quantities, per_tonne: np.ndarray, year: int, eua_price=0.0, effective_coverage_pct=100.0,
+                 phase_in_pct=None) -> dict:
+    """compute_fleet() against an already derived per_tonne_factors() table."""
+    quantities = np.atleast_2d(np.asarray(quantities, dtype=np.float64))
+    if phase_in_pct is None:
+        phase_in_pct = default_phase_in_pct(year)
+
+    totals = quantities @ per_tonne
+    energy, wtt, ttw_co2, ttw_nonco2, wtw_only = totals.T
+    wtw = wtt + ttw_co2 + ttw_nonco2 + wtw_only
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ghg_intensity = np.where(energy > 0, wtw / np.where(energy > 0, energy, 1.0), 0.0)
+        compliance_balance = energy * (target_intensity(year) - ghg_intensity) / 1_000_000.0
+        deficit = compliance_balance < 0
+        penalty = np.where(
+            deficit,
+            np.abs(compliance_balance) / np.where(deficit, ghg_intensity, 1.0) / VLSFO_ENERGY_CONTENT * PENALTY_RATE * 1_000_000,
+            0.0)
+
+    include_nonco2 = year >= ETS_NONCO2_FROM
+    ttw_for_ets = ttw_co2 + (ttw_nonco2 if include_nonco2 else 0.0)
+    ets_covered_tonnes = (ttw_for_ets * (np.asarray(effective_coverage_pct, dtype=np.float64) / 100.0)
+                          * (np.asarray(phase_in_pct, dtype=np.float64) / 100.0) / 1_000_000.0)
+    ets_cost = ets_covered_tonnes * np.asarray(eua_price, dtype=np.float64)
+
+    return {
+        "energy": energy,
+        "wtt": wtt,
+        "ttw_co2": ttw_co2,
+        "ttw_nonco2": ttw_nonco2,
+        "wtw": wtw,
+        "ghg_intensity": ghg_intensity,
+        "compliance_balance": compliance_balance,
+        "penalty": penalty,
+        "ets_covered_tonnes": ets_covered_tonnes,
+        "ets_cost": ets_cost,
+    }
+
+
+def fleet_add_fuel(result: dict, per_tonne: np.ndarray, year: int) -> np.ndarray:
+    """Closed-form tonnes of each candidate fuel (columns of `per_tonne`) each vessel must add to reach the target.
+
+    Same formula as mitigation.solve_add_fuel_all(), broadcast over vessels; 0 for
+    compliant vessels, NaN where the fuel's own intensity is not below the target.
+    """
+    target = target_intensity(year)
+    energy_pt = per_tonne[:, 0]
+    emissions_pt = per_tonne[:, 1:].sum(axis=1)
+    headroom = target * energy_pt - emissions_pt
+    shortfall = np.maximum(result["wtw"] - target * result["energy"], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(headroom[None, :] > 0, shortfall[:, None] / np.where(headroom > 0, headroom, 1.0)[None, :], np.nan)
+
+
+# === SINGLE BLEND (FLOAT64 BACKEND) ===
+def compute_blend_float(inputs: dict) -> dict:
+    """compute_blend(inputs, backend="float"): the blend as a one-vessel fleet over the per-tonne factor matrix.
+
+    Same keys and rows as the Decimal reference, but every sum is a float; see
+    fueleu.diffcheck for the measured deviation.
+    """
+    inputs = _with_defaults(inputs)
+    year = inputs["year"]
+    exchange_rate = float(inputs["exchange_rate"])
+    table = derived_factors(inputs["gwp_choice"], inputs["ops"], inputs["wind"], year)
+    index = table["index"]
+    fuel_inputs = inputs["fuel_inputs"]
+    names = sorted((n for n in fuel_inputs if n in index), key=index.get)  # FUELS order
+    custom = list(inputs["custom_fuels"])
+
+    quantities = np.array([float(fuel_inputs[n]) for n in names] + [float(cf.get("qty_t", 0.0)) for cf in custom])
+    prices_usd = np.array([float(inputs["fuel_price_inputs"].get(n, 0.0)) for n in names]
+                          + [float(cf.get("price_usd", 0.0)) for cf in custom])
+    per_tonne = table["per_tonne"][[index[n] for n in names]]
+    if custom:
+        per_tonne = np.vstack([per_tonne, per_tonne_factors(compile_factors(custom), year, inputs["gwp_choice"],
+                                                            inputs["ops"], inputs["wind"])])
+    labels = names + [f"{cf.get('name','Custom fuel')} (custom{', WtW-only' if cf.get('mode') == 'Basic' else ''})"
+                      for cf in custom]
+    basic = [False] * len(names) + [cf.get("mode") == "Basic" for cf in custom]
+
+    used = np.flatnonzero(quantities > 0)
+    totals = fleet_totals(quantities[used], per_tonne[used], year, inputs["eua_price"],
+                          inputs["effective_coverage_pct"], inputs["phase_in_pct"])
+    parts = quantities[used, None] * per_tonne[used]  # per row: energy, wtt, co2, nonco2, wtw_only
+    costs = quantities[used] * prices_usd[used] * exchange_rate
+    rows = []
+    for i, (energy, wtt, co2, nonco2, wtw_only), qty, price, cost in zip(
+            used.tolist(), parts.tolist(), quantities[used].tolist(), prices_usd[used].tolist(), costs.tolist()):
+        row_emissions = wtt + co2 + nonco2 + wtw_only
+        rows.append({
+            "Fuel": labels[i],
+            "Quantity (t)": qty,
+            "Price per Tonne (USD)": price,
+            "Cost (Eur)": cost,
+            "TTW CO2 (g)": float("nan") if basic[i] else co2,
+            "TTW non-CO2 (g)": float("nan") if basic[i] else nonco2,
+            "WtT (g)": float("nan") if basic[i] else wtt,
+            "Emissions (gCO2eq)": row_emissions,
+            "Energy (MJ)": energy,
+            "GHG Intensity (gCO2eq/MJ)": row_emissions / energy if energy > 0 else 0.0,})
+
+    return {
+        "rows": rows,
+        "total_energy": float(totals["energy"][0]),
+        "wtt_sum": float(totals["wtt"][0]),
+        "ttw_co2_sum": float(totals["ttw_co2"][0]),
+        "ttw_nonco2_sum": float(totals["ttw_nonco2"][0]),
+        "emissions": float(totals["wtw"][0]),
+        "emissions_tonnes": float(totals["wtw"][0]) / 1_000_000.0,
+        "ghg_intensity": float(totals["ghg_intensity"][0]),
+        "target": target_intensity(year),
+        "include_nonco2_in_ets": year >= ETS_NONCO2_FROM,
+        "ets_cost": float(totals["ets_cost"][0]),
+        "ets_covered_tonnes": float(totals["ets_covered_tonnes"][0]),
+        "compliance_balance": float(totals["compliance_balance"][0]),
+        "penalty": float(totals["penalty"][0]),
+        "total_cost": sum(row["Cost (Eur)"] for row in rows),
+        "user_entered_prices": any(r.get("Price per Tonne (USD)", 0) > 0 for r in rows),
+    }
+
+
+# === MANY BLENDS (ONE CALL) ===
+SCENARIO_FIELDS = ("energy", "wtt", "ttw_co2", "ttw_nonco2", "wtw", "ghg_intensity", "compliance_balance", "penalty",
+                   "ets_covered_tonnes", "ets_cost", "fuel_cost")
+
+
+def compute_scenarios(scenarios) -> dict:
+    """Headline figures of many compute_blend() inputs in one matrix product per factor scenario (float64).
+
+    Scenarios sharing (gwp_choice, ops, wind, year) are stacked into one
+    quantities x per-tonne product, with their custom fuels as extra columns;
+    eua_price, coverage, phase-in and exchange rate may differ per scenario.
+    Returns SCENARIO_FIELDS arrays in input order (fuel_cost in EUR).
+    """
+    scenarios = [_with_defaults(s) for s in scenarios]
+    out = {field: np.zeros(len(scenarios)) for field in SCENARIO_FIELDS}
+    groups = {}
+    for i, s in enumerate(scenarios):
+        groups.setdefault((s["gwp_choice"], s["ops"], s["wind"], s["year"]), []).append(i)
+
+    for (gwp_choice, ops, wind, year), members in groups.items():
+        table = derived_factors(gwp_choice, ops, wind, year)
+        index = table["index"]
+        custom = [cf for i in members for cf in scenarios[i]["custom_fuels"]]
+        quantities = np.zeros((len(members), len(index) + len(custom)))
+        prices_usd = np.zeros_like(quantities)
+        column = len(index)
+        for r, i in enumerate(members):
+            s = scenarios[i]
+            for name, qty in s["fuel_inputs"].items():
+                if name in index:
+                    quantities[r, index[name]] = float(qty)
+                    prices_usd[r, index[name]] = float(s["fuel_price_inputs"].get(name, 0.0))
+            for cf in s["custom_fuels"]:
+                quantities[r, column] = float(cf.get("qty_t", 0.0))
+                prices_usd[r, column] = float(cf.get("price_usd", 0.0))
+                column += 1
+        quantities = np.maximum(quantities, 0.0)  # compute_blend() skips rows with qty <= 0
+        per_tonne = table["per_tonne"]
+        if custom:
+            per_tonne = np.vstack([per_tonne, per_tonne_factors(compile_factors(custom), year, gwp_choice, ops, wind)])
+
+        def _column(key):
+            return np.array([float(scenarios[i][key]) for i in members])
+
+        totals = fleet_totals(quantities, per_tonne, year, _column("eua_price"), _column("effective_coverage_pct"),
+                              _column("phase_in_pct"))
+        totals["fuel_cost"] = (quantities * prices_usd).sum(axis=1) * _column("exchange_rate")
+        for field in SCENARIO_FIELDS:
+            out[field][members] = totals[field]
+    return out
@@ -0,0 +1,120 @@
+"""Fuel registry: FuelEU Maritime Annex II default factors loaded from a versioned data file.
+
+fueleu/data/fuels.json (or the file named by FUELEU_FUELS_FILE) is parsed and
+indexed once; the compiled registry is pickled under FUELEU_CACHE_DIR
+(default ~/.cache/fueleu) and reused until the data file changes, so large
+registries (certified batch fuels) load without re-parsing.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+FUELS_FILE = os.environ.get("FUELEU_FUELS_FILE") or os.path.join(os.path.dirname(__file__), "data", "fuels.json")
+CACHE_DIR = os.environ.get("FUELEU_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "fueleu")
+REGISTRY_FORMAT = 1  # data file "format" understood here; also versions the compiled cache
+
+CATEGORY_ORDER = ("Fossil", "Bio", "RFNBO")
+MITIGATION_CATEGORIES = ("Bio", "RFNBO")
+REQUIRED_KEYS = ("name", "category", "lcv", "wtt", "ttw_co2", "ttw_ch4", "ttw_n2O")
+
+
+# === REGISTRY COMPILATION ===
+def compile_registry(data: dict) -> dict:
+    """Validate a parsed data file and build the name, category and RFNBO indexes.
+
+    Units: lcv MJ/g, wtt gCO2eq/MJ, ttw_* g/g fuel, ch4_slip g CH4/MJ.
+    """
+    if data.get("format") != REGISTRY_FORMAT:
+        raise ValueError(f"unsupported fuel data format {data.get('format')!r} (expected {REGISTRY_FORMAT})")
+    fuels = []
+    index = {}
+    by_category = {category: [] for category in CATEGORY_ORDER}
+    for entry in data["fuels"]:
+        missing = [key for key in REQUIRED_KEYS if key not in entry]
+        if missing:
+            raise ValueError(f"fuel {entry.get('name', '?')!r} is missing {', '.join(missing)}")
+        name = entry["name"]
+        if name in index:
+            raise ValueError(f"duplicate fuel name {name!r}")
+        if entry["category"] not in by_category:
+            raise ValueError(f"fuel {name!r} has unknown category {entry['category']!r}")
+        fuel = dict(entry)
+        fuel["rfnbo"] = bool(fuel.get("rfnbo", False))
+        index[name] = len(fuels)
+        by_category[fuel["category"]].append(len(fuels))
+        fuels.append(fuel)
+
+    return {
+        "version": str(data.get("version", "")),
+        "fuels": fuels,
+        "index": index,
+        "categories": {category: [fuels[i] for i in rows] for category, rows in by_category.items()},
+        "category_names": {category: [fuels[i]["name"] for i in rows] for category, rows in by_category.items()},
+        "mitigation_names": [f["name"] for f in fuels if f["category"] in MITIGATION_CATEGORIES],
+        "rfnbo_names": [f["name"] for f in fuels if f["rfnbo"]],
+    }
+
+
+def _cache_path(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"{stem}-{digest}.v{REGISTRY_FORMAT}.pickle")
+
+
+def load_registry(path: str = FUELS_FILE, use_cache: bool = True) -> dict:
+    """Load a compiled registry for `path`, from the binary cache when it matches the file's size and mtime."""
+    stat = os.stat(path)
+    stamp = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    cache_path = _cache_path(path)
+    if use_cache:
+        try:
+            with open(cache_path, "rb") as f:
+                cached_stamp, registry = pickle.load(f)
+            if cached_stamp == stamp:
+                return registry
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            pass
+
+    with open(path, "r", encoding="utf-8") as f:
+        registry = compile_registry(json.load(f))
+
+    if use_cache:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # Write-then-rename so concurrent app processes never read a partial cache
+            fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        except OSError:
+            return registry  # read-only home / cache dir: the registry still works, just uncached
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((stamp, registry), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except (OSError, pickle.PicklingError):
+            try:
+                os.unlink(tmp_path)  # never leave a partial cache file behind
+            except OSError:
+                pass
+    return registry
+
+
+# === FUEL DATABASE ===
+_REGISTRY = load_registry()
+FUELS_VERSION = _REGISTRY["version"]
+FUELS = _REGISTRY["fuels"]
+FUEL_INDEX = _REGISTRY["index"]  # name -> position in FUELS
+
+
+# === CATEGORIES ===
+categories = _REGISTRY["categories"]          # category -> fuel dicts, in FUELS order
+category_names = _REGISTRY["category_names"]  # category -> fuel names, in FUELS order
+initial_fuels = category_names["Fossil"]
+mitigation_fuels = _REGISTRY["mitigation_names"]
+alternative_fuels = mitigation_fuels  # alias used by the substitution solver
+rfnbo_fuels = _REGISTRY["rfnbo_names"]
+
+
+def get_fuel(name: str) -> dict:
+    """Return the FUELS entry called `name` (KeyError if unknown)."""
+    return FUELS[FUEL_INDEX[name]]
@@ -0,0 +1,87 @@
+"""Opt-in rerun instrumentation: wall time and tracemalloc peak per app stage.
+
+The app calls mark(profile, stage) at each section boundary; a mark closes the
+running stage and opens the next, so no section has to be re-indented. With
+profiling off, start_profile() returns None and every call is a no-op.
+Finished reruns are appended to a JSON-lines log for offline analysis.
+Set FUELEU_PROFILE=1 to profile every rerun without the sidebar toggle.
+"""
+from datetime import datetime, timezone
+import json
+import os
+import time
+import tracemalloc
+
+from .fuels import CACHE_DIR
+
+PROFILE_FORCED = os.environ.get("FUELEU_PROFILE") == "1"
+PROFILE_LOG = os.environ.get("FUELEU_PROFILE_LOG") or os.path.join(CACHE_DIR, "reruns.jsonl")
+
+
+# === STAGES ===
+def start_profile(enabled: bool, trace_memory: bool = True):
+    """Begin profiling a rerun; returns the profile state, or None when disabled."""
+    if not (enabled or PROFILE_FORCED):
+        return None
+    owns_tracing = trace_memory and not tracemalloc.is_tracing()
+    if owns_tracing:
+        tracemalloc.start()
+    return {
+        "started": time.perf_counter(),
+        "trace_memory": trace_memory,
+        "owns_tracing": owns_tracing,
+        "stages": [],
+        "open": None,
+    }
+
+
+def _close(profile: dict, now: float):
+    stage = profile["open"]
+    if stage is None:
+        return
+    record = {"stage": stage["name"], "ms": (now - stage["started"]) * 1000.0}
+    if profile["trace_memory"]:
+        current, peak = tracemalloc.get_traced_memory()
+        record["peak_kib"] = max(peak - stage["memory"], 0) / 1024.0  # above the stage's starting allocation
+        record["net_kib"] = (current - stage["memory"]) / 1024.0
+    profile["stages"].append(record)
+    profile["open"] = None
+
+
+def mark(profile, name: str):
+    """Close the running stage (if any) and start timing stage `name`."""
+    if profile is None:
+        return
+    now = time.perf_counter()
+    _close(profile, now)
+    memory = 0
+    if profile["trace_memory"]:
+        tracemalloc.reset_peak()
+        memory = tracemalloc.get_traced_memory()[0]
+    profile["open"] = {"name": name, "started": time.perf_counter(), "memory": memory}
+
+
+def finish_profile(profile, context=None, log_path: str = PROFILE_LOG):
+    """Close the last stage, append the rerun to the JSON-lines log and return its record (None when disabled)."""
+    if profile is None:
+        return None
+    now = time.perf_counter()
+    _close(profile, now)
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "total_ms": (now - profile["started"]) * 1000.0,
+        "stages": profile["stages"],
+        "context": context or {},
+    }
+    if profile["trace_memory"]:
+        record["traced_peak_kib"] = max((s["peak_kib"] for s in profile["stages"]), default=0.0)
+        if profile["owns_tracing"]:
+            tracemalloc.stop()
+    if log_path:
+        try:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass  # read-only home / cache dir: the panel still shows the rerun
+    return record
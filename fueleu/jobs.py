@@ -0,0 +1,338 @@
+"""Background jobs: fleet exports and simulations run off the Streamlit script thread.
+
+Jobs live in a SQLite table (FUELEU_JOBS_DB, default FUELEU_CACHE_DIR/jobs.sqlite)
+and write their inputs and results under a per-job directory next to it, so a
+browser refresh (or a new session) still lists them with their progress and
+downloads. One worker thread per process and database claims queued jobs in
+submission order; a job left "running" by a process that no longer exists is
+queued again by the next claim. Rows record the claiming process's PID and a
+token (process start time + random id), so a restarted app that is given the
+same PID, or a PID since taken by another process, is not mistaken for the
+owner.
+
+    JOB_KINDS            params (JSON)                                     result
+    fleet_results        scenario (year, gwp_choice, ops, wind, eua_price,  results.csv
+                         exchange_rate, phase_in_pct) + consumption file
+    fleet_reports        same + optional sections, pooling_price_usd         reports.zip
+    risk                 inputs, mitigation_prices_usd, pooling_price_usd,   risk.csv
+                         samples, dist, *_sd, correlations
+"""
+import csv
+from datetime import datetime, timezone
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+from .fuels import CACHE_DIR
+
+JOBS_DB = os.environ.get("FUELEU_JOBS_DB") or os.path.join(CACHE_DIR, "jobs.sqlite")
+JOB_POLL_S = 1.0            # idle worker re-checks the table this often (other processes may submit)
+JOB_PROGRESS_EVERY_S = 0.5  # progress writes are throttled to one per this interval
+JOB_REPORT_WORKERS = int(os.environ.get("FUELEU_JOB_WORKERS") or os.cpu_count() or 1)
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    label TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    done REAL NOT NULL DEFAULT 0,
+    total REAL,
+    unit TEXT,
+    message TEXT,
+    result_name TEXT,
+    summary TEXT,
+    error TEXT,
+    pid INTEGER,
+    token TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+)"""
+
+_WORKERS = {}  # db path -> (thread, wake event), one per process
+_WORKERS_LOCK = threading.Lock()
+
+
+# === TABLE ===
+def _connect(db_path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)  # autocommit; BEGIN IMMEDIATE to claim
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(_SCHEMA)
+    if "token" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+        try:  # tables created before the token column
+            conn.execute("ALTER TABLE jobs ADD COLUMN token TEXT")
+        except sqlite3.OperationalError:
+            pass  # added by another process meanwhile
+    return conn
+
+
+def job_dir(job_id: str, db_path: str = JOBS_DB) -> str:
+    return os.path.join(os.path.dirname(db_path) or ".", "jobs", job_id)
+
+
+def submit_job(kind: str, params: dict, label: str = None, files=None, db_path: str = JOBS_DB,
+               start_worker: bool = True) -> str:
+    """Queue a job; `files` ({name: bytes}) are saved into its directory first. Returns the job id."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"unknown job kind {kind!r} (expected one of {', '.join(JOB_KINDS)})")
+    job_id = uuid.uuid4().hex[:12]
+    folder = job_dir(job_id, db_path)
+    os.makedirs(folder, exist_ok=True)
+    for name, data in (files or {}).items():
+        with open(os.path.join(folder, os.path.basename(name)), "wb") as f:
+            f.write(data)
+    with _connect(db_path) as conn:
+        conn.execute("INSERT INTO jobs (id, kind, label, params, status, created) VALUES (?, ?, ?, ?, 'queued', ?)",
+                     (job_id, kind, label or kind, json.dumps(params), time.time()))
+    if start_worker:
+        ensure_worker(db_path)[1].set()
+    return job_id
+
+
+def _as_job(row: sqlite3.Row, db_path: str) -> dict:
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+    job["fraction"] = min(job["done"] / job["total"], 1.0) if job["total"] else (1.0 if job["status"] == "done" else 0.0)
+    job["eta_s"] = None
+    if job["status"] == "running" and job["started"] and 0 < job["fraction"] < 1:
+        job["eta_s"] = (time.time() - job["started"]) * (1 - job["fraction"]) / job["fraction"]
+    job["result_path"] = os.path.join(job_dir(job["id"], db_path), job["result_name"]) if job["result_name"] else None
+    return job
+
+
+def list_jobs(limit: int = 20, db_path: str = JOBS_DB) -> list:
+    """Most recent jobs first, with `fraction` done, `eta_s` (running jobs) and `result_path` (finished jobs)."""
+    with _connect(db_path) as conn:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+    return [_as_job(row, db_path) for row in rows]
+
+
+def get_job(job_id: str, db_path: str = JOBS_DB):
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _as_job(row, db_path) if row is not None else None
+
+
+def delete_job(job_id: str, db_path: str = JOBS_DB) -> bool:
+    """Remove a finished or queued job and its files (running jobs are left alone)."""
+    with _connect(db_path) as conn:
+        deleted = conn.execute("DELETE FROM jobs WHERE id = ? AND status != 'running'", (job_id,)).rowcount
+    if deleted:
+        shutil.rmtree(job_dir(job_id, db_path), ignore_errors=True)
+    return bool(deleted)
+
+
+# === JOB KINDS ===
+# Each runs in the worker thread: (params, folder, progress) -> (result file name, summary dict).
+# progress(done, total=None, unit=None) records how far the job is.
+def _input_file(folder: str) -> str:
+    names = [n for n in os.listdir(folder) if n.startswith("input")]
+    if not names:
+        raise ValueError("job has no input file")
+    return os.path.join(folder, names[0])
+
+
+def _scenario(params: dict) -> dict:
+    keys = ("year", "gwp_choice", "ops", "wind", "eua_price", "exchange_rate", "phase_in_pct")
+    return {k: params[k] for k in keys if params.get(k) is not None}
+
+
+def _run_fleet_results(params: dict, folder: str, progress):
+    from .batch import count_rows, run
+
+    path = _input_file(folder)
+    total = count_rows(path)
+    progress(0, total, "rows")
+    s = _scenario(params)
+    stats = run(path, os.path.join(folder, "results.csv"), year=s.get("year", 2025), gwp_choice=s.get("gwp_choice", "AR4"),
+                ops=s.get("ops", 0), wind=s.get("wind", 1.00), eua_price=s.get("eua_price", 0.0),
+                fx=s.get("exchange_rate", 1.0), phase_in_pct=s.get("phase_in_pct"),
+                custom_fuels=params.get("custom_fuels"), progress=lambda rows: progress(rows, max(total, rows)),
+                workers=JOB_REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return "results.csv", {"rows": stats["rows"], "vessels": stats["vessels"], "seconds": stats["seconds"],
+                           "unknown_fuels": stats["unknown_fuels"]}
+
+
+def _run_fleet_reports(params: dict, folder: str, progress):
+    from .report import vessels_from_consumption, write_reports
+
+    s = _scenario(params)
+    progress(0, None, "reading consumption file")
+    vessels = vessels_from_consumption(_input_file(folder), s.get("year", 2025), s.get("gwp_choice", "AR4"),
+                                       s.get("ops", 0), s.get("wind", 1.00), custom_fuels=params.get("custom_fuels"))
+    progress(0, len(vessels), "reports")
+    stats = write_reports(vessels, os.path.join(folder, "reports.zip"),
+                          scenario={**s, "pooling_price_usd": params.get("pooling_price_usd", 0.0)},
+                          sections=params.get("sections"), workers=min(JOB_REPORT_WORKERS, max(len(vessels) // 25, 1)),
+                          progress=lambda n: progress(n, len(vessels)),
+                          mp_context=multiprocessing.get_context("spawn"))  # never fork the threaded host
+    return "reports.zip", {"reports": stats["reports"], "pdf_bytes": stats["pdf_bytes"], "seconds": stats["seconds"]}
+
+
+def _run_risk(params: dict, folder: str, progress):
+    from .engine import compute_blend
+    from .risk import default_correlations, default_spec, risk_table, simulate, strategy_model
+
+    inputs = params["inputs"]
+    model = strategy_model(inputs, compute_blend(inputs), params.get("mitigation_prices_usd"),
+                           params.get("pooling_price_usd", 0.0))
+    spec = default_spec(model, params.get("eua_sd", 25.0), params.get("fx_sd", 5.0), params.get("fuel_sd", 15.0),
+                        params.get("dist", "lognormal"))
+    correlations = default_correlations(spec, params.get("eua_fuel", 0.3), params.get("fuel_fuel", 0.6),
+                                        params.get("fx_fuel", 0.0))
+    samples = int(params.get("samples", 100_000))
+    progress(0, samples, "samples")
+    sim = simulate(model, spec, samples, correlations, seed=params.get("seed"),
+                   progress=lambda n: progress(n, samples))
+    rows = risk_table(sim)
+    with open(os.path.join(folder, "risk.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return "risk.csv", {"samples": samples, "strategies": len(rows), "seconds": sim["seconds"], "table": rows}
+
+
+JOB_KINDS = {
+    "fleet_results": _run_fleet_results,
+    "fleet_reports": _run_fleet_reports,
+    "risk": _run_risk,
+}
+
+
+# === WORKER ===
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_start(pid):
+    """Start time of `pid` in clock ticks since boot (Linux /proc), None where unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            return f.read().rsplit(b")", 1)[1].split()[19].decode()
+    except (OSError, IndexError):
+        return None
+
+
+_TOKEN = f"{_process_start(os.getpid()) or ''}-{uuid.uuid4().hex}"  # this process's claims
+
+
+def _owner_alive(pid, token) -> bool:
+    if token == _TOKEN:
+        return True
+    if pid == os.getpid() or not _pid_alive(pid):
+        return False  # exited, or our own PID under another token: a previous process (restart)
+    started = (token or "").partition("-")[0]
+    return not started or _process_start(pid) in (None, started)  # PID reused by another process otherwise
+
+
+def _requeue_orphans(conn: sqlite3.Connection):
+    running = conn.execute("SELECT id, pid, token FROM jobs WHERE status = 'running'").fetchall()
+    for row in running:
+        if not _owner_alive(row["pid"], row["token"]):
+            conn.execute("UPDATE jobs SET status = 'queued', done = 0, pid = NULL, token = NULL, started = NULL, "
+                         "message = 'requeued after a restart' WHERE id = ? AND status = 'running'", (row["id"],))
+
+
+def _claim(conn: sqlite3.Connection):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _requeue_orphans(conn)
+        row = conn.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+        if row is not None:
+            conn.execute("UPDATE jobs SET status = 'running', pid = ?, token = ?, started = ? WHERE id = ?",
+                         (os.getpid(), _TOKEN, time.time(), row["id"]))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+
+def run_job(row, db_path: str = JOBS_DB):
+    """Execute one claimed job row and record its result or error."""
+    job_id = row["id"]
+    folder = job_dir(job_id, db_path)
+    conn = _connect(db_path)
+    last = {"t": 0.0, "total": None, "unit": None}
+
+    def progress(done, total=None, unit=None):
+        if total is not None:
+            last["total"] = total
+        if unit is not None:
+            last["unit"] = unit
+        now = time.perf_counter()
+        if now - last["t"] >= JOB_PROGRESS_EVERY_S or (last["total"] and done >= last["total"]):
+            last["t"] = now
+            conn.execute("UPDATE jobs SET done = ?, total = ?, unit = ? WHERE id = ?",
+                         (float(done), last["total"], last["unit"], job_id))
+
+    try:
+        result_name, summary = JOB_KINDS[row["kind"]](json.loads(row["params"]), folder, progress)
+    except Exception as exc:
+        conn.execute("UPDATE jobs SET status = 'failed', error = ?, message = ?, finished = ? WHERE id = ?",
+                     (f"{type(exc).__name__}: {exc}", traceback.format_exc(limit=5), time.time(), job_id))
+    else:
+        conn.execute("UPDATE jobs SET status = 'done', done = COALESCE(total, done), result_name = ?, summary = ?, "
+                     "finished = ? WHERE id = ?", (result_name, json.dumps(summary, default=float), time.time(), job_id))
+    finally:
+        conn.close()
+
+
+def _worker(db_path: str, wake: threading.Event):
+    while True:
+        try:
+            conn = _connect(db_path)
+            try:
+                row = _claim(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            wake.wait(JOB_POLL_S)
+            wake.clear()
+            continue
+        run_job(row, db_path)
+
+
+def ensure_worker(db_path: str = JOBS_DB) -> tuple:
+    """Start this process's worker thread for `db_path` (once); returns (thread, wake event)."""
+    with _WORKERS_LOCK:
+        worker = _WORKERS.get(db_path)
+        if worker is None or not worker[0].is_alive():
+            wake = threading.Event()
+            thread = threading.Thread(target=_worker, args=(db_path, wake), name="fueleu-jobs", daemon=True)
+            thread.start()
+            worker = _WORKERS[db_path] = (thread, wake)
+    return worker
+
+
+def format_eta(seconds) -> str:
+    if seconds is None:
+        return "—"
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}" if seconds >= 3600 else f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def created_label(job: dict) -> str:
+    return datetime.fromtimestamp(job["created"], timezone.utc).astimezone().strftime("%Y-%m-%d %H:%M")
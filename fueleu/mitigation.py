@@ -0,0 +1,333 @@
+"""Mitigation solvers: pooling, adding a mitigation fuel, substituting a fossil fuel, and the least-cost mix."""
+import math
+
+import numpy as np
+
+from .constants import PENALTY_RATE, VLSFO_ENERGY_CONTENT
+from .engine import _with_defaults, target_intensity
+from .factors import compile_factors, derived_factors, per_tonne_factors
+from .fuels import FUEL_INDEX, alternative_fuels, initial_fuels, mitigation_fuels
+
+LEAST_COST_PENALTY_ITERATIONS = 10  # penalty-rate refinements (the rate depends on the final intensity)
+
+
+# === MITIGATION SOLVERS ===
+def solve_pooling(result: dict, pooling_price_usd_per_tonne: float, exchange_rate: float) -> float:
+    """Return the cost (EUR) of buying the whole compliance deficit via pooling."""
+    if pooling_price_usd_per_tonne <= 0 or result["compliance_balance"] >= 0:
+        return 0.0
+    return pooling_price_usd_per_tonne * exchange_rate * abs(result["compliance_balance"])
+
+
+def solve_add_fuel_all(inputs: dict, result: dict, fuels=None) -> dict:
+    """Solve, for every candidate fuel at once, the tonnage to add on top of the blend to reach the target.
+
+    Adding q t of a fuel with per-tonne emissions a and energy b gives an intensity
+    of (E + q*a) / (En + q*b), so the target T is met exactly at
+    q = (E - T*En) / (T*b - a). A fuel is infeasible when its own intensity a/b is
+    not below T (no quantity reaches the target). Returns arrays in `fuels` order;
+    infeasible entries hold NaN.
+    """
+    inputs = _with_defaults(inputs)
+    if fuels is None:
+        table = derived_factors(inputs["gwp_choice"], inputs["ops"], inputs["wind"], inputs["year"])
+        names, per_tonne = table["names"], table["per_tonne"]
+    else:
+        factors = compile_factors(fuels)
+        names = factors["names"]
+        per_tonne = per_tonne_factors(factors, inputs["year"], inputs["gwp_choice"], inputs["ops"], inputs["wind"])
+    energy_pt, wtt_pt, co2_pt, nonco2_pt, wtw_only_pt = per_tonne.T
+    emissions_pt = wtt_pt + co2_pt + nonco2_pt + wtw_only_pt
+
+    target = target_intensity(inputs["year"])
+    base_emissions = float(result["emissions"])
+    base_energy = float(result["total_energy"])
+    shortfall = max(base_emissions - target * base_energy, 0.0)  # gCO2eq above the target line
+
+    headroom = target * energy_pt - emissions_pt  # gCO2eq removed per tonne added
+    feasible = headroom > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        required_t = np.where(feasible, shortfall / np.where(feasible, headroom, 1.0), np.nan)
+        fuel_intensity = np.where(energy_pt > 0, emissions_pt / np.where(energy_pt > 0, energy_pt, 1.0), np.nan)
+
+    new_emissions = base_emissions + required_t * emissions_pt
+    new_ttw_co2 = float(result["ttw_co2_sum"]) + required_t * co2_pt
+    new_ttw_nonco2 = float(result["ttw_nonco2_sum"]) + required_t * nonco2_pt
+    ttw_for_ets = new_ttw_co2 + (new_ttw_nonco2 if result["include_nonco2_in_ets"] else 0.0)
+    ets_cost = (ttw_for_ets * (inputs["effective_coverage_pct"] / 100.0) * (inputs["phase_in_pct"] / 100.0)
+                / 1_000_000.0 * float(inputs["eua_price"]))
+
+    return {
+        "names": names,
+        "feasible": feasible,
+        "fuel_intensity": fuel_intensity,
+        "required_t": required_t,
+        "new_emissions": new_emissions,
+        "new_ttw_co2": new_ttw_co2,
+        "new_ttw_nonco2": new_ttw_nonco2,
+        "ets_cost": ets_cost,
+    }
+
+
+def solve_add_fuel(inputs: dict, result: dict) -> list:
+    """Return "Add Bio Fuel" rows for every fuel that can bring the blend to the target, sorted by required amount."""
+    solved = solve_add_fuel_all(inputs, result)
+    mitigation_rows = []
+    for j in np.flatnonzero(solved["feasible"]):
+        mitigation_rows.append({
+            "Fuel": solved["names"][j],
+            "Required Amount (t)": float(math.ceil(solved["required_t"][j])),
+            "New Emissions (gCO2eq)": float(solved["new_emissions"][j]),
+            "ETS Cost (EUR)": float(solved["ets_cost"][j]),})
+
+    return sorted(mitigation_rows, key=lambda x: x["Required Amount (t)"])
+
+def solve_substitution_all(inputs: dict, result: dict, initial=None, alternatives=None, substitute_prices_usd=None) -> dict:
+    """Solve the replacement fraction for every initial x mitigation fuel pair at once.
+
+    Swapping a fraction x of the initial stream (M t) for the same mass of a
+    mitigation fuel shifts the blend linearly, so the target T is met exactly at
+    x = (E - T*En) / (M * (h_m - h_i)) with h = T*b - a the per-tonne headroom.
+    A pair is feasible when the initial fuel is in the blend and 0 <= x <= 1.
+    Prices for mitigation fuels default to the blend's fuel prices. Returns
+    (n_initial, n_alternatives) arrays; infeasible entries hold NaN.
+    """
+    inputs = _with_defaults(inputs)
+    initial = initial_fuels if initial is None else initial
+    alternatives = alternative_fuels if alternatives is None else alternatives
+    prices_usd = dict(inputs["fuel_price_inputs"])
+    prices_usd.update(substitute_prices_usd or {})
+    fx = float(inputs["exchange_rate"])
+    table = derived_factors(inputs["gwp_choice"], inputs["ops"], inputs["wind"], inputs["year"])
+
+    pt_i = table["per_tonne"][[table["index"][n] for n in initial]]
+    pt_m = table["per_tonne"][[table["index"][n] for n in alternatives]]
+    target = target_intensity(inputs["year"])
+
+    def _split(pt):
+        energy, wtt, co2, nonco2, wtw_only = pt.T
+        return energy, wtt + co2 + nonco2 + wtw_only, co2, nonco2
+
+    energy_i, emis_i, co2_i, nonco2_i = (v[:, None] for v in _split(pt_i))
+    energy_m, emis_m, co2_m, nonco2_m = (v[None, :] for v in _split(pt_m))
+
+    qty_initial = np.array([float(inputs["fuel_inputs"].get(n, 0.0)) for n in initial])[:, None]  # t
+    shortfall = max(float(result["emissions"]) - target * float(result["total_energy"]), 0.0)
+    gain_pt = (target * energy_m - emis_m) - (target * energy_i - emis_i)  # gCO2eq below target per tonne swapped
+    gain = qty_initial * gain_pt  # for swapping the whole stream
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(gain > 0, shortfall / np.where(gain > 0, gain, 1.0), np.inf)
+    in_blend = np.broadcast_to(qty_initial > 0, fraction.shape)
+    feasible = in_blend & (fraction <= 1.0)
+    fraction = np.where(feasible, fraction, np.nan)
+    replaced_t = fraction * qty_initial
+
+    new_emissions = float(result["emissions"]) + replaced_t * (emis_m - emis_i)
+    new_ttw_co2 = float(result["ttw_co2_sum"]) + replaced_t * (co2_m - co2_i)
+    new_ttw_nonco2 = float(result["ttw_nonco2_sum"]) + replaced_t * (nonco2_m - nonco2_i)
+    ttw_for_ets = new_ttw_co2 + (new_ttw_nonco2 if result["include_nonco2_in_ets"] else 0.0)
+    ets_cost = (ttw_for_ets * (inputs["effective_coverage_pct"] / 100.0) * (inputs["phase_in_pct"] / 100.0)
+                / 1_000_000.0 * float(inputs["eua_price"]))
+
+    price_i = np.array([float(prices_usd.get(n, 0.0)) * fx for n in initial])[:, None]
+    price_m = np.array([float(prices_usd.get(n, 0.0)) * fx for n in alternatives])[None, :]
+    priced = np.broadcast_to(price_m > 0, fraction.shape)
+    additional_cost = np.where(priced, replaced_t * (price_m - price_i), np.nan)
+
+    return {
+        "initial": list(initial),
+        "alternatives": list(alternatives),
+        "target": target,
+        "feasible": feasible,
+        "in_blend": in_blend,
+        "fraction": fraction,
+        "replaced_t": replaced_t,
+        "new_emissions": new_emissions,
+        "new_ttw_co2": new_ttw_co2,
+        "new_ttw_nonco2": new_ttw_nonco2,
+        "ets_cost": ets_cost,
+        "additional_cost": additional_cost,
+    }
+
+
+def rank_substitutions(solved: dict) -> list:
+    """Flatten solve_substitution_all() into feasible swap rows, cheapest first.
+
+    Priced swaps are ranked by additional fuel cost + ETS cost; swaps without a
+    mitigation fuel price follow, ranked by replaced mass.
+    """
+    rows = []
+    for i, j in zip(*np.nonzero(solved["feasible"])):
+        additional = solved["additional_cost"][i, j]
+        priced = not np.isnan(additional)
+        rows.append({
+            "Fuel to replace": solved["initial"][i],
+            "Mitigation fuel": solved["alternatives"][j],
+            "Replaced share (%)": float(solved["fraction"][i, j] * 100.0),
+            "Replaced mass (t)": float(solved["replaced_t"][i, j]),
+            "Additional fuel cost (EUR)": float(additional) if priced else None,
+            "ETS Cost (EUR)": float(solved["ets_cost"][i, j]),
+            "Total (EUR)": float(additional + solved["ets_cost"][i, j]) if priced else None,})
+
+    return sorted(rows, key=lambda r: (r["Total (EUR)"] is None, r["Total (EUR)"] or 0.0, r["Replaced mass (t)"]))
+
+
+def solve_substitution(inputs: dict, result: dict, initial_fuel: str, substitute_fuel: str,
+                       substitution_price_usd: float = 0.0):
+    """Find the fraction of `initial_fuel` to replace with `substitute_fuel` to reach the target.
+
+    Returns None if the initial fuel is not in the blend or no feasible fraction
+    exists, else a dict with best_x, replaced_mass, emissions, ETS and cost figures.
+    Costs are None unless fuel prices and a substitution price were entered.
+    """
+    inputs = _with_defaults(inputs)
+    fuel_inputs = inputs["fuel_inputs"]
+    fuel_price_inputs = inputs["fuel_price_inputs"]
+    exchange_rate = inputs["exchange_rate"]
+
+    qty_initial = float(fuel_inputs.get(initial_fuel, 0.0))  # t
+    if qty_initial <= 0:
+        return None
+
+    solved = solve_substitution_all(inputs, result, [initial_fuel], [substitute_fuel])
+    if not solved["feasible"][0, 0]:
+        return None
+
+    best_x = float(solved["fraction"][0, 0])
+    replaced_mass = best_x * qty_initial  # tonnes
+    substitution_ets_cost = float(solved["ets_cost"][0, 0])
+
+    additional_substitution_cost = None
+    total_substitution_cost = None
+    if result["user_entered_prices"] and substitution_price_usd > 0:
+        price_initial_eur_per_t = float(fuel_price_inputs.get(initial_fuel, 0.0)) * float(exchange_rate)
+        substitution_price_eur_per_t = substitution_price_usd * exchange_rate
+        mitigation_fuel_cost = replaced_mass * substitution_price_eur_per_t
+        remaining_fuel_cost = (qty_initial - replaced_mass) * price_initial_eur_per_t
+        additional_substitution_cost = replaced_mass * (substitution_price_eur_per_t - price_initial_eur_per_t)
+        substitution_total_cost_stream = mitigation_fuel_cost + remaining_fuel_cost
+        other_fuel_costs = sum(
+            (fuel_inputs[name] * fuel_price_inputs.get(name, 0.0) * exchange_rate)
+            for name in sorted((n for n in fuel_inputs if n in FUEL_INDEX), key=FUEL_INDEX.get)
+            if name != initial_fuel
+        )
+        total_substitution_cost = substitution_total_cost_stream + other_fuel_costs + (substitution_ets_cost or 0.0)
+
+    return {
+        "best_x": best_x,
+        "target": solved["target"],
+        "replaced_mass": replaced_mass,
+        "substitution_total_emissions": float(solved["new_emissions"][0, 0]),
+        "substitution_ets_cost": substitution_ets_cost,
+        "additional_substitution_cost": additional_substitution_cost,
+        "total_substitution_cost": total_substitution_cost,
+    }
+
+
+def solve_least_cost(inputs: dict, result: dict, prices_usd=None, caps_t=None, pooling_price_usd: float = 0.0,
+                     pooling_cap_t=None, allow_penalty: bool = True) -> dict:
+    """Cheapest mix of added mitigation fuels, pooling and penalty that settles the compliance deficit.
+
+    Adding q t of fuel j removes h_j = T*b_j - a_j gCO2eq from the shortfall
+    (E - T*En) and costs (price + ETS) per tonne; a pooled tonne removes 1e6 g.
+    With one covering constraint and per-fuel caps this is a fractional
+    knapsack, so filling the options in order of cost per gram removed
+    (up to each cap) is optimal. Any deficit left is paid as penalty, whose
+    rate depends on the final intensity and is refined to a fixed point; with
+    allow_penalty=False it is only a last resort (meets_target=False).
+    Only mitigation fuels with a price (`prices_usd`, then the blend's prices)
+    are candidates; `caps_t` maps fuel -> max tonnes (missing = unlimited).
+    """
+    inputs = _with_defaults(inputs)
+    prices = dict(inputs["fuel_price_inputs"])
+    prices.update({name: p for name, p in (prices_usd or {}).items() if p and p > 0})
+    caps_t = caps_t or {}
+    fx = float(inputs["exchange_rate"])
+    table = derived_factors(inputs["gwp_choice"], inputs["ops"], inputs["wind"], inputs["year"])
+    target = target_intensity(inputs["year"])
+
+    names = [name for name in mitigation_fuels if float(prices.get(name, 0.0) or 0.0) > 0]
+    per_tonne = table["per_tonne"][[table["index"][name] for name in names]].reshape(-1, 5)
+    energy_pt, wtt_pt, co2_pt, nonco2_pt, wtw_only_pt = per_tonne.T
+    emissions_pt = wtt_pt + co2_pt + nonco2_pt + wtw_only_pt
+    ets_rate = ((inputs["effective_coverage_pct"] / 100.0) * (inputs["phase_in_pct"] / 100.0)
+                / 1_000_000.0 * float(inputs["eua_price"]))
+    ets_pt = (co2_pt + (nonco2_pt if result["include_nonco2_in_ets"] else 0.0)) * ets_rate  # EUR/t
+    cost_pt = np.array([float(prices[name]) * fx for name in names]) + ets_pt  # EUR/t
+    headroom = target * energy_pt - emissions_pt  # g removed per tonne
+    cap = np.array([float(caps_t[name]) if caps_t.get(name) is not None else np.inf for name in names])
+    useful = (headroom > 0) & (cap > 0)
+
+    base_emissions = float(result["emissions"])
+    base_energy = float(result["total_energy"])
+    shortfall = max(base_emissions - target * base_energy, 0.0)
+
+    # Options: fuels (cost and capacity in g removed), pooling, then penalty as the unlimited fallback
+    unit_cost = list(np.where(useful, cost_pt / np.where(useful, headroom, 1.0), np.inf))
+    capacity = list(np.where(useful, cap * headroom, 0.0))
+    pooling_cost_per_t = float(pooling_price_usd or 0.0) * fx
+    if pooling_cost_per_t > 0:
+        unit_cost.append(pooling_cost_per_t / 1_000_000.0)
+        capacity.append(float(pooling_cap_t) * 1_000_000.0 if pooling_cap_t is not None else np.inf)
+    else:
+        unit_cost.append(np.inf)
+        capacity.append(0.0)
+
+    def _fill(penalty_per_g):
+        costs = np.array(unit_cost + [penalty_per_g])
+        covered = np.zeros(len(costs))
+        remaining = shortfall
+        for k in np.argsort(costs, kind="stable"):
+            if remaining <= 0 or not np.isfinite(costs[k]):
+                break
+            covered[k] = min(remaining, capacity[k] if k < len(capacity) else np.inf)
+            remaining -= covered[k]
+        covered[-1] += max(remaining, 0.0)  # whatever the options cannot cover is penalised
+        return covered
+
+    def _intensity(quantities):
+        energy = base_energy + quantities @ energy_pt
+        return (base_emissions + quantities @ emissions_pt) / energy if energy > 0 else 0.0
+
+    ghg = float(result["ghg_intensity"])
+    for _ in range(LEAST_COST_PENALTY_ITERATIONS):
+        penalty_per_g = (PENALTY_RATE / (ghg * VLSFO_ENERGY_CONTENT) if allow_penalty and ghg > 0 else np.inf)
+        covered = _fill(penalty_per_g)
+        quantities = np.where(useful, covered[:len(names)] / np.where(useful, headroom, 1.0), 0.0)
+        new_ghg = _intensity(quantities)
+        if abs(new_ghg - ghg) < 1e-12:
+            break
+        ghg = new_ghg
+
+    pooling_t = covered[len(names)] / 1_000_000.0
+    deficit_t = covered[-1] / 1_000_000.0
+    ghg = _intensity(quantities)
+    penalty = deficit_t / (ghg * VLSFO_ENERGY_CONTENT) * PENALTY_RATE * 1_000_000 if deficit_t > 0 else 0.0
+    fuel_cost = float(quantities @ (cost_pt - ets_pt))
+    added_ets_cost = float(quantities @ ets_pt)
+    rows = [{
+        "Fuel": names[j],
+        "Added (t)": float(quantities[j]),
+        "Price (USD/t)": float(prices[names[j]]),
+        "Cap (t)": float(cap[j]) if np.isfinite(cap[j]) else None,
+        "Fuel Cost (Eur)": float(quantities[j] * (cost_pt[j] - ets_pt[j])),
+        "ETS Cost (Eur)": float(quantities[j] * ets_pt[j]),
+        "Cost per tCO2eq (Eur)": float(unit_cost[j] * 1_000_000.0),}
+        for j in np.flatnonzero(quantities > 0)]
+
+    return {
+        "quantities": {names[j]: float(quantities[j]) for j in np.flatnonzero(quantities > 0)},
+        "rows": sorted(rows, key=lambda r: r["Cost per tCO2eq (Eur)"]),
+        "pooling_t": pooling_t,
+        "pooling_cost": pooling_t * pooling_cost_per_t,
+        "penalised_deficit_t": deficit_t,
+        "penalty": penalty,
+        "added_fuel_cost": fuel_cost,
+        "ets_cost": float(result["ets_cost"]) + added_ets_cost,
+        "total_cost": float(result["total_cost"]) + fuel_cost + float(result["ets_cost"]) + added_ets_cost
+                      + pooling_t * pooling_cost_per_t + penalty,
+        "ghg_intensity": ghg,
+        "target": target,
+        "meets_target": deficit_t <= 1e-9,  # settled by added fuels and pooling alone
+    }
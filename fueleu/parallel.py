@@ -0,0 +1,172 @@
+"""Multi-core fleet evaluation: shards vessels across a process pool.
+
+The per-tonne factor tables are derived once in the parent and handed to each
+worker through the pool initializer, so tasks only carry their slice of the
+tonnage matrix. Results are written back by shard offset, so the output order
+is the input order regardless of which worker finishes first.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+import numpy as np
+
+from .engine import default_phase_in_pct
+from .fleet import compile_factors, fleet_add_fuel, fleet_totals, per_tonne_factors
+from .fuels import FUELS, get_fuel, mitigation_fuels
+
+_WORKER = {}  # per-process tables set by _init_worker
+
+RESULT_KEYS = [
+    "energy", "wtt", "ttw_co2", "ttw_nonco2", "wtw", "ghg_intensity", "compliance_balance", "penalty",
+    "ets_covered_tonnes", "ets_cost", "fuel_cost", "best_mitigation", "best_mitigation_t", "best_mitigation_cost",
+]
+
+
+def _init_worker(tables: dict):
+    _WORKER.clear()
+    _WORKER.update(tables)
+
+
+def evaluate_shard(quantities, prices_usd=None, effective_coverage_pct=100.0, tables=None,
+                   covered_quantities=None) -> dict:
+    """Blend totals, fuel cost, ETS and cheapest add-fuel mitigation for one block of vessels.
+
+    `prices_usd` is a per-fuel vector or a vessels x fuels matrix; coverage is a
+    scalar or per-vessel array. `covered_quantities` (tonnes x ETS coverage share
+    per fuel, as fueleu.batch accumulates them) replaces the coverage when given.
+    The cheapest mitigation is the one with the lowest fuel cost when mitigation
+    prices are known, else the smallest tonnage; its cost is NaN when unpriced.
+    """
+    tables = _WORKER if tables is None else tables
+    result = fleet_totals(quantities, tables["per_tonne"], tables["year"], tables["eua_price"],
+                          effective_coverage_pct, tables["phase_in_pct"])
+    if covered_quantities is not None:
+        covered = fleet_totals(covered_quantities, tables["per_tonne"], tables["year"], tables["eua_price"],
+                               100.0, tables["phase_in_pct"])
+        result["ets_covered_tonnes"] = covered["ets_covered_tonnes"]
+        result["ets_cost"] = covered["ets_cost"]
+
+    quantities = np.atleast_2d(quantities)
+    if prices_usd is None:
+        result["fuel_cost"] = np.zeros(len(quantities))
+    else:
+        result["fuel_cost"] = (quantities * prices_usd).sum(axis=1) * tables["fx"]
+
+    if not len(tables["per_tonne_mitigation"]):  # no candidates
+        result["best_mitigation"] = np.full(len(quantities), -1)
+        result["best_mitigation_t"] = result["best_mitigation_cost"] = np.full(len(quantities), np.nan)
+        return result
+    required_t = fleet_add_fuel(result, tables["per_tonne_mitigation"], tables["year"])
+    price_eur = tables["mitigation_prices_usd"] * tables["fx"]
+    if np.any(price_eur > 0):
+        rank = required_t * np.where(price_eur > 0, price_eur, np.inf)
+    else:
+        rank = required_t
+    rank = np.where(np.isnan(rank), np.inf, rank)
+    best = rank.argmin(axis=1)
+    rows = np.arange(len(best))
+    feasible = np.isfinite(rank[rows, best])
+    result["best_mitigation"] = np.where(feasible, best, -1)
+    result["best_mitigation_t"] = np.where(feasible, required_t[rows, best], np.nan)
+    result["best_mitigation_cost"] = np.where(feasible & (price_eur[best] > 0), required_t[rows, best] * price_eur[best], np.nan)
+    return result
+
+
+def _run_shard(task):
+    start, quantities, prices_usd, coverage, covered_quantities = task
+    started = time.perf_counter()
+    result = evaluate_shard(quantities, prices_usd, coverage, covered_quantities=covered_quantities)
+    return start, result, os.getpid(), time.perf_counter() - started
+
+
+def fleet_tables(year: int, gwp_choice: str = "AR4", ops: float = 0, wind: float = 1.00, eua_price: float = 0.0,
+                 fx: float = 1.0, phase_in_pct=None, mitigation=None, mitigation_prices_usd=None, fuels=None) -> dict:
+    """The per-scenario tables every shard is evaluated against (run_fleet() arguments, same defaults)."""
+    fuels = FUELS if fuels is None else fuels
+    mitigation = mitigation_fuels if mitigation is None else mitigation
+    return {
+        "year": year,
+        "eua_price": float(eua_price),
+        "fx": float(fx),
+        "phase_in_pct": default_phase_in_pct(year) if phase_in_pct is None else phase_in_pct,
+        "per_tonne": per_tonne_factors(compile_factors(fuels), year, gwp_choice, ops, wind),
+        "per_tonne_mitigation": (per_tonne_factors(compile_factors([get_fuel(m) for m in mitigation]), year, gwp_choice,
+                                                   ops, wind) if len(mitigation) else np.zeros((0, 5))),
+        "mitigation_prices_usd": np.asarray(
+            mitigation_prices_usd if mitigation_prices_usd is not None else np.zeros(len(mitigation)), dtype=np.float64),
+        "mitigation": list(mitigation),
+    }
+
+
+def fleet_pool(tables: dict, workers=None, mp_context=None) -> ProcessPoolExecutor:
+    """A process pool whose workers hold `tables` (fleet_tables()), for repeated run_fleet(pool=...) calls."""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_init_worker,
+                               initargs=(tables,), mp_context=mp_context)
+
+
+def run_fleet(quantities, year: int, gwp_choice: str = "AR4", ops: float = 0, wind: float = 1.00,
+              eua_price: float = 0.0, fx: float = 1.0, effective_coverage_pct=100.0, phase_in_pct=None,
+              prices_usd=None, mitigation=None, mitigation_prices_usd=None, fuels=None,
+              workers=None, shard_size: int = 2_000, covered_quantities=None, mp_context=None, pool=None) -> dict:
+    """Evaluate a vessels x fuels tonnage matrix across `workers` processes.
+
+    `effective_coverage_pct` may be a per-vessel array, or `covered_quantities`
+    a matching tonnes x coverage matrix; `prices_usd` a per-fuel vector or
+    vessels x fuels matrix. `mitigation` lists candidate add-on fuels (default:
+    mitigation_fuels, [] to skip) with optional `mitigation_prices_usd`.
+    `mp_context` is passed to the process pool (use "spawn" from threaded
+    hosts). `pool`, a fleet_pool() built from the same scenario arguments, is
+    used instead of starting a pool per call. Returns the merged per-vessel arrays (RESULT_KEYS, in input order)
+    plus a "workers" list with vessels, busy seconds and vessels/s per worker
+    process.
+    """
+    quantities = np.atleast_2d(np.asarray(quantities, dtype=np.float64))
+    n = len(quantities)
+    workers = workers or os.cpu_count() or 1
+    tables = fleet_tables(year, gwp_choice, ops, wind, eua_price, fx, phase_in_pct, mitigation, mitigation_prices_usd,
+                          fuels)
+
+    prices = None if prices_usd is None else np.asarray(prices_usd, dtype=np.float64)
+    coverage = np.asarray(effective_coverage_pct, dtype=np.float64)
+    covered = None if covered_quantities is None else np.atleast_2d(np.asarray(covered_quantities, dtype=np.float64))
+
+    def _task(start):
+        stop = min(start + shard_size, n)
+        shard_prices = prices[start:stop] if prices is not None and prices.ndim == 2 else prices
+        shard_coverage = coverage[start:stop] if coverage.ndim == 1 else coverage
+        return start, quantities[start:stop], shard_prices, shard_coverage, None if covered is None else covered[start:stop]
+
+    merged = {key: np.empty(n, dtype=np.int64 if key == "best_mitigation" else np.float64) for key in RESULT_KEYS}
+    per_worker = {}
+
+    def _collect(start, result, pid, seconds):
+        stop = start + len(result["energy"])
+        for key in RESULT_KEYS:
+            merged[key][start:stop] = result[key]
+        stats = per_worker.setdefault(pid, {"pid": pid, "vessels": 0, "seconds": 0.0})
+        stats["vessels"] += stop - start
+        stats["seconds"] += seconds
+
+    started = time.perf_counter()
+    starts = range(0, n, shard_size)
+    if n <= shard_size or (workers == 1 and pool is None):
+        _init_worker(tables)
+        for start in starts:
+            _collect(*_run_shard(_task(start)))
+    elif pool is not None:
+        for shard in pool.map(_run_shard, (_task(start) for start in starts)):
+            _collect(*shard)
+    else:
+        with fleet_pool(tables, workers, mp_context) as own_pool:
+            for shard in own_pool.map(_run_shard, (_task(start) for start in starts)):
+                _collect(*shard)
+    elapsed = time.perf_counter() - started
+
+    for stats in per_worker.values():
+        stats["vessels_per_s"] = stats["vessels"] / stats["seconds"] if stats["seconds"] > 0 else float("inf")
+    merged["mitigation"] = tables["mitigation"]
+    merged["workers"] = sorted(per_worker.values(), key=lambda s: s["pid"])
+    merged["seconds"] = elapsed
+    merged["vessels_per_s"] = n / elapsed if elapsed > 0 else float("inf")
+    return merged
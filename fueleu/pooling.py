@@ -0,0 +1,147 @@
+"""Fleet pooling: allocate surplus vessels' compliance balance to deficit vessels.
+
+FuelEU pooling rules applied in every pool:
+  * the pool's total compliance balance is not negative;
+  * a surplus vessel never exits the pool in deficit;
+  * a deficit vessel never exits with a larger deficit.
+A deficit vessel may therefore be covered in part. At a fixed GHG intensity its
+penalty is linear in its deficit, at PENALTY_RATE / (GHG intensity *
+VLSFO_ENERGY_CONTENT) EUR per tCO2eq, so filling deficits in descending order
+of that rate until the pool's surplus runs out (the last vessel partly
+covered) maximises the avoided penalty exactly: O(n log n). Surplus vessels
+contribute pro rata to their surplus.
+
+    python -m fueleu.pooling results.csv -o pooled.csv --pools pools.csv
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .constants import PENALTY_RATE, VLSFO_ENERGY_CONTENT
+
+POOL_FIELDS = ["pool", "pooled", "transfer_t", "balance_after_t", "penalty_after_eur"]
+
+
+# === ALLOCATION ===
+def penalty_rate(ghg_intensity) -> np.ndarray:
+    """Penalty (EUR) per tCO2eq of deficit at a vessel's GHG intensity."""
+    ghg = np.asarray(ghg_intensity, dtype=np.float64)
+    with np.errstate(divide="ignore"):
+        return np.where(ghg > 0, PENALTY_RATE * 1_000_000 / (np.where(ghg > 0, ghg, 1.0) * VLSFO_ENERGY_CONTENT), 0.0)
+
+
+def _cover(deficit: np.ndarray, rate: np.ndarray, capacity: float) -> np.ndarray:
+    """Tonnes of each deficit covered: highest penalty rate first, until `capacity` is used up."""
+    order = np.argsort(-rate, kind="stable")
+    before = np.cumsum(deficit[order]) - deficit[order]  # deficit of the higher-rate vessels
+    cover = np.zeros(len(deficit))
+    cover[order] = np.clip(capacity - before, 0.0, deficit[order])
+    return cover
+
+
+def allocate_pools(compliance_balance, ghg_intensity, pools=None) -> dict:
+    """Pool per-vessel compliance balances (tCO2eq) to maximise the avoided penalty.
+
+    `pools` labels each vessel's pool (default: one pool for the whole fleet);
+    vessels labelled None / NaN / "" stay out of every pool. Returns per-vessel
+    arrays (transfer_t: + received / - given, balance_after_t, penalty_before,
+    penalty_after, pooled) and one summary dict per pool in "pools".
+    """
+    balance = np.asarray(compliance_balance, dtype=np.float64)
+    n = len(balance)
+    rate = penalty_rate(ghg_intensity)
+    if pools is None:
+        labels = np.zeros(n, dtype=np.int64)
+        names = ["fleet"]
+    else:
+        series = pd.Series(pools, dtype=object)
+        series = series.where(series.notna() & (series.astype(str) != ""), None)
+        labels, names = pd.factorize(series, use_na_sentinel=True)
+        names = list(names)
+
+    deficit = np.maximum(-balance, 0.0)
+    surplus = np.maximum(balance, 0.0)
+    transfer = np.zeros(n)
+    pooled = np.zeros(n, dtype=bool)
+    summaries = []
+
+    order = np.argsort(labels, kind="stable")
+    bounds = np.searchsorted(labels[order], np.arange(len(names) + 1))
+    for k, name in enumerate(names):
+        members = order[bounds[k]:bounds[k + 1]]
+        donors = members[surplus[members] > 0]
+        takers = members[deficit[members] > 0]
+        capacity = float(surplus[donors].sum())
+        cover = _cover(deficit[takers], rate[takers], capacity) if len(takers) and capacity > 0 else np.zeros(len(takers))
+        admitted = takers[cover > 0]
+        covered = float(cover.sum())
+        if covered > 0:
+            transfer[takers] = cover
+            transfer[donors] = -surplus[donors] * (covered / capacity)
+            pooled[admitted] = True
+            pooled[donors] = True
+        summaries.append({
+            "pool": name,
+            "vessels": int(len(members)),
+            "surplus_t": capacity,
+            "deficit_t": float(deficit[takers].sum()),
+            "covered_t": covered,
+            "admitted": int(len(admitted)),
+            "left_out": int(len(takers) - len(admitted)),
+            "partly_covered": int(((cover > 0) & (cover < deficit[takers])).sum()),
+            "avoided_penalty": float((cover * rate[takers]).sum()),
+        })
+
+    balance_after = balance + transfer
+    return {
+        "pool": np.array([names[c] if c >= 0 else None for c in labels], dtype=object),
+        "pooled": pooled,
+        "transfer_t": transfer,
+        "balance_after_t": balance_after,
+        "penalty_before": deficit * rate,
+        "penalty_after": np.maximum(-balance_after, 0.0) * rate,
+        "pools": summaries,
+    }
+
+
+# === CLI ===
+def pool_results(results: pd.DataFrame, pools=None) -> tuple:
+    """Apply allocate_pools() to fueleu.batch per-vessel results; returns (results + POOL_FIELDS, pool summaries)."""
+    allocation = allocate_pools(results["compliance_balance_t"].to_numpy(), results["ghg_intensity"].to_numpy(), pools)
+    out = results.copy()
+    out["pool"] = allocation["pool"]
+    out["pooled"] = allocation["pooled"]
+    out["transfer_t"] = allocation["transfer_t"]
+    out["balance_after_t"] = allocation["balance_after_t"]
+    out["penalty_after_eur"] = allocation["penalty_after"]
+    return out, allocation["pools"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FuelEU pooling of per-vessel results from fueleu.batch.")
+    parser.add_argument("results", help="per-vessel results CSV written by fueleu.batch")
+    parser.add_argument("-o", "--output", required=True, help="results CSV with pool assignments")
+    parser.add_argument("--pools", help="CSV with vessel and pool columns (default: one pool for every vessel)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = pd.read_csv(args.results, dtype={"vessel": str})
+    pools = None
+    if args.pools:
+        mapping = pd.read_csv(args.pools, dtype={"vessel": str, "pool": str}).drop_duplicates("vessel")
+        pools = results["vessel"].map(mapping.set_index("vessel")["pool"])
+    out, summaries = pool_results(results, pools)
+    out.to_csv(args.output, index=False)
+
+    for s in summaries:
+        print(f"pool {s['pool']}: {s['admitted']:,}/{s['admitted'] + s['left_out']:,} deficit vessels covered, "
+              f"{s['covered_t']:,.1f} of {s['surplus_t']:,.1f} t surplus used, avoided penalty "
+              f"{s['avoided_penalty']:,.2f} EUR ({s['partly_covered']:,} partly covered)", file=sys.stderr)
+    print(f"{len(out):,} vessels pooled in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Year-by-year compliance projection: every year 2025-2050 in one vectorized pass.
+
+The fuel mix may be constant or a planned trajectory ({year: fuel_inputs},
+linearly interpolated between plan years). Year-dependent rules (target
+bands, RFNBO x2 credit, ETS phase-in and non-CO2 scope) are applied as arrays
+over the year axis instead of re-running compute_blend() per year.
+"""
+import numpy as np
+
+from .constants import (
+    BASE_TARGET,
+    ETS_NONCO2_FROM,
+    PENALTY_RATE,
+    REDUCTIONS,
+    RFNBO_REWARD_UNTIL,
+    VLSFO_ENERGY_CONTENT,
+)
+from .engine import _with_defaults
+from .factors import compile_factors, derived_factors, per_tonne_factors
+from .fuels import FUEL_INDEX
+
+PROJECTION_YEARS = np.arange(2025, 2051)
+
+# target_intensity() bands: up to 2020 no reduction, then each milestone's
+# reduction applies until the year before the next milestone
+_MILESTONES = sorted(REDUCTIONS)
+_TARGET_BAND_ENDS = np.array([_MILESTONES[0] - 5] + [m - 1 for m in _MILESTONES[1:]])
+_TARGET_REDUCTIONS = np.array([0.0] + [REDUCTIONS[m] for m in _MILESTONES])
+
+
+# === YEARLY RULES ===
+def target_series(years) -> np.ndarray:
+    """Vectorized target_intensity() (gCO2eq/MJ) for an array of years."""
+    band = np.searchsorted(_TARGET_BAND_ENDS, np.asarray(years), side="left")
+    return BASE_TARGET * (1 - _TARGET_REDUCTIONS[band])
+
+
+def phase_in_series(years) -> np.ndarray:
+    """Vectorized default_phase_in_pct(): 0% up to 2024, 70% in 2025, 100% after."""
+    years = np.asarray(years)
+    return np.where(years <= 2024, 0.0, np.where(years == 2025, 70.0, 100.0))
+
+
+# === FUEL MIX ===
+def custom_key(position: int) -> tuple:
+    """Plan key of inputs["custom_fuels"][position]; stock fuels are keyed by their name."""
+    return ("custom", position)
+
+
+def mix_matrix(plan: dict, years, keys: list) -> np.ndarray:
+    """(n_years, n_fuels) tonnage for a {year: {fuel key: t}} plan, linear between plan years.
+
+    `keys` are the column keys: stock fuel names and custom_key() tuples.
+    Years before the first / after the last plan year hold that plan's mix.
+    Fuels missing from a plan year count as 0 t in that year.
+    """
+    years = np.asarray(years)
+    plan_years = sorted(plan)
+    column = {key: j for j, key in enumerate(keys)}
+    points = np.zeros((len(plan_years), len(keys)))
+    for i, plan_year in enumerate(plan_years):
+        for key, qty in plan[plan_year].items():
+            if key in column:
+                points[i, column[key]] = float(qty or 0.0)
+    quantities = np.zeros((len(years), len(keys)))
+    for j in np.flatnonzero(points.any(axis=0)):
+        quantities[:, j] = np.interp(years, plan_years, points[:, j])
+    return quantities
+
+
+# === PROJECTION ===
+def project(inputs: dict, years=None, plan=None, phase_in_pct=None, eua_price=None) -> dict:
+    """Project intensity, balance, penalty and ETS cost for each year.
+
+    `inputs` follows DEFAULT_BLEND_INPUTS (its "year" and "phase_in_pct" are
+    ignored). Without `plan` the blend's fuel_inputs and custom fuel
+    quantities are held constant. A `plan` keys stock fuels by name and
+    custom fuels by custom_key(position in inputs["custom_fuels"]), so custom
+    fuels sharing a name, or named like a stock fuel, stay separate.
+    `phase_in_pct` and `eua_price` may be scalars or per-year sequences
+    (default: the regulatory phase-in schedule and inputs["eua_price"]).
+    Returns per-year arrays keyed like compute_blend() results.
+    """
+    inputs = _with_defaults(inputs)
+    years = np.asarray(PROJECTION_YEARS if years is None else years, dtype=np.int64)
+    gwp_choice, ops, wind = inputs["gwp_choice"], inputs["ops"], inputs["wind"]
+
+    # Stock fuels use the cached factor tables; pre/post RFNBO credit years differ only by the x2 energy
+    early = derived_factors(gwp_choice, ops, wind, RFNBO_REWARD_UNTIL)
+    late = derived_factors(gwp_choice, ops, wind, RFNBO_REWARD_UNTIL + 1)
+    names = list(early["names"])
+    keys = list(names)
+    pt_early, pt_late = early["per_tonne"], late["per_tonne"]
+    prices_usd = [float(inputs["fuel_price_inputs"].get(name, 0.0) or 0.0) for name in names]
+
+    custom = [(i, cf) for i, cf in enumerate(inputs["custom_fuels"])
+              if plan is not None or float(cf.get("qty_t", 0.0)) > 0]
+    if custom:
+        custom_factors = compile_factors([cf for _, cf in custom])
+        pt_early = np.vstack([pt_early, per_tonne_factors(custom_factors, RFNBO_REWARD_UNTIL, gwp_choice, ops, wind)])
+        pt_late = np.vstack([pt_late, per_tonne_factors(custom_factors, RFNBO_REWARD_UNTIL + 1, gwp_choice, ops, wind)])
+        names += custom_factors["names"]
+        keys += [custom_key(i) for i, _ in custom]
+        prices_usd += [float(cf.get("price_usd", 0.0) or 0.0) for _, cf in custom]
+
+    if plan is None:
+        # Constant mix, placed by position so custom fuels never shadow a stock fuel of the same name
+        current = np.zeros(len(names))
+        for name, qty in inputs["fuel_inputs"].items():
+            if name in FUEL_INDEX:
+                current[FUEL_INDEX[name]] = float(qty or 0.0)
+        current[len(FUEL_INDEX):] = [float(cf.get("qty_t", 0.0) or 0.0) for _, cf in custom]
+        quantities = np.broadcast_to(current, (len(years), len(names)))
+    else:
+        quantities = mix_matrix(plan, years, keys)
+
+    used = np.flatnonzero(quantities.any(axis=0))
+    q = quantities[:, used]
+    credit = (years <= RFNBO_REWARD_UNTIL)[:, None, None]
+    per_tonne = np.where(credit, pt_early[used][None], pt_late[used][None])  # (years, fuels, 5)
+    energy, wtt, ttw_co2, ttw_nonco2, wtw_only = np.einsum("yf,yfk->ky", q, per_tonne)
+    emissions = wtt + ttw_co2 + ttw_nonco2 + wtw_only
+
+    target = target_series(years)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ghg = np.where(energy > 0, emissions / np.where(energy > 0, energy, 1.0), 0.0)
+        balance = energy * (target - ghg) / 1_000_000.0
+        penalty = np.where(balance < 0, -balance / np.where(ghg > 0, ghg, 1.0) / VLSFO_ENERGY_CONTENT
+                           * PENALTY_RATE * 1_000_000, 0.0)
+
+    phase = phase_in_series(years) if phase_in_pct is None else np.broadcast_to(np.asarray(phase_in_pct, dtype=float), years.shape)
+    eua = np.broadcast_to(np.asarray(inputs["eua_price"] if eua_price is None else eua_price, dtype=float), years.shape)
+    include_nonco2 = years >= ETS_NONCO2_FROM
+    ets_covered = ((ttw_co2 + np.where(include_nonco2, ttw_nonco2, 0.0))
+                   * (inputs["effective_coverage_pct"] / 100.0) * (phase / 100.0) / 1_000_000.0)
+
+    price = np.array(prices_usd)[used]
+    fuel_cost = q @ price * float(inputs["exchange_rate"])
+
+    return {
+        "years": years,
+        "fuels": [names[j] for j in used],
+        "fuel_keys": [keys[j] for j in used],
+        "quantities": q,
+        "target": target,
+        "total_energy": energy,
+        "wtt_sum": wtt,
+        "ttw_co2_sum": ttw_co2,
+        "ttw_nonco2_sum": ttw_nonco2,
+        "emissions_tonnes": emissions / 1_000_000.0,
+        "ghg_intensity": ghg,
+        "compliance_balance": balance,
+        "penalty": penalty,
+        "include_nonco2_in_ets": include_nonco2,
+        "phase_in_pct": phase,
+        "ets_covered_tonnes": ets_covered,
+        "ets_cost": ets_covered * eua,
+        "total_cost": fuel_cost,
+    }
@@ -0,0 +1,466 @@
+"""Per-vessel FuelEU / EU ETS PDF reports, rendered in bulk into a ZIP archive.
+
+Charts are rendered once in the parent (as JPEG, which FPDF embeds without
+re-encoding) and handed to every worker through the pool initializer; workers
+only compute the blend and lay out text. Finished PDFs are written to the ZIP
+in input order while later shards are still rendering.
+
+    python -m fueleu.report consumption.csv -o reports.zip --year 2026 --eua-price 75 --sections summary,ets,line_chart
+"""
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+import io
+import os
+import re
+import sys
+import time
+import zipfile
+
+import numpy as np
+from fpdf import FPDF
+
+from .batch import DEFAULT_COLUMNS, accumulate, iter_chunks, load_custom_fuels, new_totals, parse_columns
+from .constants import ETS_NONCO2_FROM
+from .engine import DEFAULT_BLEND_INPUTS, GWP_VALUES, compute_blend, default_phase_in_pct, target_intensity
+from .factors import compile_factors, per_tonne_factors
+from .fuels import FUEL_INDEX, FUELS, get_fuel
+from .mitigation import solve_pooling
+
+# Same toggles and defaults as the app's "PDF sections to include"
+REPORT_SECTIONS = {
+    "summary": True,
+    "ets": False,
+    "fuel_table": True,
+    "fuel_details": False,
+    "split_totals": False,
+    "mitigation": True,
+    "cost_benefit": True,
+    "line_chart": False,
+    "stack_chart": False,
+}
+
+CHART_TITLES = {
+    "line_chart": "Sector-wide GHG Intensity Targets",
+    "stack_chart": "Regulatory Dynamics: FuelEU vs EU ETS",
+}
+CHART_GAP_MM = 30
+REPORT_CHART_DPI = 150  # shared chart images; ~1,300 px across the A4 printable width
+
+_WORKER = {}  # per-process scenario, sections and chart assets set by _init_worker
+
+_NEXT = {"new_x": "LMARGIN", "new_y": "NEXT"}
+
+
+# === SHARED ASSETS ===
+def shared_assets(scenario: dict, sections: dict) -> dict:
+    """Render the charts every report shares: the bare sector target path and the
+    FuelEU vs ETS dynamics at the scenario's coverage. Returns {section: (jpeg, size_in)}."""
+    from .charts import render_chart
+
+    assets = {}
+    if sections.get("line_chart"):
+        assets["line_chart"] = render_chart("target", None, scenario["year"], fmt="jpg", dpi=REPORT_CHART_DPI)
+    if sections.get("stack_chart"):
+        assets["stack_chart"] = render_chart("dynamics", scenario["effective_coverage_pct"], fmt="jpg",
+                                             dpi=REPORT_CHART_DPI)
+    return assets
+
+
+# === SINGLE REPORT ===
+def _wrapped(pdf, w, h, text):
+    """multi_cell() stand-in for the core fonts: greedy word wrap, one cell() per line.
+
+    fpdf2's multi_cell and get_string_width parse text fragments on every call,
+    which dominated bulk rendering; word widths come straight from the font's
+    character widths instead.
+    """
+    cw = pdf.current_font.cw
+    scale = pdf.font_size_pt * 0.001 / pdf.k  # glyph units -> user units
+    max_w = w - 2 * pdf.c_margin
+    space = cw[" "] * scale
+    line, line_w = [], 0.0
+    for word in text.split(" "):
+        word_w = sum(cw.get(c, 0) for c in word) * scale
+        if line and line_w + space + word_w > max_w:
+            pdf.cell(w, h, " ".join(line), **_NEXT)
+            line, line_w = [word], word_w
+        else:
+            line_w += (space if line else 0.0) + word_w
+            line.append(word)
+    pdf.cell(w, h, " ".join(line), **_NEXT)
+
+
+def _bullet(pdf, title, total_value, parts):
+    pdf.set_font("Helvetica", "B", 11)
+    pdf.cell(200, 8, text=f"- {title}: {total_value:,.2f} Eur", **_NEXT)
+    shown = [(k, v) for (k, v) in parts if (v is not None and float(v) != 0.0)]
+    if shown:
+        pdf.set_font("Helvetica", "", 10)
+        pieces = " + ".join([f"{k}: {float(v):,.2f}" for k, v in shown])
+        _wrapped(pdf, 200, 6, f"    = {pieces}")
+
+
+def layout_report(inputs: dict, blend: dict, sections: dict, assets=None, vessel=None, added_fuels=None,
+                  replacement=None):
+    """Lay out one report on a new FPDF document and return it (the app's export and the bulk reports).
+
+    `inputs` are the compute_blend() inputs and `blend` its result (either
+    backend); `vessel` adds a vessel line to the summary. `assets` maps
+    line_chart / stack_chart to (image bytes, size_in). Cost-benefit covers the
+    base case, pooling when `inputs["pooling_price_usd"]` is set and, from the
+    app's mitigation panels, `added_fuels` = (cost, ETS cost) and `replacement`
+    = (additional fuel cost, ETS cost or None), all in EUR.
+    """
+    assets = assets or {}
+    year = inputs["year"]
+    eua_price = inputs["eua_price"]
+    rows = blend["rows"]
+    penalty = blend["penalty"]
+    ets_cost = blend["ets_cost"]
+
+    pdf = FPDF()
+    pdf.add_page()
+
+    if sections.get("summary"):
+        pdf.set_font("Helvetica", style="BU", size=12)
+        pdf.cell(200, 10, text="Fuel EU Maritime GHG & Penalty Report", align="C", **_NEXT)
+        pdf.set_font("Helvetica", "B", size=11)
+        if vessel is not None:
+            pdf.cell(200, 10, text=f"Vessel: {vessel}", **_NEXT)
+        pdf.cell(200, 10, text=f"Year: {year} | GWP: {inputs['gwp_choice']}", **_NEXT)
+        pdf.cell(200, 10, text=f"EU Target for {year}: {target_intensity(year):.2f} gCO2eq/MJ", **_NEXT)
+        pdf.cell(200, 10, text=f"GHG Intensity: {blend['ghg_intensity']:.2f} gCO2eq/MJ", **_NEXT)
+        pdf.cell(200, 10, text=f"Compliance Balance: {blend['compliance_balance']:,.0f} tCO2eq", **_NEXT)
+        pdf.cell(200, 10, text=f"Penalty: {penalty:,.0f} Eur", **_NEXT)
+
+    if sections.get("ets"):
+        pdf.set_font("Helvetica", size=10)
+        pdf.cell(200, 10, text=f"ETS Coverage (effective): {inputs['effective_coverage_pct']:.1f}%", **_NEXT)
+        pdf.cell(200, 10, text=f"ETS Phase-in: {inputs['phase_in_pct']}%", **_NEXT)
+        pdf.cell(200, 10, text=f"ETS includes CH4/N2O/slip: {'Yes' if blend['include_nonco2_in_ets'] else 'No (CO2-only)'}", **_NEXT)
+        if eua_price > 0:
+            pdf.cell(200, 10, text=f"ETS-eligible TtW (covered): {blend['ets_covered_tonnes']:,.0f} tCO2eq", **_NEXT)
+            pdf.cell(200, 10, text=f"EU ETS Cost: {ets_cost:,.0f} Eur", **_NEXT)
+
+    if sections.get("split_totals"):
+        # Decimal(): the float backend returns float sums
+        ttw_co2_t = float(Decimal(blend["ttw_co2_sum"]) / Decimal("1000000"))
+        ttw_nonco2_t = float(Decimal(blend["ttw_nonco2_sum"]) / Decimal("1000000"))
+        pdf.cell(200, 10, text=f"TtW Total: {ttw_co2_t + ttw_nonco2_t:,.0f} tCO2eq (CO2: {ttw_co2_t:,.0f} | non-CO2: {ttw_nonco2_t:,.0f})", **_NEXT)
+        pdf.cell(200, 10, text=f"WtT Total: {float(Decimal(blend['wtt_sum']) / Decimal('1000000')):,.0f} tCO2eq", **_NEXT)
+        pdf.cell(200, 10, text=f"Total Emissions (WtW): {blend['emissions_tonnes']:,.0f} tCO2eq", **_NEXT)
+        pdf.ln(5)
+
+    if sections.get("fuel_table"):
+        pdf.set_font("Helvetica", "U", size=10)
+        pdf.cell(200, 8, text="Fuel Breakdown:", **_NEXT)
+        pdf.set_font("Helvetica", size=10)
+        if blend["user_entered_prices"]:
+            for row in rows:
+                line = (f"{row['Fuel']}: {row['Quantity (t)']:,.0f} t @ {row.get('Price per Tonne (USD)') or 0.0:,.2f} USD/t | "
+                        f"{row.get('Cost (Eur)') or 0.0:,.2f} Eur | GHG Intensity: {row['GHG Intensity (gCO2eq/MJ)']:.2f} gCO2eq/MJ")
+                _wrapped(pdf, 200, 6, line)
+            pdf.ln(2)
+            pdf.set_font("Helvetica", size=8)
+            pdf.cell(200, 6, text=f"Conversion Rate Used: 1 USD = {inputs['exchange_rate']:.6f} Eur", **_NEXT)
+            pdf.set_font("Helvetica", "B", size=11)
+            rollup = blend["total_cost"] + penalty + (ets_cost if eua_price > 0 else 0.0)
+            pdf.cell(200, 8, text=f"Total Cost: {rollup:,.2f} Eur", **_NEXT)
+        else:
+            for row in rows:
+                pdf.cell(200, 6, text=f"{row['Fuel']}: {row['Quantity (t)']:,.0f} t | GHG Intensity: "
+                                      f"{row['GHG Intensity (gCO2eq/MJ)']:.2f} gCO2eq/MJ", **_NEXT)
+
+    if sections.get("fuel_details"):
+        pdf.ln(3)
+        pdf.set_font("Helvetica", "U", 10)
+        pdf.cell(200, 8, "Fuel Details (LCV & Emission Factors):", **_NEXT)
+        pdf.set_font("Helvetica", size=9)
+        fuel_inputs = inputs["fuel_inputs"]
+        selected = sorted((n for n, qty in fuel_inputs.items() if qty > 0 and n in FUEL_INDEX), key=FUEL_INDEX.get)
+        for f in map(get_fuel, selected):
+            line = (f"{f['name']} | LCV {f['lcv']:.4f} MJ/g | WtT {f['wtt']:.2f} g/MJ | "
+                    f"TtW CO2 {f['ttw_co2']:.3f} g/g | CH4 {f['ttw_ch4']:.5f} g/g | "
+                    f"N2O {f['ttw_n2O']:.5f} g/g")
+            if f.get("ch4_slip"):
+                line += f" | CH4 slip {float(f['ch4_slip']):.1f} g/MJ"
+            _wrapped(pdf, 200, 5, line)
+        for cf in inputs["custom_fuels"]:
+            if float(cf.get("qty_t", 0)) <= 0:
+                continue
+            if str(cf.get("mode", "Basic")).startswith("Basic"):
+                line = (f"{cf.get('name','Custom fuel')} (custom; WtW-only) | "
+                        f"LCV {float(cf.get('lcv',0.0)):.4f} MJ/g | WtW {float(cf.get('wtw',0.0)):.2f} g/MJ")
+            else:
+                line = (f"{cf.get('name','Custom fuel')} (custom) | LCV {float(cf.get('lcv',0.0)):.4f} MJ/g | "
+                        f"WtT {float(cf.get('wtt',0.0)):.2f} g/MJ | TtW CO2 {float(cf.get('ttw_co2',0.0)):.3f} g/g | "
+                        f"CH4 {float(cf.get('ttw_ch4',0.0)):.5f} g/g | N2O {float(cf.get('ttw_n2o',0.0)):.5f} g/g")
+                if float(cf.get("ch4_slip", 0.0)):
+                    line += f" | CH4 slip {float(cf['ch4_slip']):.1f} g/MJ"
+            _wrapped(pdf, 200, 5, line)
+        pdf.set_font("Helvetica", size=8)
+        _wrapped(pdf, 200, 5, "Note: Custom fuels entered in Basic mode are excluded from ETS and the split totals (TtW/WtT).")
+
+    if sections.get("mitigation") and blend["compliance_balance"] < 0:
+        pdf.ln(5)
+        pdf.set_font("Helvetica", style="BU", size=10)
+        pdf.cell(200, 10, text="Mitigation Overview", **_NEXT)
+        pdf.set_font("Helvetica", size=10)
+        pdf.cell(200, 10, text=f"CO2 Deficit to Offset: {abs(blend['compliance_balance']):,.0f} tCO2eq", **_NEXT)
+
+    if sections.get("cost_benefit") and blend["user_entered_prices"]:
+        total_cost = blend["total_cost"]
+        pdf.ln(5)
+        pdf.set_font("Helvetica", "B", 12)
+        pdf.cell(200, 10, text="--- Cost-Benefit Analysis ---", **_NEXT)
+
+        base_parts = [("Initial fuels", total_cost)]
+        label_bits = ["Initial fuels"]
+        base_total = total_cost
+        if penalty > 0:
+            base_parts.append(("Penalty", penalty))
+            label_bits.append("Penalty")
+            base_total += penalty
+        if eua_price > 0:
+            base_parts.append(("EU ETS", ets_cost))
+            label_bits.append("EU ETS")
+            base_total += ets_cost
+        _bullet(pdf, " + ".join(label_bits), base_total, base_parts)
+
+        pool_cost = solve_pooling(blend, float(inputs.get("pooling_price_usd", 0.0)), float(inputs["exchange_rate"]))
+        if pool_cost > 0:
+            pool_parts = [("Initial fuels", total_cost), ("Pooling", pool_cost)]
+            pool_label = "Initial fuels + Pooling"
+            pool_total = total_cost + pool_cost
+            if eua_price > 0:
+                pool_parts.append(("EU ETS", ets_cost))
+                pool_label += " + EU ETS"
+                pool_total += ets_cost
+            _bullet(pdf, pool_label + " (no Penalty)", pool_total, pool_parts)
+
+        if added_fuels is not None and added_fuels[0] > 0:
+            added_cost, added_ets = added_fuels
+            bio_parts = [("Initial fuels", total_cost), ("Bio fuels", added_cost)]
+            bio_label = "Initial fuels + Bio fuels"
+            bio_total = total_cost + added_cost
+            if eua_price > 0:
+                bio_parts.append(("EU ETS", added_ets))
+                bio_label += " + EU ETS"
+                bio_total += added_ets
+            _bullet(pdf, bio_label + " (no Penalty)", bio_total, bio_parts)
+
+        if replacement is not None:
+            extra_cost, repl_ets = replacement
+            repl_ets = float(repl_ets) if (eua_price > 0 and repl_ets is not None) else 0.0
+            _bullet(pdf, "Fuel Replacement" + (" + EU ETS, no Penalty" if eua_price > 0 else ", no Penalty"),
+                    float(total_cost) + float(extra_cost) + repl_ets,
+                    [("Initial fuels", total_cost), ("Additional fuel cost", extra_cost), ("EU ETS", repl_ets)])
+
+    chart_blocks = [(CHART_TITLES[key], *assets[key]) for key in ("line_chart", "stack_chart")
+                    if sections.get(key) and key in assets]
+    if chart_blocks:
+        pdf.add_page()
+        content_w = pdf.w - pdf.l_margin - pdf.r_margin
+        for title, image, (w_in, h_in) in chart_blocks:
+            title_h = 6
+            img_h_mm = content_w * (h_in / w_in)
+            if title_h + img_h_mm + 5 > pdf.h - pdf.b_margin - pdf.get_y():
+                pdf.add_page()
+            pdf.set_font("Helvetica", "B", 11)
+            pdf.cell(0, title_h, text=title, **_NEXT)
+            y_img = pdf.get_y()
+            pdf.image(io.BytesIO(image), x=pdf.l_margin, y=y_img, w=content_w)
+            pdf.set_y(y_img + img_h_mm + CHART_GAP_MM)
+
+    return pdf
+
+
+def build_report(vessel: str, inputs: dict, blend: dict, sections: dict, assets=None) -> bytes:
+    """One vessel's report as PDF bytes (layout_report() with the vessel line, as in the bulk archive)."""
+    return bytes(layout_report(inputs, blend, sections, assets, vessel=vessel).output())
+
+
+# === BULK RENDERING ===
+def _init_worker(shared: dict):
+    _WORKER.clear()
+    _WORKER.update(shared)
+
+
+def _render_shard(vessels: list) -> list:
+    """Render (vessel name, pdf bytes, seconds) for a shard using the worker's shared scenario and assets."""
+    out = []
+    for vessel in vessels:
+        started = time.perf_counter()
+        inputs = {**_WORKER["scenario"], **vessel}
+        inputs["custom_fuels"] = inputs.get("custom_fuels") or []
+        blend = compute_blend(inputs, backend="decimal")  # audit reports always use the reference
+        data = build_report(vessel["vessel"], inputs, blend, _WORKER["sections"], _WORKER["assets"])
+        out.append((vessel["vessel"], data, time.perf_counter() - started))
+    return out
+
+
+def report_filename(vessel, taken: set) -> str:
+    """Filesystem-safe, unique `<vessel>.pdf` name within the archive."""
+    stem = re.sub(r"[^\w.-]+", "_", str(vessel)).strip("._") or "vessel"
+    name, n = f"{stem}.pdf", 1
+    while name in taken:
+        n += 1
+        name = f"{stem}_{n}.pdf"
+    taken.add(name)
+    return name
+
+
+def _shards(vessels, shard_size: int):
+    shard = []
+    for vessel in vessels:
+        shard.append(vessel)
+        if len(shard) == shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def write_reports(vessels, out, scenario=None, sections=None, workers=None, shard_size: int = 25,
+                  progress=None, mp_context=None) -> dict:
+    """Render one PDF per vessel into the ZIP archive `out` (path or binary file object).
+
+    `vessels` is an iterable of dicts with a "vessel" name plus per-vessel
+    compute_blend() inputs (fuel_inputs, fuel_price_inputs, custom_fuels,
+    effective_coverage_pct); `scenario` holds the shared inputs (year, GWP,
+    prices, and optionally pooling_price_usd); `sections` overrides
+    REPORT_SECTIONS. At most two shards per worker are in flight, so memory
+    stays flat for any fleet size. `progress(reports_written)` is called after
+    every shard; `mp_context` is passed to the process pool (use "spawn" from
+    threaded hosts). Returns counts, bytes and timings.
+    """
+    scenario = {**DEFAULT_BLEND_INPUTS, **(scenario or {})}
+    scenario.pop("fuel_inputs")
+    scenario.pop("fuel_price_inputs")
+    if scenario.get("phase_in_pct") is None:
+        scenario["phase_in_pct"] = default_phase_in_pct(scenario["year"])
+    sections = {**REPORT_SECTIONS, **(sections or {})}
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    shared = {"scenario": scenario, "sections": sections, "assets": shared_assets(scenario, sections)}
+    assets_s = time.perf_counter() - started
+
+    stats = {"reports": 0, "pdf_bytes": 0, "render_seconds": 0.0, "assets_seconds": assets_s}
+    taken = set()
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+
+        def _write(rendered):
+            for vessel, data, seconds in rendered:
+                archive.writestr(report_filename(vessel, taken), data)
+                stats["reports"] += 1
+                stats["pdf_bytes"] += len(data)
+                stats["render_seconds"] += seconds
+            if progress is not None:
+                progress(stats["reports"])
+
+        if workers == 1:
+            _init_worker(shared)
+            for shard in _shards(vessels, shard_size):
+                _write(_render_shard(shard))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,),
+                                     mp_context=mp_context) as pool:
+                pending = deque()
+                for shard in _shards(vessels, shard_size):
+                    pending.append(pool.submit(_render_shard, shard))
+                    if len(pending) >= 2 * workers:
+                        _write(pending.popleft().result())
+                while pending:
+                    _write(pending.popleft().result())
+
+    stats["seconds"] = time.perf_counter() - started
+    stats["reports_per_s"] = stats["reports"] / stats["seconds"] if stats["seconds"] > 0 else float("inf")
+    return stats
+
+
+# === CONSUMPTION FILE INPUT ===
+def vessels_from_consumption(path: str, year: int, gwp_choice: str = "AR4", ops: float = 0, wind: float = 1.00,
+                             custom_fuels=None, columns=None, chunksize: int = 200_000) -> list:
+    """Aggregate a consumption file (same format as fueleu.batch) into per-vessel report inputs.
+
+    Each vessel's voyage mix becomes one effective ETS coverage, weighted by the
+    ETS-eligible TtW emissions so covered tonnes match fueleu.batch, and fuel
+    prices become tonnage-weighted averages.
+    """
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    custom_fuels = list(custom_fuels or [])
+    fuels = FUELS + custom_fuels
+    factors = compile_factors(fuels)
+    per_tonne = per_tonne_factors(factors, year, gwp_choice, ops, wind)
+    ets_pt = per_tonne[:, 2] + (per_tonne[:, 3] if year >= ETS_NONCO2_FROM else 0.0)  # ETS basis per tonne
+    fuel_index = {name.casefold(): j for j, name in enumerate(factors["names"])}
+    fuel_index.update({name: j for j, name in enumerate(factors["names"])})
+
+    totals = new_totals(len(fuels))
+    unknown = {}
+    for chunk in iter_chunks(path, list(columns.values()), chunksize):
+        accumulate(totals, chunk, fuel_index, columns, unknown)
+
+    n_stock = len(FUELS)
+    vessels = []
+    for i, name in enumerate(totals["names"]):
+        qty, cost = totals["qty"][i], totals["cost_usd"][i]
+        basis = qty @ ets_pt
+        coverage = 100.0 * (totals["qty_covered"][i] @ ets_pt) / basis if basis > 0 else 100.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price = np.where(qty > 0, cost / np.where(qty > 0, qty, 1.0), 0.0)
+        used = np.flatnonzero(qty > 0)
+        vessels.append({
+            "vessel": name,
+            "fuel_inputs": {factors["names"][j]: float(qty[j]) for j in used if j < n_stock},
+            "fuel_price_inputs": {factors["names"][j]: float(price[j]) for j in used if j < n_stock},
+            "custom_fuels": [{**custom_fuels[j - n_stock], "qty_t": float(qty[j]), "price_usd": float(price[j])}
+                             for j in used if j >= n_stock],
+            "effective_coverage_pct": float(coverage),
+        })
+    return vessels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-vessel FuelEU / EU ETS PDF reports in a ZIP archive.")
+    parser.add_argument("input", help="CSV or Parquet consumption file (see fueleu.batch)")
+    parser.add_argument("-o", "--output", required=True, help="ZIP archive to write")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--gwp", choices=sorted(GWP_VALUES), default="AR4")
+    parser.add_argument("--ops", type=float, default=0, help="OPS reward factor (%%)")
+    parser.add_argument("--wind", type=float, default=1.00, help="wind reward factor")
+    parser.add_argument("--eua-price", type=float, default=0.0, help="EUR/tCO2eq")
+    parser.add_argument("--fx", type=float, default=1.0, help="EUR per USD for fuel prices")
+    parser.add_argument("--phase-in", type=float, default=None, help="ETS phase-in (%%), default by year")
+    parser.add_argument("--pooling-price", type=float, default=0.0, help="USD/tCO2eq, adds a pooling cost line")
+    parser.add_argument("--custom-fuels", help="JSON list of custom fuel definitions")
+    parser.add_argument("--col", action="append", metavar="KEY=NAME",
+                        help="input column names, keys: " + ", ".join(DEFAULT_COLUMNS))
+    parser.add_argument("--sections", help="comma-separated sections to include (default: the app's defaults); "
+                                           "choices: " + ", ".join(REPORT_SECTIONS))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    sections = None
+    if args.sections:
+        chosen = {s.strip() for s in args.sections.split(",") if s.strip()}
+        if chosen - set(REPORT_SECTIONS):
+            raise SystemExit(f"unknown sections: {', '.join(sorted(chosen - set(REPORT_SECTIONS)))}")
+        sections = {key: key in chosen for key in REPORT_SECTIONS}
+
+    custom = load_custom_fuels(args.custom_fuels) if args.custom_fuels else None
+    vessels = vessels_from_consumption(args.input, args.year, args.gwp, args.ops, args.wind,
+                                       custom_fuels=custom, columns=parse_columns(args.col))
+    scenario = {"year": args.year, "gwp_choice": args.gwp, "ops": args.ops, "wind": args.wind,
+                "eua_price": args.eua_price, "exchange_rate": args.fx, "phase_in_pct": args.phase_in,
+                "pooling_price_usd": args.pooling_price}
+    stats = write_reports(vessels, args.output, scenario=scenario, sections=sections, workers=args.workers)
+    print(f"{stats['reports']:,} reports ({stats['pdf_bytes'] / 1e6:,.1f} MB) in {stats['seconds']:.2f}s "
+          f"({stats['reports_per_s']:,.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Monte Carlo cost risk: EUA price, FX and fuel prices as correlated distributions.
+
+Every strategy's cost is linear in the prices:
+    cost = fx * sum(tonnes_i * price_usd_i) + eua * ets_covered_t + fixed_eur
+so a strategy reduces to a row of tonnages per priced item (fuels, pooling
+credits), its ETS-covered tonnes (compute_ets_cost) and a fixed EUR part (the
+FuelEU penalty). Samples are drawn with a Gaussian copula (correlated standard
+normals mapped to each marginal) and evaluated in batches with one matrix
+product per batch.
+"""
+import math
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from .engine import _with_defaults, compute_ets_cost
+from .fuels import FUEL_INDEX, alternative_fuels, initial_fuels
+from .mitigation import solve_add_fuel_all, solve_substitution_all
+from .projection import custom_key
+
+POOLING = "pooling"  # price variable for pooling credits (USD/tCO2eq)
+MARKET_VARIABLES = ("eua", "fx")  # EUR/tCO2eq, EUR per USD
+
+DISTRIBUTIONS = {
+    "fixed": ("value",),
+    "normal": ("mean", "sd"),          # truncated at 0
+    "lognormal": ("mean", "sd"),       # mean / sd of the price itself
+    "uniform": ("low", "high"),
+    "triangular": ("low", "mode", "high"),
+}
+
+SIM_BATCH = 100_000  # samples evaluated per matrix product
+SIM_PERCENTILES = (5, 50, 95)
+
+
+# === STRATEGY COST MODEL ===
+def _ets_covered(inputs: dict, ttw_co2_g: float, ttw_nonco2_g: float, include_nonco2: bool) -> float:
+    # Covered tonnes at a unit EUA price; the sampled price scales it linearly
+    return compute_ets_cost(Decimal(repr(float(ttw_co2_g))), Decimal(repr(float(ttw_nonco2_g))), 1.0,
+                            inputs["effective_coverage_pct"], inputs["phase_in_pct"], include_nonco2)[1]
+
+
+def _row_keys(inputs: dict) -> list:
+    """Item key of each compute_blend() breakdown row, in row order (stock fuels in FUELS order, then custom)."""
+    fuel_inputs = inputs["fuel_inputs"]
+    keys = [name for name in sorted((n for n in fuel_inputs if n in FUEL_INDEX), key=FUEL_INDEX.get)
+            if float(fuel_inputs[name] or 0.0) > 0]
+    keys += [custom_key(i) for i, cf in enumerate(inputs["custom_fuels"]) if float(cf.get("qty_t", 0.0) or 0.0) > 0]
+    return keys
+
+
+def strategy_model(inputs: dict, result: dict, mitigation_prices_usd=None, pooling_price_usd: float = 0.0) -> dict:
+    """Build the linear cost model of the cost-benefit strategies for a blend.
+
+    Strategies: the blend as is (+ penalty), pooling the deficit (if priced),
+    adding each priced mitigation fuel, and replacing each fossil fuel in the
+    blend with each priced mitigation fuel (feasible swaps only). Mitigation
+    fuel prices (USD/t) come from `mitigation_prices_usd`, then the blend's
+    fuel prices; unpriced mitigation fuels are not strategies.
+    """
+    inputs = _with_defaults(inputs)
+    prices_usd = dict(inputs["fuel_price_inputs"])
+    prices_usd.update({name: p for name, p in (mitigation_prices_usd or {}).items() if p and p > 0})
+
+    # Items: the blend's breakdown rows (stock fuels by name, custom fuels by custom_key(), since custom
+    # fuels may share a display label), priced mitigation fuels, pooling credits
+    items = _row_keys(inputs)
+    labels = [row["Fuel"] for row in result["rows"]]
+    point = {key: row["Price per Tonne (USD)"] for key, row in zip(items, result["rows"])}
+    base_tonnes = [row["Quantity (t)"] for row in result["rows"]]
+    mitigation = [name for name in alternative_fuels if float(prices_usd.get(name, 0.0) or 0.0) > 0]
+    for name in mitigation:
+        if name not in point:
+            items.append(name)
+            labels.append(name)
+            base_tonnes.append(0.0)
+        point[name] = float(prices_usd[name])
+    items.append(POOLING)
+    labels.append("Pooling")
+    base_tonnes.append(0.0)
+    point[POOLING] = float(pooling_price_usd or 0.0)
+    column = {name: j for j, name in enumerate(items)}
+    base_tonnes = np.array(base_tonnes)
+
+    include_nonco2 = result["include_nonco2_in_ets"]
+    strategies, tonnes, covered, fixed = [], [], [], []
+
+    def _add(label, row, covered_t, fixed_eur=0.0):
+        strategies.append(label)
+        tonnes.append(row)
+        covered.append(covered_t)
+        fixed.append(fixed_eur)
+
+    _add("Initial fuels + Penalty", base_tonnes, result["ets_covered_tonnes"], result["penalty"])
+
+    deficit = max(-result["compliance_balance"], 0.0)
+    if deficit > 0 and point[POOLING] > 0:
+        row = base_tonnes.copy()
+        row[column[POOLING]] = deficit
+        _add("Initial fuels + Pooling", row, result["ets_covered_tonnes"])
+
+    if deficit > 0 and mitigation:
+        added = solve_add_fuel_all(inputs, result)
+        position = {name: j for j, name in enumerate(added["names"])}
+        for name in mitigation:
+            j = position[name]
+            if not added["feasible"][j]:
+                continue
+            row = base_tonnes.copy()
+            row[column[name]] += math.ceil(added["required_t"][j])  # as the app's "Required Amount (t)"
+            _add(f"Add {name}", row, _ets_covered(inputs, added["new_ttw_co2"][j], added["new_ttw_nonco2"][j],
+                                                  include_nonco2))
+
+        in_blend = [name for name in initial_fuels if float(inputs["fuel_inputs"].get(name, 0.0) or 0.0) > 0]
+        if in_blend:
+            swaps = solve_substitution_all(inputs, result, in_blend, mitigation)
+            for i, j in zip(*np.nonzero(swaps["feasible"])):
+                initial, substitute = swaps["initial"][i], swaps["alternatives"][j]
+                row = base_tonnes.copy()
+                row[column[initial]] -= swaps["replaced_t"][i, j]
+                row[column[substitute]] += swaps["replaced_t"][i, j]
+                _add(f"Replace {initial} with {substitute}", row,
+                     _ets_covered(inputs, swaps["new_ttw_co2"][i, j], swaps["new_ttw_nonco2"][i, j], include_nonco2))
+
+    point["eua"] = float(inputs["eua_price"])
+    point["fx"] = float(inputs["exchange_rate"])
+    return {
+        "strategies": strategies,
+        "items": items,                  # stock fuel names, custom_key() tuples, POOLING
+        "labels": labels,                # display label per item
+        "tonnes": np.array(tonnes),      # (n_strategies, n_items)
+        "covered": np.array(covered),    # ETS-covered tCO2eq per strategy
+        "fixed": np.array(fixed),        # EUR, independent of prices
+        "point": point,                  # point prices: items (USD), "eua" (EUR), "fx"
+    }
+
+
+def point_costs(model: dict) -> np.ndarray:
+    """Strategy costs (EUR) at the model's point prices."""
+    point = model["point"]
+    prices = np.array([point[name] for name in model["items"]])
+    return point["fx"] * (model["tonnes"] @ prices) + point["eua"] * model["covered"] + model["fixed"]
+
+
+# === SAMPLING ===
+def _norm_cdf(z: np.ndarray) -> np.ndarray:
+    # Abramowitz & Stegun 7.1.26 erf (|error| < 1.5e-7), vectorized
+    x = np.abs(z) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+def _marginal(dist: dict, z: np.ndarray) -> np.ndarray:
+    kind = dist.get("dist", "fixed")
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution {kind!r} (expected one of {', '.join(DISTRIBUTIONS)})")
+    if kind == "fixed":
+        return np.full(z.shape, float(dist["value"]))
+    if kind == "normal":
+        return np.maximum(dist["mean"] + dist["sd"] * z, 0.0)
+    if kind == "lognormal":
+        mean, sd = float(dist["mean"]), float(dist["sd"])
+        if mean <= 0:
+            return np.zeros(z.shape)
+        sigma2 = math.log1p((sd / mean) ** 2)
+        return np.exp(math.log(mean) - sigma2 / 2 + math.sqrt(sigma2) * z)
+    u = _norm_cdf(z)
+    low, high = float(dist["low"]), float(dist["high"])
+    if kind == "uniform":
+        return low + (high - low) * u
+    mode = float(dist["mode"])
+    if high <= low:
+        return np.full(z.shape, low)
+    split = (mode - low) / (high - low)
+    return np.where(u < split,
+                    low + np.sqrt(u * (high - low) * (mode - low)),
+                    high - np.sqrt((1.0 - u) * (high - low) * (high - mode)))
+
+
+def correlation_matrix(names: list, correlations=None) -> np.ndarray:
+    """Correlation matrix over `names` from {(a, b): rho} pairs (unlisted pairs are 0)."""
+    position = {name: k for k, name in enumerate(names)}
+    corr = np.eye(len(names))
+    for (a, b), rho in (correlations or {}).items():
+        if a in position and b in position and a != b:
+            corr[position[a], position[b]] = corr[position[b], position[a]] = float(rho)
+    return corr
+
+
+def sample_prices(spec: dict, n: int, correlations=None, rng=None) -> dict:
+    """Draw `n` samples of each variable in `spec` ({name: {"dist": ..., params}}), Gaussian-copula correlated."""
+    rng = np.random.default_rng(rng)
+    names = list(spec)
+    try:
+        chol = np.linalg.cholesky(correlation_matrix(names, correlations))
+    except np.linalg.LinAlgError:
+        raise ValueError("price correlations are not a valid (positive definite) correlation matrix") from None
+    z = rng.standard_normal((n, len(names))) @ chol.T
+    return {name: _marginal(spec[name], z[:, k]) for k, name in enumerate(names)}
+
+
+# === SIMULATION ===
+def simulate(model: dict, spec: dict, n: int = 100_000, correlations=None, seed=None,
+             batch_size: int = SIM_BATCH, percentiles=SIM_PERCENTILES, progress=None) -> dict:
+    """Evaluate every strategy's cost under `n` price samples.
+
+    `spec` names the uncertain variables: "eua", "fx", POOLING or any model
+    item (stock fuel name or custom_key()); variables not in `spec` stay at
+    their point price.
+    Returns mean and percentile costs per strategy (EUR) and the share of
+    samples in which each strategy is the cheapest. `progress(samples_done)`
+    is called after every batch.
+    """
+    started = time.perf_counter()
+    variables = set(model["items"]) | set(MARKET_VARIABLES)
+    unknown = [name for name in spec if name not in variables]
+    if unknown:
+        raise ValueError(f"no such price variable(s): {', '.join(map(repr, unknown))}")
+    point = model["point"]
+    n_strategies = len(model["strategies"])
+    rng = np.random.default_rng(seed)
+
+    costs = np.empty((n, n_strategies), dtype=np.float32)  # kept for exact percentiles
+    cheapest = np.zeros(n_strategies, dtype=np.int64)
+    total = np.zeros(n_strategies)
+    base_prices = np.array([point[name] for name in model["items"]])
+    column = {name: j for j, name in enumerate(model["items"])}
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        draws = sample_prices(spec, size, correlations, rng)
+        prices = np.broadcast_to(base_prices, (size, len(base_prices))).copy()
+        for name, values in draws.items():
+            if name in column:
+                prices[:, column[name]] = values
+        fx = draws.get("fx", point["fx"])
+        eua = draws.get("eua", point["eua"])
+        batch = (np.asarray(fx).reshape(-1, 1) * (prices @ model["tonnes"].T)
+                 + np.asarray(eua).reshape(-1, 1) * model["covered"] + model["fixed"])
+        costs[start:start + size] = batch
+        total += batch.sum(axis=0)
+        cheapest += np.bincount(batch.argmin(axis=1), minlength=n_strategies)
+        if progress is not None:
+            progress(start + size)
+
+    return {
+        "strategies": model["strategies"],
+        "n": n,
+        "mean": total / n,
+        "percentiles": {p: v for p, v in zip(percentiles, np.percentile(costs, percentiles, axis=0))},
+        "p_cheapest": cheapest / n,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def risk_table(sim: dict) -> list:
+    """Flatten simulate() into one row per strategy, lowest mean cost first."""
+    rows = []
+    for k, strategy in enumerate(sim["strategies"]):
+        row = {"Strategy": strategy, "Mean (EUR)": float(sim["mean"][k])}
+        for p, values in sim["percentiles"].items():
+            row[f"P{p} (EUR)"] = float(values[k])
+        row["Cheapest (%)"] = float(sim["p_cheapest"][k] * 100.0)
+        rows.append(row)
+    return sorted(rows, key=lambda r: r["Mean (EUR)"])
+
+
+def default_spec(model: dict, eua_sd_pct: float = 25.0, fx_sd_pct: float = 5.0, fuel_sd_pct: float = 15.0,
+                 dist: str = "lognormal") -> dict:
+    """Spread every priced variable of `model` around its point price by a relative standard deviation.
+
+    `dist` is "lognormal", "normal" or "triangular" (for triangular the low and
+    high ends are point -/+ sqrt(6) sd, which has that standard deviation).
+    """
+    point = model["point"]
+
+    def _spread(value, sd_pct):
+        sd = value * sd_pct / 100.0
+        if sd <= 0:
+            return {"dist": "fixed", "value": value}
+        if dist == "triangular":
+            half = sd * math.sqrt(6.0)
+            return {"dist": "triangular", "low": max(value - half, 0.0), "mode": value, "high": value + half}
+        return {"dist": dist, "mean": value, "sd": sd}
+
+    spec = {"eua": _spread(point["eua"], eua_sd_pct), "fx": _spread(point["fx"], fx_sd_pct)}
+    for name in model["items"]:
+        if point[name] > 0:
+            spec[name] = _spread(point[name], fuel_sd_pct)
+    return spec
+
+
+def default_correlations(spec: dict, eua_fuel: float = 0.0, fuel_fuel: float = 0.0, fx_fuel: float = 0.0) -> dict:
+    """Uniform pairwise correlations between the fuel/pooling prices in `spec`, EUA and FX."""
+    fuels = [name for name in spec if name not in MARKET_VARIABLES]
+    correlations = {}
+    for k, a in enumerate(fuels):
+        correlations[("eua", a)] = eua_fuel
+        correlations[("fx", a)] = fx_fuel
+        for b in fuels[k + 1:]:
+            correlations[(a, b)] = fuel_fuel
+    return correlations
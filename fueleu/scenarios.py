@@ -0,0 +1,246 @@
+"""Scenario store: saved compute_blend() inputs and outputs in SQLite.
+
+Each scenario is one row holding the full inputs and result as JSON plus the
+headline figures as plain columns, indexed on vessel, year, GWP and strategy,
+so filtered listings and side-by-side comparisons read the stored figures
+instead of recomputing. load_scenario() returns the saved result as
+compute_blend() would (Decimal sums restored), without running the engine.
+The database is FUELEU_SCENARIOS_DB, default FUELEU_CACHE_DIR/scenarios.sqlite.
+
+    python -m fueleu.scenarios [--vessel V] [--year 2030] [--gwp AR5] [--strategy pooling] [--compare 3,7,12]
+"""
+import argparse
+from decimal import Decimal
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+
+from .engine import _SUM_KEYS, compute_blend
+from .fuels import CACHE_DIR
+
+SCENARIOS_DB = os.environ.get("FUELEU_SCENARIOS_DB") or os.path.join(CACHE_DIR, "scenarios.sqlite")
+SCENARIO_STRATEGIES = ("baseline", "pooling", "add_fuel", "substitution", "least_cost", "other")
+HEADLINE_FIELDS = ("ghg_intensity", "target", "compliance_balance", "penalty", "ets_cost", "total_cost",
+                   "emissions_tonnes", "total_energy")
+SCENARIO_COLUMNS = ("id", "name", "vessel", "year", "gwp_choice", "strategy", "ops", "wind", "eua_price",
+                    "backend", "created") + HEADLINE_FIELDS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    vessel TEXT NOT NULL DEFAULT '',
+    year INTEGER NOT NULL,
+    gwp_choice TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    ops INTEGER,
+    wind REAL,
+    eua_price REAL,
+    backend TEXT NOT NULL,
+    created REAL NOT NULL,
+    ghg_intensity REAL,
+    target REAL,
+    compliance_balance REAL,
+    penalty REAL,
+    ets_cost REAL,
+    total_cost REAL,
+    emissions_tonnes REAL,
+    total_energy REAL,
+    inputs TEXT NOT NULL,
+    outputs TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenarios_vessel ON scenarios (vessel, year);
+CREATE INDEX IF NOT EXISTS scenarios_year ON scenarios (year);
+CREATE INDEX IF NOT EXISTS scenarios_gwp ON scenarios (gwp_choice);
+CREATE INDEX IF NOT EXISTS scenarios_strategy ON scenarios (strategy);
+CREATE INDEX IF NOT EXISTS scenarios_created ON scenarios (created);
+"""
+
+
+# === TABLE ===
+def _connect(db_path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _encode(value):
+    """JSON-safe copy: Decimal as str, NaN / inf as None (Fuel Breakdown rows of WtW-only custom fuels)."""
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _decode_outputs(outputs: dict, backend: str) -> dict:
+    for key in _SUM_KEYS:
+        outputs[key] = Decimal(outputs[key]) if backend == "decimal" else float(outputs[key])
+    for row in outputs["rows"]:
+        for field, value in row.items():
+            if value is None:
+                row[field] = float("nan")
+    return outputs
+
+
+def _row_values(inputs: dict, result: dict, name: str, vessel: str, strategy: str, backend: str, created: float):
+    return (name, vessel or "", int(inputs["year"]), inputs["gwp_choice"], strategy, inputs.get("ops"),
+            inputs.get("wind"), inputs.get("eua_price"), backend, created,
+            *(float(result[f]) for f in HEADLINE_FIELDS),
+            json.dumps(_encode(inputs)), json.dumps(_encode(result)))
+
+
+_INSERT = (f"INSERT INTO scenarios ({', '.join(SCENARIO_COLUMNS[1:])}, inputs, outputs) "
+           f"VALUES ({', '.join('?' * (len(SCENARIO_COLUMNS) + 1))})")
+
+
+# === SAVE ===
+def save_scenario(inputs: dict, result: dict = None, name: str = None, vessel: str = "", strategy: str = "baseline",
+                  backend: str = "decimal", db_path: str = SCENARIOS_DB) -> int:
+    """Store one scenario (`result` is computed when omitted); returns its id."""
+    return save_scenarios([{"inputs": inputs, "result": result, "name": name, "vessel": vessel,
+                            "strategy": strategy}], backend, db_path)[0]
+
+
+def save_scenarios(scenarios, backend: str = "decimal", db_path: str = SCENARIOS_DB) -> list:
+    """Store many scenarios ({inputs, result?, name?, vessel?, strategy?}) in one transaction; returns their ids."""
+    created = time.time()
+    values = []
+    for s in scenarios:
+        inputs = s["inputs"]
+        result = s.get("result") or compute_blend(inputs, backend=backend)
+        strategy = s.get("strategy") or "baseline"
+        name = s.get("name") or f"{s.get('vessel') or 'Blend'} {inputs['year']} {inputs['gwp_choice']} {strategy}"
+        values.append(_row_values(inputs, result, name, s.get("vessel"), strategy, backend, created))
+    with _connect(db_path) as conn:  # one transaction
+        return [conn.execute(_INSERT, v).lastrowid for v in values]
+
+
+# === QUERY ===
+def query_scenarios(vessel=None, year=None, gwp_choice=None, strategy=None, name_contains: str = None,
+                    balance: str = None, order_by: str = "created", descending: bool = True, limit: int = 500,
+                    db_path: str = SCENARIOS_DB) -> list:
+    """Headline columns of the matching scenarios (no inputs / outputs blobs).
+
+    vessel, year, gwp_choice and strategy take one value or a list of values;
+    `balance` is "deficit" or "surplus"; `order_by` is any SCENARIO_COLUMNS name.
+    """
+    if order_by not in SCENARIO_COLUMNS:
+        raise ValueError(f"cannot order by {order_by!r} (expected one of {', '.join(SCENARIO_COLUMNS)})")
+    clauses, args = [], []
+    for column, value in (("vessel", vessel), ("year", year), ("gwp_choice", gwp_choice), ("strategy", strategy)):
+        if value is None:
+            continue
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        if not values:
+            continue
+        clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        args.extend(values)
+    if name_contains:
+        clauses.append("name LIKE ?")
+        args.append(f"%{name_contains}%")
+    if balance == "deficit":
+        clauses.append("compliance_balance < 0")
+    elif balance == "surplus":
+        clauses.append("compliance_balance >= 0")
+    sql = (f"SELECT {', '.join(SCENARIO_COLUMNS)} FROM scenarios"
+           + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+           + f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id DESC LIMIT ?")
+    with _connect(db_path) as conn:
+        return [dict(row) for row in conn.execute(sql, (*args, int(limit))).fetchall()]
+
+
+def scenario_facets(db_path: str = SCENARIOS_DB) -> dict:
+    """Distinct vessels, years, GWP bases and strategies in the store, for filter pickers."""
+    with _connect(db_path) as conn:
+        return {column: [row[0] for row in conn.execute(f"SELECT DISTINCT {column} FROM scenarios ORDER BY 1")]
+                for column in ("vessel", "year", "gwp_choice", "strategy")}
+
+
+def load_scenario(scenario_id: int, db_path: str = SCENARIOS_DB):
+    """The saved scenario as {..headline columns, "inputs", "result"}; `result` is not recomputed. None if absent."""
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM scenarios WHERE id = ?", (int(scenario_id),)).fetchone()
+    if row is None:
+        return None
+    scenario = dict(row)
+    scenario["inputs"] = json.loads(scenario["inputs"])
+    scenario["result"] = _decode_outputs(json.loads(scenario.pop("outputs")), scenario["backend"])
+    return scenario
+
+
+def compare_scenarios(scenario_ids, db_path: str = SCENARIOS_DB) -> dict:
+    """Side-by-side view of saved scenarios from the stored figures.
+
+    Returns {"scenarios": headline dicts in the order given, "deltas": the
+    headline figures minus those of the first scenario, "fuel_tonnes":
+    {fuel: [tonnes per scenario]}} from the stored Fuel Breakdown rows.
+    """
+    ids = [int(i) for i in scenario_ids]
+    if not ids:
+        return {"scenarios": [], "deltas": [], "fuel_tonnes": {}}
+    with _connect(db_path) as conn:
+        rows = conn.execute(f"SELECT {', '.join(SCENARIO_COLUMNS)}, json_extract(outputs, '$.rows') AS rows "
+                            f"FROM scenarios WHERE id IN ({', '.join('?' * len(ids))})", ids).fetchall()
+    by_id = {row["id"]: dict(row) for row in rows}
+    found = [by_id[i] for i in ids if i in by_id]
+    fuel_tonnes = {}
+    for k, scenario in enumerate(found):
+        for fuel_row in json.loads(scenario.pop("rows")):
+            fuel_tonnes.setdefault(fuel_row["Fuel"], [0.0] * len(found))[k] += fuel_row["Quantity (t)"]
+    deltas = [{f: s[f] - found[0][f] for f in HEADLINE_FIELDS} for s in found]
+    return {"scenarios": found, "deltas": deltas, "fuel_tonnes": fuel_tonnes}
+
+
+def delete_scenarios(scenario_ids, db_path: str = SCENARIOS_DB) -> int:
+    ids = [int(i) for i in scenario_ids]
+    with _connect(db_path) as conn:
+        return conn.execute(f"DELETE FROM scenarios WHERE id IN ({', '.join('?' * len(ids))})", ids).rowcount if ids else 0
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or compare saved FuelEU scenarios.")
+    parser.add_argument("--db", default=SCENARIOS_DB)
+    parser.add_argument("--vessel", action="append")
+    parser.add_argument("--year", type=int, action="append")
+    parser.add_argument("--gwp", action="append", choices=["AR4", "AR5"])
+    parser.add_argument("--strategy", action="append")
+    parser.add_argument("--balance", choices=["deficit", "surplus"])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--compare", help="comma-separated scenario ids to show side by side")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        view = compare_scenarios(args.compare.split(","), args.db)
+        scenarios = view["scenarios"]
+        print(f"{'':<22}" + "".join(f"{'#' + str(s['id']):>16}" for s in scenarios))
+        for field in ("name", "vessel", "year", "gwp_choice", "strategy") + HEADLINE_FIELDS:
+            cells = (f"{s[field]:>16,.2f}" if isinstance(s[field], float) else f"{str(s[field])[:15]:>16}"
+                     for s in scenarios)
+            print(f"{field:<22}" + "".join(cells))
+        return 0
+
+    started = time.perf_counter()
+    rows = query_scenarios(args.vessel, args.year, args.gwp, args.strategy, balance=args.balance,
+                           limit=args.limit, db_path=args.db)
+    print(f"{'id':>6}  {'vessel':<16}{'year':>6} {'gwp':<5}{'strategy':<14}{'GHG':>9}{'balance t':>14}{'penalty EUR':>16}")
+    for r in rows:
+        print(f"{r['id']:>6}  {r['vessel'][:15]:<16}{r['year']:>6} {r['gwp_choice']:<5}{r['strategy'][:13]:<14}"
+              f"{r['ghg_intensity']:>9.2f}{r['compliance_balance']:>14,.1f}{r['penalty']:>16,.0f}")
+    print(f"{len(rows):,} scenarios in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
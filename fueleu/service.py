@@ -0,0 +1,307 @@
+"""Local HTTP/JSON service for the FuelEU / ETS calculation core.
+
+Every POST body is {"scenarios": [compute_blend() inputs, ...], ...options}
+and every response {"results": [...]} in the same order; GET /metrics returns
+request, scenario and latency counters per endpoint plus coalescing stats.
+
+    POST /v1/blend         compute_blend() per scenario ("backend": "decimal" | "float")
+    POST /v1/summary       headline figures, float64; concurrent requests are coalesced
+                           into one fleet.compute_scenarios() call
+    POST /v1/add-fuel      solve_add_fuel() per scenario
+    POST /v1/substitutions ranked solve_substitution_all() ("prices_usd": {fuel: USD/t})
+    POST /v1/least-cost    solve_least_cost() ("prices_usd", "caps_t", "pooling_price_usd", "allow_penalty")
+    POST /v1/ets-cost      {"items": [{ttw_co2_g, ttw_nonco2_g, eua_price, effective_coverage_pct,
+                           phase_in_pct, include_nonco2}, ...]} -> compute_ets_cost() per item
+    GET  /metrics, /healthz
+
+HTTP/1.1 with keep-alive; one thread per connection.
+
+    python -m fueleu.service --port 8765 [--window-ms 2] [--max-batch 20000]
+"""
+import argparse
+from collections import deque
+from concurrent.futures import Future
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from .engine import compute_blend, compute_ets_cost
+from .fleet import SCENARIO_FIELDS, compute_scenarios
+from .fuels import FUEL_INDEX
+from .mitigation import rank_substitutions, solve_add_fuel, solve_least_cost, solve_substitution_all
+
+SERVICE_PORT = 8765
+COALESCE_WINDOW_S = 0.002    # how long the first queued /v1/summary request waits for others
+COALESCE_MAX_SCENARIOS = 20_000
+MAX_BODY_BYTES = 32 * 1024 * 1024
+LATENCY_WINDOW = 2048        # recent requests per endpoint kept for the latency percentiles
+
+
+# === JSON ===
+def _jsonable(value):
+    """Decimal / NumPy values to JSON numbers; NaN and inf to null."""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _jsonable(value.tolist())
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (Decimal, float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+# === COALESCING ===
+def start_coalescer(evaluate, window_s: float = COALESCE_WINDOW_S, max_scenarios: int = COALESCE_MAX_SCENARIOS,
+                    stats: dict = None) -> dict:
+    """Run `evaluate(scenarios) -> list` on a worker thread over batches merged from concurrent submit() calls."""
+    coalescer = {"queue": queue.Queue(), "window_s": window_s, "max_scenarios": max_scenarios,
+                 "stats": stats if stats is not None else {"batches": 0, "requests": 0, "scenarios": 0,
+                                                           "max_requests": 0}}
+
+    def _worker():
+        while True:
+            pending = [coalescer["queue"].get()]
+            size = len(pending[0][0])
+            deadline = time.perf_counter() + coalescer["window_s"]
+            while size < coalescer["max_scenarios"]:
+                try:
+                    pending.append(coalescer["queue"].get(timeout=max(deadline - time.perf_counter(), 0.0)))
+                except queue.Empty:
+                    break
+                size += len(pending[-1][0])
+            scenarios = [s for batch, _ in pending for s in batch]
+            try:
+                results = evaluate(scenarios)
+            except Exception as exc:  # every caller in the batch gets the error
+                for _, future in pending:
+                    future.set_exception(exc)
+                continue
+            offset = 0
+            for batch, future in pending:
+                future.set_result(results[offset:offset + len(batch)])
+                offset += len(batch)
+            stats = coalescer["stats"]
+            stats["batches"] += 1
+            stats["requests"] += len(pending)
+            stats["scenarios"] += len(scenarios)
+            stats["max_requests"] = max(stats["max_requests"], len(pending))
+
+    coalescer["thread"] = threading.Thread(target=_worker, name="fueleu-coalescer", daemon=True)
+    coalescer["thread"].start()
+    return coalescer
+
+
+def submit(coalescer: dict, scenarios: list) -> Future:
+    future = Future()
+    coalescer["queue"].put((scenarios, future))
+    return future
+
+
+def summarize(scenarios: list) -> list:
+    """compute_scenarios() split back into one {field: value} dict per scenario."""
+    columns = compute_scenarios(scenarios)
+    return [dict(zip(SCENARIO_FIELDS, values)) for values in zip(*(columns[f].tolist() for f in SCENARIO_FIELDS))]
+
+
+# === ENDPOINTS ===
+def _scenarios(body: dict) -> list:
+    scenarios = body.get("scenarios")
+    if not isinstance(scenarios, list) or not all(isinstance(s, dict) for s in scenarios):
+        raise ValueError('"scenarios" must be a list of compute_blend() input objects')
+    for i, s in enumerate(scenarios):  # the engine skips unknown names; a typo must not read as zero emissions
+        for key in ("fuel_inputs", "fuel_price_inputs"):
+            fuels = s.get(key) or {}
+            if not isinstance(fuels, dict):
+                raise ValueError(f'scenario {i}: "{key}" must be an object of fuel name -> value')
+            unknown = [name for name in fuels if name not in FUEL_INDEX]
+            if unknown:
+                raise ValueError(f'scenario {i}: unknown fuel(s) in "{key}": {", ".join(map(repr, unknown))}')
+    return scenarios
+
+
+def _blend(body, service):
+    backend = body.get("backend", "decimal")
+    return [compute_blend(s, backend=backend) for s in _scenarios(body)]
+
+
+def _summary(body, service):
+    scenarios = _scenarios(body)
+    return submit(service["coalescer"], scenarios).result() if scenarios else []
+
+
+def _add_fuel(body, service):
+    return [solve_add_fuel(s, compute_blend(s)) for s in _scenarios(body)]
+
+
+def _substitutions(body, service):
+    prices = body.get("prices_usd")
+    return [rank_substitutions(solve_substitution_all(s, compute_blend(s), substitute_prices_usd=prices))
+            for s in _scenarios(body)]
+
+
+def _least_cost(body, service):
+    return [solve_least_cost(s, compute_blend(s), body.get("prices_usd"), body.get("caps_t"),
+                             float(body.get("pooling_price_usd", 0.0)), allow_penalty=bool(body.get("allow_penalty", True)))
+            for s in _scenarios(body)]
+
+
+def _ets_cost(body, service):
+    items = body.get("items")
+    if not isinstance(items, list):
+        raise ValueError('"items" must be a list')
+    results = []
+    for item in items:
+        cost, covered = compute_ets_cost(
+            Decimal(str(item["ttw_co2_g"])), Decimal(str(item.get("ttw_nonco2_g", 0))), float(item["eua_price"]),
+            float(item.get("effective_coverage_pct", 100.0)), float(item.get("phase_in_pct", 100.0)),
+            bool(item.get("include_nonco2", True)))
+        results.append({"ets_cost": cost, "ets_covered_tonnes": covered})
+    return results
+
+
+ENDPOINTS = {
+    "/v1/blend": _blend,
+    "/v1/summary": _summary,
+    "/v1/add-fuel": _add_fuel,
+    "/v1/substitutions": _substitutions,
+    "/v1/least-cost": _least_cost,
+    "/v1/ets-cost": _ets_cost,
+}
+
+
+# === METRICS ===
+def _record(service: dict, path: str, items: int, seconds: float, ok: bool):
+    with service["lock"]:
+        m = service["metrics"].setdefault(path, {"requests": 0, "errors": 0, "items": 0, "busy_s": 0.0,
+                                                 "recent_ms": deque(maxlen=LATENCY_WINDOW)})
+        m["requests"] += 1
+        m["errors"] += int(not ok)
+        m["items"] += items
+        m["busy_s"] += seconds
+        m["recent_ms"].append(seconds * 1000.0)
+
+
+def metrics_snapshot(service: dict) -> dict:
+    """Per-endpoint counters, mean / p50 / p95 / p99 latency of recent requests, throughput and coalescing stats."""
+    uptime = time.perf_counter() - service["started"]
+    endpoints = {}
+    with service["lock"]:
+        for path, m in service["metrics"].items():
+            recent = np.array(m["recent_ms"]) if m["recent_ms"] else np.zeros(1)
+            p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+            endpoints[path] = {
+                "requests": m["requests"],
+                "errors": m["errors"],
+                "items": m["items"],
+                "mean_ms": m["busy_s"] * 1000.0 / max(m["requests"], 1),
+                "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+                "requests_per_s": m["requests"] / uptime,
+                "items_per_s": m["items"] / uptime,
+            }
+        coalesced = dict(service["coalesced"])
+    coalesced["mean_requests_per_batch"] = coalesced["requests"] / max(coalesced["batches"], 1)
+    return {"uptime_s": uptime, "endpoints": endpoints, "coalescing": coalesced}
+
+
+# === SERVER ===
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: every response carries Content-Length
+    server_version = "fueleu-service"
+
+    def _send(self, status: int, payload):
+        data = json.dumps(_jsonable(payload), allow_nan=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send(200, metrics_snapshot(self.server.service))
+        elif self.path == "/healthz":
+            self._send(200, {"status": "ok"})
+        else:
+            self._send(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        started = time.perf_counter()
+        endpoint = ENDPOINTS.get(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True  # body left unread
+            self._send(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+            return
+        raw = self.rfile.read(length)
+        if endpoint is None:
+            self._send(404, {"error": f"unknown path {self.path}"})
+            return
+        results, status = None, 200
+        try:
+            body = json.loads(raw or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("request body must be a JSON object")
+            results = endpoint(body, self.server.service)
+        except (ValueError, KeyError, TypeError) as exc:  # bad input, including unknown fuels / backends
+            status, error = 400, f"{type(exc).__name__}: {exc}"
+        except Exception as exc:
+            status, error = 500, f"{type(exc).__name__}: {exc}"
+        _record(self.server.service, self.path, len(results or ()), time.perf_counter() - started, status == 200)
+        self._send(status, {"results": results} if status == 200 else {"error": error})
+
+    def log_message(self, format, *args):
+        pass  # per-request lines would dominate; see /metrics
+
+
+def make_server(host: str = "127.0.0.1", port: int = SERVICE_PORT, window_s: float = COALESCE_WINDOW_S,
+                max_scenarios: int = COALESCE_MAX_SCENARIOS) -> ThreadingHTTPServer:
+    """Build (not start) the service; port 0 picks a free port (server.server_address)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    coalesced = {"batches": 0, "requests": 0, "scenarios": 0, "max_requests": 0}
+    server.service = {
+        "started": time.perf_counter(),
+        "lock": threading.Lock(),
+        "metrics": {},
+        "coalesced": coalesced,
+        "coalescer": start_coalescer(summarize, window_s, max_scenarios, coalesced),
+    }
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the FuelEU / ETS calculation core over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--window-ms", type=float, default=COALESCE_WINDOW_S * 1000,
+                        help="how long /v1/summary waits to merge concurrent requests")
+    parser.add_argument("--max-batch", type=int, default=COALESCE_MAX_SCENARIOS,
+                        help="scenarios per coalesced /v1/summary evaluation")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.window_ms / 1000.0, args.max_batch)
+    host, port = server.server_address[:2]
+    print(f"fueleu service on http://{host}:{port} (POST {', '.join(ENDPOINTS)}; GET /metrics)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Full-factorial sweep of one blend over OPS, wind, GWP basis and year.
+
+The blend's fuel quantities are folded into the fuel-factor arrays once; each
+factor then depends on a single lever (TtW CO2 on OPS x wind, non-CO2 on GWP
+and year, energy / WtT / WtW-only on year through the RFNBO credit), so the
+whole grid (21 x 4 x 2 x 26 = 4,368 cells by default) is one broadcast over
+(ops, wind, gwp, year) instead of one compute_blend() per cell. Cells match
+compute_blend() to within fleet.FLEET_RTOL.
+"""
+import numpy as np
+
+from .constants import ETS_NONCO2_FROM, GWP_VALUES, PENALTY_RATE, RFNBO_REWARD_UNTIL, VLSFO_ENERGY_CONTENT
+from .engine import _with_defaults
+from .factors import compile_factors, per_tonne_factors
+from .fuels import FUEL_INDEX, FUELS
+from .projection import PROJECTION_YEARS, phase_in_series, target_series
+
+SWEEP_OPS = np.arange(0, 21)                    # OPS reward factor (%), as offered by the app
+SWEEP_WINDS = np.array([1.00, 0.99, 0.97, 0.95])
+SWEEP_GWPS = tuple(GWP_VALUES)
+SWEEP_FIELDS = ("ghg_intensity", "compliance_balance", "penalty", "ets_cost", "emissions_tonnes")
+
+
+# === SWEEP ===
+def _used_fuels(inputs: dict) -> tuple:
+    """(fuel dicts, tonnes) of the rows compute_blend() would count: stock fuels, then custom fuels, qty > 0."""
+    fuels, tonnes = [], []
+    for name, qty in inputs["fuel_inputs"].items():
+        if name in FUEL_INDEX and float(qty or 0.0) > 0:
+            fuels.append(FUELS[FUEL_INDEX[name]])
+            tonnes.append(float(qty))
+    for cf in inputs["custom_fuels"]:
+        if float(cf.get("qty_t", 0.0) or 0.0) > 0:
+            fuels.append(cf)
+            tonnes.append(float(cf["qty_t"]))
+    return fuels, np.array(tonnes)
+
+
+def sweep(inputs: dict, ops=None, winds=None, gwp_choices=None, years=None, phase_in_pct=None) -> dict:
+    """Intensity, balance, penalty and ETS cost of `inputs` for every (ops, wind, gwp, year) combination.
+
+    `inputs` follows DEFAULT_BLEND_INPUTS (its year, GWP, OPS, wind and
+    phase-in are replaced by the grid). Axes default to SWEEP_OPS, SWEEP_WINDS,
+    SWEEP_GWPS and PROJECTION_YEARS; `phase_in_pct` defaults to the
+    regulatory schedule per year. Returns the axes plus SWEEP_FIELDS arrays of
+    shape (ops, winds, gwps, years), "target" per year and "surplus_ops": the
+    lowest swept OPS % with a non-negative balance per (wind, gwp, year), NaN
+    where none is.
+    """
+    inputs = _with_defaults(inputs)
+    ops = np.asarray(SWEEP_OPS if ops is None else ops, dtype=np.float64)
+    winds = np.asarray(SWEEP_WINDS if winds is None else winds, dtype=np.float64)
+    gwp_choices = tuple(SWEEP_GWPS if gwp_choices is None else gwp_choices)
+    years = np.asarray(PROJECTION_YEARS if years is None else years, dtype=np.int64)
+
+    fuels, tonnes = _used_fuels(inputs)
+    factors = compile_factors(fuels)
+    # per_tonne_factors() is linear in ttw_co2 * (1 - ops/100) * wind and in the GWP weights, so the
+    # lever-free totals (ops 0, wind 1) of each RFNBO-credit regime and GWP basis carry the whole grid
+    credited = years <= RFNBO_REWARD_UNTIL
+    totals = {(c, g): tonnes @ per_tonne_factors(factors, RFNBO_REWARD_UNTIL + (not c), g) if len(tonnes) else np.zeros(5)
+              for c in np.unique(credited) for g in gwp_choices}  # blend [energy, wtt, co2, nonco2, wtw_only]
+    by_year = np.array([[totals[c, g] for c in credited] for g in gwp_choices])  # (gwps, years, 5)
+    energy = by_year[0, :, 0]  # independent of GWP
+    wtt, nonco2, wtw_only = by_year[..., 1], by_year[..., 3], by_year[..., 4]
+    co2 = by_year[0, 0, 2] * (1 - ops / 100)[:, None] * winds[None, :]  # (ops, winds)
+
+    emissions = co2[:, :, None, None] + (wtt + nonco2 + wtw_only)[None, None, :, :]  # (ops, winds, gwps, years)
+    target = target_series(years)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ghg = np.where(energy > 0, emissions / np.where(energy > 0, energy, 1.0), 0.0)
+        balance = energy * (target - ghg) / 1_000_000.0
+        penalty = np.where(balance < 0, -balance / np.where(ghg > 0, ghg, 1.0) / VLSFO_ENERGY_CONTENT
+                           * PENALTY_RATE * 1_000_000, 0.0)
+
+    phase = phase_in_series(years) if phase_in_pct is None else np.broadcast_to(np.asarray(phase_in_pct, dtype=float), years.shape)
+    ttw = co2[:, :, None, None] + np.where(years >= ETS_NONCO2_FROM, nonco2, 0.0)[None, None, :, :]
+    ets_cost = (ttw * (inputs["effective_coverage_pct"] / 100.0) * (phase / 100.0) / 1_000_000.0
+                * float(inputs["eua_price"]))
+
+    surplus = balance >= 0
+    first = np.argmax(surplus, axis=0)  # lowest OPS index in surplus, 0 when none
+    surplus_ops = np.where(surplus.any(axis=0), ops[first], np.nan)
+
+    return {
+        "ops": ops,
+        "winds": winds,
+        "gwp_choices": gwp_choices,
+        "years": years,
+        "target": target,
+        "total_energy": energy,
+        "ghg_intensity": ghg,
+        "compliance_balance": balance,
+        "penalty": penalty,
+        "ets_cost": ets_cost,
+        "emissions_tonnes": emissions / 1_000_000.0,
+        "surplus_ops": surplus_ops,
+    }